@@ -11,6 +11,7 @@ from werkzeug.exceptions import NotFound
 
 from configs import dify_config
 from constants.languages import languages
+from core.helper.model_provider_cache import ProviderConfigurationsCache
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.index_processor.constant.built_in_field import BuiltInField
@@ -29,6 +30,7 @@ from models.model import Account, App, AppAnnotationSetting, AppMode, Conversati
 from models.provider import Provider, ProviderModel
 from services.account_service import RegisterService, TenantService
 from services.clear_free_plan_tenant_expired_logs import ClearFreePlanTenantExpiredLogs
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 from services.plugin.data_migration import PluginDataMigration
 from services.plugin.plugin_migration import PluginMigration
 
@@ -134,6 +136,7 @@ def reset_encrypt_key_pair():
         db.session.query(Provider).filter(Provider.provider_type == "custom", Provider.tenant_id == tenant.id).delete()
         db.session.query(ProviderModel).filter(ProviderModel.tenant_id == tenant.id).delete()
         db.session.commit()
+        ProviderConfigurationsCache(tenant_id=tenant.id).invalidate()
 
         click.echo(
             click.style(
@@ -1153,3 +1156,31 @@ def remove_orphaned_files_on_storage(force: bool):
         click.echo(click.style(f"Removed {removed_files} orphaned files without errors.", fg="green"))
     else:
         click.echo(click.style(f"Removed {removed_files} orphaned files, with {error_files} errors.", fg="yellow"))
+
+
+@click.command("backfill-document-segment-statistics", help="Backfill the segment statistics stored on documents.")
+@click.option("--batch-size", default=500, show_default=True, help="Number of documents updated per transaction.")
+def backfill_document_segment_statistics(batch_size: int):
+    """
+    Recalculate the segment counters of all documents from their segments.
+    """
+    click.echo(click.style("Starting backfill of document segment statistics.", fg="white"))
+
+    total = 0
+    last_id = None
+    while True:
+        stmt = select(DatasetDocument.id).order_by(DatasetDocument.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(DatasetDocument.id > last_id)
+        document_ids = db.session.scalars(stmt).all()
+        if not document_ids:
+            break
+
+        DocumentSegmentStatisticsService.refresh(document_ids)
+        db.session.commit()
+
+        total += len(document_ids)
+        last_id = document_ids[-1]
+        click.echo(click.style(f"Backfilled segment statistics of {total} documents.", fg="white"))
+
+    click.echo(click.style(f"Backfill completed, {total} documents updated.", fg="green"))
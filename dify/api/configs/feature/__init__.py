@@ -65,6 +65,19 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of requests per app per day",
         default=5000,
     )
+    SSE_COALESCING_ENABLED: bool = Field(
+        description="Merge consecutive text chunks of streaming responses into fewer server-sent events",
+        default=False,
+    )
+    SSE_COALESCING_WINDOW_MS: PositiveInt = Field(
+        description="Maximum time in milliseconds between the first and the last text chunk merged into one"
+        " server-sent event",
+        default=40,
+    )
+    SSE_COALESCING_MAX_BYTES: PositiveInt = Field(
+        description="Maximum size in bytes of the text merged into one server-sent event",
+        default=4096,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -97,6 +110,33 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=10.0,
     )
 
+    CODE_EXECUTION_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections to the code execution service",
+        default=100,
+    )
+
+    CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of idle connections to the code execution service kept alive",
+        default=20,
+    )
+
+    CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds an idle connection to the code execution service is kept alive",
+        default=5.0,
+    )
+
+    CODE_EXECUTION_BATCH_WINDOW_MS: NonNegativeInt = Field(
+        description="Time in milliseconds concurrent executions of the same code in a workflow run are collected to"
+        " run in a single call of the code execution service, 0 to disable. An error in one execution makes the"
+        " whole batch run again one by one.",
+        default=0,
+    )
+
+    CODE_EXECUTION_BATCH_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of executions run in a single call of the code execution service",
+        default=32,
+    )
+
     CODE_MAX_NUMBER: PositiveInt = Field(
         description="Maximum allowed numeric value in code execution",
         default=9223372036854775807,
@@ -137,6 +177,22 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=1000,
     )
 
+    JINJA2_IN_PROCESS_RENDERING_ENABLED: bool = Field(
+        description="Render Jinja2 templates in a sandboxed environment of the API process"
+        " instead of the code execution service",
+        default=False,
+    )
+
+    JINJA2_IN_PROCESS_RENDERING_TIMEOUT: PositiveFloat = Field(
+        description="Maximum time in seconds for rendering a Jinja2 template in process",
+        default=1.0,
+    )
+
+    JINJA2_IN_PROCESS_RENDERING_MAX_OUTPUT_LENGTH: PositiveInt = Field(
+        description="Maximum length of the output of a Jinja2 template rendered in process",
+        default=1000000,
+    )
+
 
 class PluginConfig(BaseSettings):
     """
@@ -447,7 +503,7 @@ class LoggingConfig(BaseSettings):
 
 class ModelLoadBalanceConfig(BaseSettings):
     """
-    Configuration for model load balancing and token counting
+    Configuration for model load balancing, token counting, provider configurations and embedding batching
     """
 
     MODEL_LB_ENABLED: bool = Field(
@@ -460,6 +516,23 @@ class ModelLoadBalanceConfig(BaseSettings):
         default=False,
     )
 
+    PROVIDER_CONFIGURATIONS_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds a process reuses the model provider configurations of a workspace,"
+        " dropped earlier when providers, models or credentials change. Set to 0 to disable.",
+        default=60,
+    )
+
+    EMBEDDING_BATCH_WINDOW_MS: NonNegativeInt = Field(
+        description="Time in milliseconds concurrent embedding requests for the same model are collected to send"
+        " them to the provider as one batch, 0 to disable",
+        default=0,
+    )
+
+    EMBEDDING_BATCH_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of texts collected in one batch of concurrent embedding requests",
+        default=256,
+    )
+
 
 class BillingConfig(BaseSettings):
     """
@@ -471,6 +544,12 @@ class BillingConfig(BaseSettings):
         default=False,
     )
 
+    FEATURES_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds the features and knowledge rate limit of a workspace fetched from the billing"
+        " and enterprise services are reused, dropped earlier on subscription events. Set to 0 to disable.",
+        default=0,
+    )
+
 
 class UpdateConfig(BaseSettings):
     """
@@ -529,6 +608,21 @@ class WorkflowNodeExecutionConfig(BaseSettings):
         description="Storage backend for WorkflowNodeExecution. Options: 'rdbms', 'hybrid'",
     )
 
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED: bool = Field(
+        description="Buffer node execution writes of a workflow run and persist them in bulk from a background worker",
+        default=False,
+    )
+
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE: PositiveInt = Field(
+        description="Number of buffered node execution writes that triggers a background flush",
+        default=20,
+    )
+
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_FLUSH_INTERVAL: PositiveFloat = Field(
+        description="Maximum time in seconds a buffered node execution write waits before being flushed",
+        default=0.5,
+    )
+
 
 class AuthConfig(BaseSettings):
     """
@@ -591,6 +685,11 @@ class ModerationConfig(BaseSettings):
         default=300,
     )
 
+    MODERATION_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of threads moderating streamed outputs, shared by all responses of a process",
+        default=16,
+    )
+
 
 class ToolConfig(BaseSettings):
     """
@@ -696,6 +795,22 @@ class RagEtlConfig(BaseSettings):
         default="false",
     )
 
+    PDF_EXTRACTION_PROCESSES: NonNegativeInt = Field(
+        description="Number of processes extracting the pages of large PDF files in parallel,"
+        " 0 to extract them on one thread",
+        default=0,
+    )
+
+    PDF_EXTRACTION_PARALLEL_MIN_PAGES: PositiveInt = Field(
+        description="Minimum number of pages for a PDF file to be extracted in parallel",
+        default=100,
+    )
+
+    PDF_EXTRACTION_PAGES_PER_TASK: PositiveInt = Field(
+        description="Number of consecutive pages extracted by each task of a parallel PDF extraction",
+        default=25,
+    )
+
 
 class DataSetConfig(BaseSettings):
     """
@@ -732,6 +847,23 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    RETRIEVAL_STATISTICS_ASYNC_ENABLED: bool = Field(
+        description="Aggregate segment hit counts and dataset queries in Redis and persist them"
+        " from a scheduled task instead of writing them during retrieval",
+        default=False,
+    )
+
+    RETRIEVAL_STATISTICS_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval in seconds between flushes of aggregated retrieval statistics to the database",
+        default=60,
+    )
+
+    RETRIEVAL_RESULT_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds the results of a retrieval from a dataset are reused for the same query and"
+        " retrieval settings, dropped earlier when documents or segments of the dataset change. Set to 0 to disable.",
+        default=0,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -759,6 +891,52 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    SEGMENT_BULK_INSERT_BATCH_SIZE: PositiveInt = Field(
+        description="Number of segments inserted and embedded per batch when creating segments in bulk",
+        default=500,
+    )
+
+    SEGMENT_COPY_LOADER_ENABLED: bool = Field(
+        description="Load new segments and child chunks of indexed documents with PostgreSQL COPY instead of INSERT",
+        default=False,
+    )
+
+    QA_INDEXING_CONCURRENCY: PositiveInt = Field(
+        description="Maximum number of concurrent LLM calls generating Q&A pairs for one document",
+        default=10,
+    )
+
+    QA_INDEXING_TENANT_CONCURRENCY: NonNegativeInt = Field(
+        description="Maximum number of concurrent LLM calls generating Q&A pairs per tenant (0 for unlimited)",
+        default=0,
+    )
+
+    QA_INDEXING_MAX_RETRIES: NonNegativeInt = Field(
+        description="Maximum number of retries of a failed LLM call generating Q&A pairs",
+        default=3,
+    )
+
+    QA_INDEXING_CHECKPOINT_TTL: PositiveInt = Field(
+        description="Time in seconds generated Q&A pairs are kept to resume interrupted indexing",
+        default=86400,
+    )
+
+    INDEXING_PIPELINE_ENABLED: bool = Field(
+        description="Split, save and embed the segments of high quality paragraph documents while they are"
+        " still being extracted, instead of one stage after another",
+        default=False,
+    )
+
+    INDEXING_PIPELINE_BATCH_SIZE: PositiveInt = Field(
+        description="Number of segments saved together, and embedded together by each loader of the indexing pipeline",
+        default=100,
+    )
+
+    INDEXING_PIPELINE_QUEUE_SIZE: PositiveInt = Field(
+        description="Number of extracted pages the indexing pipeline buffers before extraction waits for splitting",
+        default=50,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -766,6 +944,12 @@ class MultiModalTransferConfig(BaseSettings):
         default="base64",
     )
 
+    MULTIMODAL_ENCODING_CACHE_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum total length in bytes of the base64 encodings of upload and tool files a process keeps"
+        " to send them again, e.g. with the history of a conversation, 0 to disable",
+        default=64 * 1024 * 1024,
+    )
+
 
 class CeleryBeatConfig(BaseSettings):
     CELERY_BEAT_SCHEDULER_TIME: int = Field(
@@ -71,6 +71,17 @@ class StorageConfig(BaseSettings):
         deprecated=True,
     )
 
+    STORAGE_READ_CACHE_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum size in bytes of the local disk cache of files read from the storage, 0 to disable."
+        " Only upload and tool files are cached, as they do not change once saved.",
+        default=0,
+    )
+
+    STORAGE_READ_CACHE_PATH: str = Field(
+        description="Directory of the local disk cache of files read from the storage",
+        default="storage_read_cache",
+    )
+
 
 class VectorStoreConfig(BaseSettings):
     VECTOR_STORE: Optional[str] = Field(
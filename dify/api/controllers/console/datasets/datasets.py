@@ -29,7 +29,7 @@ from fields.app_fields import related_app_list
 from fields.dataset_fields import dataset_detail_fields, dataset_query_detail_fields
 from fields.document_fields import document_status_fields
 from libs.login import login_required
-from models import ApiToken, Dataset, Document, DocumentSegment, UploadFile
+from models import ApiToken, Dataset, Document, UploadFile
 from models.dataset import DatasetPermissionEnum
 from services.dataset_service import DatasetPermissionService, DatasetService, DocumentService
 
@@ -526,20 +526,6 @@ class DatasetIndexingStatusApi(Resource):
         )
         documents_status = []
         for document in documents:
-            completed_segments = (
-                db.session.query(DocumentSegment)
-                .filter(
-                    DocumentSegment.completed_at.isnot(None),
-                    DocumentSegment.document_id == str(document.id),
-                    DocumentSegment.status != "re_segment",
-                )
-                .count()
-            )
-            total_segments = (
-                db.session.query(DocumentSegment)
-                .filter(DocumentSegment.document_id == str(document.id), DocumentSegment.status != "re_segment")
-                .count()
-            )
             # Create a dictionary with document attributes and additional fields
             document_dict = {
                 "id": document.id,
@@ -552,8 +538,8 @@ class DatasetIndexingStatusApi(Resource):
                 "paused_at": document.paused_at,
                 "error": document.error,
                 "stopped_at": document.stopped_at,
-                "completed_segments": completed_segments,
-                "total_segments": total_segments,
+                "completed_segments": document.completed_segments,
+                "total_segments": document.total_segments,
             }
             documents_status.append(marshal(document_dict, document_status_fields))
         data = {"data": documents_status}
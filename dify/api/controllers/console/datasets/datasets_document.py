@@ -51,7 +51,7 @@ from fields.document_fields import (
     document_with_segments_fields,
 )
 from libs.login import login_required
-from models import Dataset, DatasetProcessRule, Document, DocumentSegment, UploadFile
+from models import Dataset, DatasetProcessRule, Document, UploadFile
 from services.dataset_service import DatasetService, DocumentService
 from services.entities.knowledge_entities.knowledge_entities import KnowledgeConfig
 from tasks.add_document_to_index_task import add_document_to_index_task
@@ -188,14 +188,8 @@ class DatasetDocumentListApi(Resource):
             sort_logic = asc
 
         if sort == "hit_count":
-            sub_query = (
-                db.select(DocumentSegment.document_id, db.func.sum(DocumentSegment.hit_count).label("total_hit_count"))
-                .group_by(DocumentSegment.document_id)
-                .subquery()
-            )
-
-            query = query.outerjoin(sub_query, sub_query.c.document_id == Document.id).order_by(
-                sort_logic(db.func.coalesce(sub_query.c.total_hit_count, 0)),
+            query = query.order_by(
+                sort_logic(Document.total_hit_count),
                 sort_logic(Document.position),
             )
         elif sort == "created_at":
@@ -212,23 +206,6 @@ class DatasetDocumentListApi(Resource):
         paginated_documents = db.paginate(select=query, page=page, per_page=limit, max_per_page=100, error_out=False)
         documents = paginated_documents.items
         if fetch:
-            for document in documents:
-                completed_segments = (
-                    db.session.query(DocumentSegment)
-                    .filter(
-                        DocumentSegment.completed_at.isnot(None),
-                        DocumentSegment.document_id == str(document.id),
-                        DocumentSegment.status != "re_segment",
-                    )
-                    .count()
-                )
-                total_segments = (
-                    db.session.query(DocumentSegment)
-                    .filter(DocumentSegment.document_id == str(document.id), DocumentSegment.status != "re_segment")
-                    .count()
-                )
-                document.completed_segments = completed_segments
-                document.total_segments = total_segments
             data = marshal(documents, document_with_segments_fields)
         else:
             data = marshal(documents, document_fields)
@@ -569,20 +546,6 @@ class DocumentBatchIndexingStatusApi(DocumentResource):
         documents = self.get_batch_documents(dataset_id, batch)
         documents_status = []
         for document in documents:
-            completed_segments = (
-                db.session.query(DocumentSegment)
-                .filter(
-                    DocumentSegment.completed_at.isnot(None),
-                    DocumentSegment.document_id == str(document.id),
-                    DocumentSegment.status != "re_segment",
-                )
-                .count()
-            )
-            total_segments = (
-                db.session.query(DocumentSegment)
-                .filter(DocumentSegment.document_id == str(document.id), DocumentSegment.status != "re_segment")
-                .count()
-            )
             # Create a dictionary with document attributes and additional fields
             document_dict = {
                 "id": document.id,
@@ -595,8 +558,8 @@ class DocumentBatchIndexingStatusApi(DocumentResource):
                 "paused_at": document.paused_at,
                 "error": document.error,
                 "stopped_at": document.stopped_at,
-                "completed_segments": completed_segments,
-                "total_segments": total_segments,
+                "completed_segments": document.completed_segments,
+                "total_segments": document.total_segments,
             }
             documents_status.append(marshal(document_dict, document_status_fields))
         data = {"data": documents_status}
@@ -612,21 +575,6 @@ class DocumentIndexingStatusApi(DocumentResource):
         document_id = str(document_id)
         document = self.get_document(dataset_id, document_id)
 
-        completed_segments = (
-            db.session.query(DocumentSegment)
-            .filter(
-                DocumentSegment.completed_at.isnot(None),
-                DocumentSegment.document_id == str(document_id),
-                DocumentSegment.status != "re_segment",
-            )
-            .count()
-        )
-        total_segments = (
-            db.session.query(DocumentSegment)
-            .filter(DocumentSegment.document_id == str(document_id), DocumentSegment.status != "re_segment")
-            .count()
-        )
-
         # Create a dictionary with document attributes and additional fields
         document_dict = {
             "id": document.id,
@@ -639,8 +587,8 @@ class DocumentIndexingStatusApi(DocumentResource):
             "paused_at": document.paused_at,
             "error": document.error,
             "stopped_at": document.stopped_at,
-            "completed_segments": completed_segments,
-            "total_segments": total_segments,
+            "completed_segments": document.completed_segments,
+            "total_segments": document.total_segments,
         }
         return marshal(document_dict, document_status_fields)
 
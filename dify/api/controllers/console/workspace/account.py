@@ -30,6 +30,7 @@ from models import AccountIntegrate, InvitationCode
 from services.account_service import AccountService
 from services.billing_service import BillingService
 from services.errors.account import CurrentPasswordIncorrectError as ServiceCurrentPasswordIncorrectError
+from services.feature_service import FeatureService
 
 
 class AccountInitApi(Resource):
@@ -332,7 +333,9 @@ class EducationApi(Resource):
         parser.add_argument("role", type=str, required=True, location="json")
         args = parser.parse_args()
 
-        return BillingService.EducationIdentity.activate(account, args["token"], args["institution"], args["role"])
+        result = BillingService.EducationIdentity.activate(account, args["token"], args["institution"], args["role"])
+        FeatureService.invalidate_features(account.current_tenant_id)
+        return result
 
     @setup_required
     @login_required
@@ -57,7 +57,9 @@ class MemberInviteEmailApi(Resource):
         invitation_results = []
         console_web_url = dify_config.CONSOLE_WEB_URL
 
-        workspace_members = FeatureService.get_features(tenant_id=inviter.current_tenant.id).workspace_members
+        workspace_members = FeatureService.get_features(
+            tenant_id=inviter.current_tenant.id, refresh=True
+        ).workspace_members
 
         if not workspace_members.is_available(len(invitee_emails)):
             raise WorkspaceMembersLimitExceeded()
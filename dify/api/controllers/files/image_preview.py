@@ -64,8 +64,15 @@ class FilePreviewApi(Resource):
         except services.errors.file.UnsupportedFileTypeError:
             raise UnsupportedFileTypeError()
 
+        byte_range = (
+            request.range.range_for_length(upload_file.size) if request.range and upload_file.size > 0 else None
+        )
+        if byte_range:
+            generator = FileService.get_file_range_generator(upload_file, *byte_range)
+
         response = Response(
             generator,
+            status=206 if byte_range else 200,
             mimetype=upload_file.mime_type,
             direct_passthrough=True,
             headers={},
@@ -84,7 +91,10 @@ class FilePreviewApi(Resource):
             "audio/x-m4a",
         ]:
             response.headers["Accept-Ranges"] = "bytes"
-        if upload_file.size > 0:
+        if byte_range:
+            response.headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1] - 1}/{upload_file.size}"
+            response.headers["Content-Length"] = str(byte_range[1] - byte_range[0])
+        elif upload_file.size > 0:
             response.headers["Content-Length"] = str(upload_file.size)
         if args["as_attachment"]:
             encoded_filename = quote(upload_file.name)
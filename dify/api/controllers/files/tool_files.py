@@ -1,6 +1,6 @@
 from urllib.parse import quote
 
-from flask import Response
+from flask import Response, request
 from flask_restful import Resource, reqparse
 from werkzeug.exceptions import Forbidden, NotFound
 
@@ -39,13 +39,21 @@ class ToolFilePreviewApi(Resource):
         except Exception:
             raise UnsupportedFileTypeError()
 
+        byte_range = request.range.range_for_length(tool_file.size) if request.range and tool_file.size > 0 else None
+        if byte_range:
+            stream = ToolFileManager.get_file_range_generator(tool_file, *byte_range)
+
         response = Response(
             stream,
+            status=206 if byte_range else 200,
             mimetype=tool_file.mimetype,
             direct_passthrough=True,
             headers={},
         )
-        if tool_file.size > 0:
+        if byte_range:
+            response.headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1] - 1}/{tool_file.size}"
+            response.headers["Content-Length"] = str(byte_range[1] - byte_range[0])
+        elif tool_file.size > 0:
             response.headers["Content-Length"] = str(tool_file.size)
         if args["as_attachment"]:
             encoded_filename = quote(tool_file.name)
@@ -0,0 +1,27 @@
+from flask_restful import (
+    Resource,  # type: ignore
+    reqparse,
+)
+
+from controllers.console.wraps import setup_required
+from controllers.inner_api import api
+from controllers.inner_api.wraps import enterprise_inner_api_only
+from services.feature_service import FeatureService
+
+
+class BillingSubscriptionEvent(Resource):
+    @setup_required
+    @enterprise_inner_api_only
+    def post(self):
+        """
+        Notified by the billing service when the subscription of a workspace changes
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument("tenant_id", type=str, required=True, location="json")
+        args = parser.parse_args()
+
+        FeatureService.invalidate_features(args["tenant_id"])
+        return {"message": "success"}, 200
+
+
+api.add_resource(BillingSubscriptionEvent, "/billing/subscription-event")
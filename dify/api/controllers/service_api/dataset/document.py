@@ -24,7 +24,7 @@ from core.errors.error import ProviderTokenNotInitError
 from extensions.ext_database import db
 from fields.document_fields import document_fields, document_status_fields
 from libs.login import current_user
-from models.dataset import Dataset, Document, DocumentSegment
+from models.dataset import Dataset, Document
 from services.dataset_service import DocumentService
 from services.entities.knowledge_entities.knowledge_entities import KnowledgeConfig
 from services.file_service import FileService
@@ -381,20 +381,6 @@ class DocumentIndexingStatusApi(DatasetApiResource):
             raise NotFound("Documents not found.")
         documents_status = []
         for document in documents:
-            completed_segments = (
-                db.session.query(DocumentSegment)
-                .filter(
-                    DocumentSegment.completed_at.isnot(None),
-                    DocumentSegment.document_id == str(document.id),
-                    DocumentSegment.status != "re_segment",
-                )
-                .count()
-            )
-            total_segments = (
-                db.session.query(DocumentSegment)
-                .filter(DocumentSegment.document_id == str(document.id), DocumentSegment.status != "re_segment")
-                .count()
-            )
             # Create a dictionary with document attributes and additional fields
             document_dict = {
                 "id": document.id,
@@ -407,8 +393,8 @@ class DocumentIndexingStatusApi(DatasetApiResource):
                 "paused_at": document.paused_at,
                 "error": document.error,
                 "stopped_at": document.stopped_at,
-                "completed_segments": completed_segments,
-                "total_segments": total_segments,
+                "completed_segments": document.completed_segments,
+                "total_segments": document.total_segments,
             }
             documents_status.append(marshal(document_dict, document_status_fields))
         data = {"data": documents_status}
@@ -419,13 +419,26 @@ class BaseAgentRunner(AppRunner):
         )
 
         messages = list(reversed(extract_thread_messages(messages)))
+        messages = [message for message in messages if message.id != self.message.id]
+
+        # load the files and thoughts of all history messages at once instead of per message
+        message_ids = [message.id for message in messages]
+        message_files: dict[str, list[MessageFile]] = {}
+        message_agent_thoughts: dict[str, list[MessageAgentThought]] = {}
+        if message_ids:
+            for message_file in db.session.query(MessageFile).filter(MessageFile.message_id.in_(message_ids)).all():
+                message_files.setdefault(message_file.message_id, []).append(message_file)
+            for agent_thought in (
+                db.session.query(MessageAgentThought)
+                .filter(MessageAgentThought.message_id.in_(message_ids))
+                .order_by(MessageAgentThought.position.asc())
+                .all()
+            ):
+                message_agent_thoughts.setdefault(agent_thought.message_id, []).append(agent_thought)
 
         for message in messages:
-            if message.id == self.message.id:
-                continue
-
-            result.append(self.organize_agent_user_prompt(message))
-            agent_thoughts: list[MessageAgentThought] = message.agent_thoughts
+            result.append(self.organize_agent_user_prompt(message, message_files.get(message.id, [])))
+            agent_thoughts = message_agent_thoughts.get(message.id, [])
             if agent_thoughts:
                 for agent_thought in agent_thoughts:
                     tools = agent_thought.tool
@@ -482,8 +495,11 @@ class BaseAgentRunner(AppRunner):
 
         return result
 
-    def organize_agent_user_prompt(self, message: Message) -> UserPromptMessage:
-        files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
+    def organize_agent_user_prompt(
+        self, message: Message, files: Optional[list[MessageFile]] = None
+    ) -> UserPromptMessage:
+        if files is None:
+            files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
         if not files:
             return UserPromptMessage(content=message.query)
         if message.app_model_config:
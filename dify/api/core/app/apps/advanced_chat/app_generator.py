@@ -25,7 +25,7 @@ from core.app.entities.task_entities import ChatbotAppBlockingResponse, ChatbotA
 from core.model_runtime.errors.invoke import InvokeAuthorizationError
 from core.ops.ops_trace_manager import TraceQueueManager
 from core.prompt.utils.get_thread_messages_length import get_thread_messages_length
-from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository
+from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository, WriteBehindWorkflowNodeExecutionRepository
 from core.repositories.sqlalchemy_workflow_execution_repository import SQLAlchemyWorkflowExecutionRepository
 from core.workflow.repositories.workflow_execution_repository import WorkflowExecutionRepository
 from core.workflow.repositories.workflow_node_execution_repository import WorkflowNodeExecutionRepository
@@ -177,7 +177,12 @@ class AdvancedChatAppGenerator(MessageBasedAppGenerator):
             triggered_from=workflow_triggered_from,
         )
         # Create workflow node execution repository
-        workflow_node_execution_repository = SQLAlchemyWorkflowNodeExecutionRepository(
+        workflow_node_execution_repository_class = (
+            WriteBehindWorkflowNodeExecutionRepository
+            if dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED
+            else SQLAlchemyWorkflowNodeExecutionRepository
+        )
+        workflow_node_execution_repository = workflow_node_execution_repository_class(
             session_factory=session_factory,
             user=user,
             app_id=application_generate_entity.app_config.app_id,
@@ -1,8 +1,9 @@
 import logging
 from collections.abc import Mapping
-from typing import Any, cast
+from typing import Any, Optional, cast
 
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from configs import dify_config
@@ -16,9 +17,16 @@ from core.app.entities.queue_entities import (
     QueueTextChunkEvent,
 )
 from core.moderation.base import ModerationError
+from core.variables import Variable
 from core.workflow.callbacks import WorkflowCallback, WorkflowLoggingCallback
+from core.workflow.constants import CONVERSATION_VARIABLE_NODE_ID
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.event import (
+    GraphRunFailedEvent,
+    GraphRunPartialSucceededEvent,
+    GraphRunSucceededEvent,
+)
 from core.workflow.workflow_entry import WorkflowEntry
 from extensions.ext_database import db
 from models.enums import UserFrom
@@ -47,6 +55,11 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
         self.conversation = conversation
         self.message = message
         self._dialogue_count = dialogue_count
+        # Serialized conversation variables as stored in the database, by variable id. None if
+        # conversation variables of this run are not persisted.
+        self._stored_conversation_variables: Optional[dict[str, str]] = None
+        # Conversation variables assigned during the run by variable id, shared by all graph engine copies.
+        self._conversation_variable_updates: dict[str, Variable] = {}
 
     def run(self) -> None:
         app_config = self.application_generate_entity.app_config
@@ -117,19 +130,12 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             )
             with Session(db.engine) as session:
                 db_conversation_variables = session.scalars(stmt).all()
-                if not db_conversation_variables:
-                    # Create conversation variables if they don't exist.
-                    db_conversation_variables = [
-                        ConversationVariable.from_variable(
-                            app_id=self.conversation.app_id, conversation_id=self.conversation.id, variable=variable
-                        )
-                        for variable in workflow.conversation_variables
-                    ]
-                    session.add_all(db_conversation_variables)
-                # Convert database entities to variables.
-                conversation_variables = [item.to_variable() for item in db_conversation_variables]
-
-                session.commit()
+            # Convert database entities to variables. The conversation variables of a new conversation
+            # are created from the workflow and stored along with the updates once the run finishes.
+            conversation_variables = [item.to_variable() for item in db_conversation_variables] or list(
+                workflow.conversation_variables
+            )
+            self._stored_conversation_variables = {item.id: item.data for item in db_conversation_variables}
 
             # Create a variable pool.
             system_inputs = {
@@ -173,14 +179,69 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             invoke_from=self.application_generate_entity.invoke_from,
             call_depth=self.application_generate_entity.call_depth,
             variable_pool=variable_pool,
+            conversation_variable_updates=(
+                self._conversation_variable_updates if self._stored_conversation_variables is not None else None
+            ),
         )
 
         generator = workflow_entry.run(
             callbacks=workflow_callbacks,
         )
 
-        for event in generator:
-            self._handle_event(workflow_entry, event)
+        try:
+            for event in generator:
+                # Store conversation variables before the end of the run is published, so the next
+                # message of the conversation reads the updated values.
+                if isinstance(event, GraphRunSucceededEvent | GraphRunPartialSucceededEvent | GraphRunFailedEvent):
+                    self._save_conversation_variables(variable_pool)
+                self._handle_event(workflow_entry, event)
+        finally:
+            try:
+                self._save_conversation_variables(variable_pool)
+            except Exception:
+                logger.exception("Failed to save conversation variables, conversation_id: %s", self.conversation.id)
+
+    def _save_conversation_variables(self, variable_pool: VariablePool) -> None:
+        """
+        Store the conversation variables changed by the run with a single upsert.
+        """
+        if self._stored_conversation_variables is None:
+            return
+
+        variables = {
+            variable.id: variable
+            for variable in variable_pool.variable_dictionary.get(CONVERSATION_VARIABLE_NODE_ID, {}).values()
+            if isinstance(variable, Variable)
+        }
+        # Assignments made in copies of the variable pool, such as in parallel iterations.
+        variables.update(self._conversation_variable_updates)
+
+        rows = []
+        for variable in variables.values():
+            data = variable.model_dump_json()
+            if self._stored_conversation_variables.get(variable.id) == data:
+                continue
+            rows.append(
+                {
+                    "id": variable.id,
+                    "conversation_id": self.conversation.id,
+                    "app_id": self.conversation.app_id,
+                    "data": data,
+                }
+            )
+        if not rows:
+            return
+
+        stmt = insert(ConversationVariable).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ConversationVariable.id, ConversationVariable.conversation_id],
+            set_={"data": stmt.excluded.data, "updated_at": func.current_timestamp()},
+        )
+        with Session(db.engine) as session:
+            session.execute(stmt)
+            session.commit()
+
+        self._stored_conversation_variables.update({row["id"]: row["data"] for row in rows})
 
     def handle_input_moderation(
         self,
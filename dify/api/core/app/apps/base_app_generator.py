@@ -1,8 +1,11 @@
-import json
 from collections.abc import Generator, Mapping, Sequence
 from typing import TYPE_CHECKING, Any, Optional, Union
 
+import orjson
+
+from configs import dify_config
 from core.app.app_config.entities import VariableEntityType
+from core.app.apps.event_stream_coalescer import EventStreamCoalescer
 from core.file import File, FileUploadConfig
 from factories import file_factory
 
@@ -145,16 +148,23 @@ class BaseAppGenerator:
     @classmethod
     def convert_to_event_stream(cls, generator: Union[Mapping, Generator[Mapping | str, None, None]]):
         """
-        Convert messages into event stream
+        Convert messages into event stream, merging consecutive text chunks with SSE_COALESCING_ENABLED
+
+        :param generator: messages or a blocking response
         """
         if isinstance(generator, dict):
             return generator
         else:
+            if dify_config.SSE_COALESCING_ENABLED:
+                generator = EventStreamCoalescer(
+                    window=dify_config.SSE_COALESCING_WINDOW_MS / 1000,
+                    max_bytes=dify_config.SSE_COALESCING_MAX_BYTES,
+                ).coalesce(generator)  # type: ignore[arg-type]
 
             def gen():
                 for message in generator:
                     if isinstance(message, Mapping | dict):
-                        yield f"data: {json.dumps(message)}\n\n"
+                        yield f"data: {orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()}\n\n"
                     else:
                         yield f"event: {message}\n\n"
 
@@ -0,0 +1,105 @@
+import time
+from collections.abc import Generator, Mapping
+from typing import Any, Optional
+
+from core.app.entities.task_entities import StreamEvent
+
+_ANSWER_EVENTS = {StreamEvent.MESSAGE.value, StreamEvent.AGENT_MESSAGE.value}
+
+
+class EventStreamCoalescer:
+    """
+    Merges consecutive text chunk events of a stream into fewer, larger events.
+
+    A text chunk arriving less than `window` seconds after the previous one is held back, and merged
+    with the following chunks arriving within `window` seconds of the first one. The merged text is
+    emitted once a chunk arrives later than that, the merged text exceeds `max_bytes`, or any other
+    event or the end of the stream is reached. Slow streams therefore pass through as they are.
+
+    There is no timer: held text is only emitted when the next event arrives. If a stream stalls right
+    after a burst of chunks, the last of them is delayed until the stream resumes, at most until the
+    next ping event of the task pipeline.
+    """
+
+    def __init__(self, window: float, max_bytes: int):
+        self._window = window
+        self._max_bytes = max_bytes
+
+    def coalesce(
+        self, generator: Generator[Mapping[str, Any] | str, None, None]
+    ) -> Generator[Mapping[str, Any] | str, None, None]:
+        buffered: Optional[dict[str, Any]] = None
+        buffered_at = 0.0
+        buffered_bytes = 0
+        last_arrival_at = time.perf_counter()
+
+        for message in generator:
+            now = time.perf_counter()
+            gap = now - last_arrival_at
+            last_arrival_at = now
+
+            text = self._get_text(message)
+            if text is None or not isinstance(message, Mapping):
+                if buffered is not None:
+                    yield buffered
+                    buffered = None
+                yield message
+                continue
+
+            if buffered is not None and now - buffered_at < self._window and self._is_mergeable(buffered, message):
+                self._append_text(buffered, text)
+            else:
+                if buffered is not None:
+                    yield buffered
+                buffered = self._copy(message)
+                buffered_at = now
+                buffered_bytes = 0
+            buffered_bytes += len(text.encode())
+
+            if gap >= self._window or buffered_bytes >= self._max_bytes:
+                yield buffered
+                buffered = None
+
+        if buffered is not None:
+            yield buffered
+
+    @staticmethod
+    def _get_text(message: Mapping[str, Any] | str) -> Optional[str]:
+        if not isinstance(message, Mapping):
+            return None
+        event = message.get("event")
+        if event in _ANSWER_EVENTS:
+            return message.get("answer")
+        if event == StreamEvent.TEXT_CHUNK.value:
+            return (message.get("data") or {}).get("text")
+        return None
+
+    @staticmethod
+    def _is_mergeable(buffered: Mapping[str, Any], message: Mapping[str, Any]) -> bool:
+        if buffered.keys() != message.keys():
+            return False
+        for key, value in message.items():
+            if key == "answer":
+                continue
+            if key == "data" and message["event"] == StreamEvent.TEXT_CHUNK.value:
+                data = buffered["data"]
+                if data.keys() != value.keys() or any(data[k] != v for k, v in value.items() if k != "text"):
+                    return False
+                continue
+            if buffered[key] != value:
+                return False
+        return True
+
+    @staticmethod
+    def _copy(message: Mapping[str, Any]) -> dict[str, Any]:
+        copied = dict(message)
+        if message["event"] == StreamEvent.TEXT_CHUNK.value:
+            copied["data"] = dict(message["data"])
+        return copied
+
+    @staticmethod
+    def _append_text(buffered: dict[str, Any], text: str) -> None:
+        if buffered["event"] == StreamEvent.TEXT_CHUNK.value:
+            buffered["data"]["text"] += text
+        else:
+            buffered["answer"] += text
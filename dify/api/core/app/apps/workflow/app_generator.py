@@ -23,7 +23,7 @@ from core.app.entities.app_invoke_entities import InvokeFrom, WorkflowAppGenerat
 from core.app.entities.task_entities import WorkflowAppBlockingResponse, WorkflowAppStreamResponse
 from core.model_runtime.errors.invoke import InvokeAuthorizationError
 from core.ops.ops_trace_manager import TraceQueueManager
-from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository
+from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository, WriteBehindWorkflowNodeExecutionRepository
 from core.repositories.sqlalchemy_workflow_execution_repository import SQLAlchemyWorkflowExecutionRepository
 from core.workflow.repositories.workflow_execution_repository import WorkflowExecutionRepository
 from core.workflow.repositories.workflow_node_execution_repository import WorkflowNodeExecutionRepository
@@ -154,7 +154,12 @@ class WorkflowAppGenerator(BaseAppGenerator):
             triggered_from=workflow_triggered_from,
         )
         # Create workflow node execution repository
-        workflow_node_execution_repository = SQLAlchemyWorkflowNodeExecutionRepository(
+        workflow_node_execution_repository_class = (
+            WriteBehindWorkflowNodeExecutionRepository
+            if dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED
+            else SQLAlchemyWorkflowNodeExecutionRepository
+        )
+        workflow_node_execution_repository = workflow_node_execution_repository_class(
             session_factory=session_factory,
             user=user,
             app_id=application_generate_entity.app_config.app_id,
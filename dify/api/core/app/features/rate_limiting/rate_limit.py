@@ -10,13 +10,27 @@ from extensions.ext_redis import redis_client
 
 logger = logging.getLogger(__name__)
 
+# Evicts timed out requests and admits the new one if there is room, in a single round trip.
+# KEYS[1]: sorted set of active request ids scored by their start time
+# ARGV: request id, now, max active requests, max alive time, key ttl
+_ENTER_SCRIPT = """
+local now = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[4]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
 
 class RateLimit:
     _MAX_ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:max_active_requests"
-    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:active_requests"
+    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:active_requests_by_start_time"
     _UNLIMITED_REQUEST_ID = "unlimited_request_id"
     _REQUEST_MAX_ALIVE_TIME = 10 * 60  # 10 minutes
-    _ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL = 5 * 60  # recalculate request_count from request_detail every 5 minutes
+    _ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL = 5 * 60  # sync max_active_requests with redis every 5 minutes
     _instance_dict: dict[str, "RateLimit"] = {}
 
     def __new__(cls: type["RateLimit"], client_id: str, max_active_requests: int):
@@ -50,19 +64,6 @@ class RateLimit:
             self.max_active_requests = int(redis_client.get(self.max_active_requests_key).decode("utf-8"))
             redis_client.expire(self.max_active_requests_key, timedelta(days=1))
 
-        # flush max active requests (in-transit request list)
-        if not redis_client.exists(self.active_requests_key):
-            return
-        request_details = redis_client.hgetall(self.active_requests_key)
-        redis_client.expire(self.active_requests_key, timedelta(days=1))
-        timeout_requests = [
-            k
-            for k, v in request_details.items()
-            if time.time() - float(v.decode("utf-8")) > RateLimit._REQUEST_MAX_ALIVE_TIME
-        ]
-        if timeout_requests:
-            redis_client.hdel(self.active_requests_key, *timeout_requests)
-
     def enter(self, request_id: Optional[str] = None) -> str:
         if self.disabled():
             return RateLimit._UNLIMITED_REQUEST_ID
@@ -71,19 +72,27 @@ class RateLimit:
         if not request_id:
             request_id = RateLimit.gen_request_key()
 
-        active_requests_count = redis_client.hlen(self.active_requests_key)
-        if active_requests_count >= self.max_active_requests:
+        admitted = redis_client.register_script(_ENTER_SCRIPT)(
+            keys=[self.active_requests_key],
+            args=[
+                request_id,
+                time.time(),
+                self.max_active_requests,
+                RateLimit._REQUEST_MAX_ALIVE_TIME,
+                int(timedelta(days=1).total_seconds()),
+            ],
+        )
+        if not admitted:
             raise AppInvokeQuotaExceededError(
                 f"Too many requests. Please try again later. The current maximum concurrent requests allowed "
                 f"for {self.client_id} is {self.max_active_requests}."
             )
-        redis_client.hset(self.active_requests_key, request_id, str(time.time()))
         return request_id
 
     def exit(self, request_id: str):
         if request_id == RateLimit._UNLIMITED_REQUEST_ID:
             return
-        redis_client.hdel(self.active_requests_key, request_id)
+        redis_client.zrem(self.active_requests_key, request_id)
 
     def disabled(self):
         return self.max_active_requests <= 0
@@ -17,7 +17,11 @@ from core.entities.provider_entities import (
     SystemConfigurationStatus,
 )
 from core.helper import encrypter
-from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
+from core.helper.model_provider_cache import (
+    ProviderConfigurationsCache,
+    ProviderCredentialsCache,
+    ProviderCredentialsCacheType,
+)
 from core.model_runtime.entities.model_entities import AIModelEntity, FetchFrom, ModelType
 from core.model_runtime.entities.provider_entities import (
     ConfigurateMethod,
@@ -279,6 +283,7 @@ class ProviderConfiguration(BaseModel):
         )
 
         provider_model_credentials_cache.delete()
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
 
         self.switch_preferred_provider_type(ProviderType.CUSTOM)
 
@@ -304,6 +309,7 @@ class ProviderConfiguration(BaseModel):
             )
 
             provider_model_credentials_cache.delete()
+            ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
 
     def get_custom_model_credentials(
         self, model_type: ModelType, model: str, obfuscated: bool = False
@@ -446,6 +452,7 @@ class ProviderConfiguration(BaseModel):
         )
 
         provider_model_credentials_cache.delete()
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
 
     def delete_custom_model_credentials(self, model_type: ModelType, model: str) -> None:
         """
@@ -469,6 +476,7 @@ class ProviderConfiguration(BaseModel):
             )
 
             provider_model_credentials_cache.delete()
+            ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
 
     def _get_provider_model_setting(self, model_type: ModelType, model: str) -> ProviderModelSetting | None:
         """
@@ -513,6 +521,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
+
         return model_setting
 
     def disable_model(self, model_type: ModelType, model: str) -> ProviderModelSetting:
@@ -538,6 +548,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
+
         return model_setting
 
     def get_provider_model_setting(self, model_type: ModelType, model: str) -> Optional[ProviderModelSetting]:
@@ -611,6 +623,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
+
         return model_setting
 
     def disable_model_load_balancing(self, model_type: ModelType, model: str) -> ProviderModelSetting:
@@ -650,6 +664,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
+
         return model_setting
 
     def get_model_type_instance(self, model_type: ModelType) -> AIModel:
@@ -710,6 +726,7 @@ class ProviderConfiguration(BaseModel):
             db.session.add(preferred_model_provider)
 
         db.session.commit()
+        ProviderConfigurationsCache(tenant_id=self.tenant_id).invalidate()
 
     def extract_secret_variables(self, credential_form_schemas: list[CredentialFormSchema]) -> list[str]:
         """
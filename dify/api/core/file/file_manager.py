@@ -1,6 +1,9 @@
 import base64
+import threading
 from collections.abc import Mapping
 
+from cachetools import LRUCache
+
 from configs import dify_config
 from core.helper import ssrf_proxy
 from core.model_runtime.entities import (
@@ -17,6 +20,10 @@ from . import helpers
 from .enums import FileAttribute
 from .models import File, FileTransferMethod, FileType
 
+# base64 encodings of upload and tool files by file id and storage key, bounded by their total length
+_encoded_strings: LRUCache = LRUCache(maxsize=dify_config.MULTIMODAL_ENCODING_CACHE_MAX_SIZE or 1, getsizeof=len)
+_encoded_strings_lock = threading.Lock()
+
 
 def get_attr(*, file: File, attr: FileAttribute):
     match attr:
@@ -103,6 +110,15 @@ def _download_file_content(path: str, /):
 
 
 def _get_encoded_string(f: File, /):
+    # upload and tool files do not change once saved, their encodings are reused
+    cache_key = None
+    if f.transfer_method != FileTransferMethod.REMOTE_URL and dify_config.MULTIMODAL_ENCODING_CACHE_MAX_SIZE > 0:
+        cache_key = (f.related_id, f._storage_key)
+        with _encoded_strings_lock:
+            cached: str | None = _encoded_strings.get(cache_key)
+        if cached is not None:
+            return cached
+
     match f.transfer_method:
         case FileTransferMethod.REMOTE_URL:
             response = ssrf_proxy.get(f.remote_url, follow_redirects=True)
@@ -114,6 +130,13 @@ def _get_encoded_string(f: File, /):
             data = _download_file_content(f._storage_key)
 
     encoded_string = base64.b64encode(data).decode("utf-8")
+    if cache_key:
+        with _encoded_strings_lock:
+            try:
+                _encoded_strings[cache_key] = encoded_string
+            except ValueError:
+                # larger than the cache
+                pass
     return encoded_string
 
 
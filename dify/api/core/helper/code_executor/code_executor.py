@@ -1,18 +1,20 @@
 import logging
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
 from enum import StrEnum
 from threading import Lock
 from typing import Any, Optional
 
-from httpx import Timeout, post
+from httpx import Client, Limits, Timeout
 from pydantic import BaseModel
 from yarl import URL
 
 from configs import dify_config
 from core.helper.code_executor.javascript.javascript_transformer import NodeJsTemplateTransformer
+from core.helper.code_executor.jinja2.jinja2_renderer import Jinja2Renderer, Jinja2RenderError
 from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
 from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
 from core.helper.code_executor.template_transformer import TemplateTransformer
+from core.helper.micro_batcher import MicroBatcher
 
 logger = logging.getLogger(__name__)
 code_execution_endpoint_url = URL(str(dify_config.CODE_EXECUTION_ENDPOINT))
@@ -56,6 +58,27 @@ class CodeExecutor:
 
     supported_dependencies_languages: set[CodeLanguage] = {CodeLanguage.PYTHON3}
 
+    _client: Optional[Client] = None
+    _client_lock = Lock()
+
+    _batcher: MicroBatcher[Mapping[str, Any], Mapping[str, Any]] = MicroBatcher("code execution")
+
+    @classmethod
+    def _get_client(cls) -> Client:
+        """
+        Get the client shared by all executions, so connections to the code execution service are kept alive
+        """
+        with cls._client_lock:
+            if cls._client is None:
+                cls._client = Client(
+                    limits=Limits(
+                        max_connections=dify_config.CODE_EXECUTION_POOL_MAX_CONNECTIONS,
+                        max_keepalive_connections=dify_config.CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=dify_config.CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY,
+                    )
+                )
+            return cls._client
+
     @classmethod
     def execute_code(cls, language: CodeLanguage, preload: str, code: str) -> str:
         """
@@ -77,7 +100,7 @@ class CodeExecutor:
         }
 
         try:
-            response = post(
+            response = cls._get_client().post(
                 str(url),
                 json=data,
                 headers=headers,
@@ -120,23 +143,80 @@ class CodeExecutor:
         return response_code.data.stdout or ""
 
     @classmethod
-    def execute_workflow_code_template(cls, language: CodeLanguage, code: str, inputs: Mapping[str, Any]):
+    def execute_workflow_code_template(
+        cls,
+        language: CodeLanguage,
+        code: str,
+        inputs: Mapping[str, Any],
+        *,
+        tenant_id: Optional[str] = None,
+        workflow_run_id: Optional[str] = None,
+    ):
         """
         Execute code
         :param language: code language
         :param code: code
         :param inputs: inputs
+        :param tenant_id: tenant id
+        :param workflow_run_id: workflow run id, executions are only batched within the same workflow run
         :return:
         """
+        if language == CodeLanguage.JINJA2 and dify_config.JINJA2_IN_PROCESS_RENDERING_ENABLED:
+            try:
+                return {"result": Jinja2Renderer.render(code, inputs)}
+            except Jinja2RenderError as e:
+                raise CodeExecutionError(str(e))
+
         template_transformer = cls.code_template_transformers.get(language)
         if not template_transformer:
             raise CodeExecutionError(f"Unsupported language {language}")
 
-        runner, preload = template_transformer.transform_caller(code, inputs)
+        if (
+            dify_config.CODE_EXECUTION_BATCH_WINDOW_MS > 0
+            and tenant_id
+            and workflow_run_id
+            and template_transformer.get_batch_runner_script()
+        ):
+            # user code of a batch runs in one process, so its module state is shared within the batch
+            (result,) = cls._batcher.run(
+                (tenant_id, workflow_run_id, language, code),
+                [inputs],
+                run_batch=lambda inputs_list: cls.execute_workflow_code_template_batch(language, code, inputs_list),
+                run_alone=lambda inputs_list: [cls._execute_alone(language, code, inputs_list[0])],
+                window_ms=dify_config.CODE_EXECUTION_BATCH_WINDOW_MS,
+                max_size=dify_config.CODE_EXECUTION_BATCH_MAX_SIZE,
+            )
+            return result
 
-        try:
-            response = cls.execute_code(language, preload, runner)
-        except CodeExecutionError as e:
-            raise e
+        return cls._execute_alone(language, code, inputs)
+
+    @classmethod
+    def execute_workflow_code_template_batch(
+        cls, language: CodeLanguage, code: str, inputs_list: Sequence[Mapping[str, Any]]
+    ) -> list[Mapping[str, Any]]:
+        """
+        Execute code once for each of the inputs in a single call of the code execution service.
+        An error in any of the executions fails the whole batch.
+        :param language: code language
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :return: the result of each execution
+        """
+        template_transformer = cls.code_template_transformers.get(language)
+        if not template_transformer or not template_transformer.get_batch_runner_script():
+            raise CodeExecutionError(f"Unsupported language {language} for batch execution")
+
+        runner, preload = template_transformer.transform_batch_caller(code, inputs_list)
+        response = cls.execute_code(language, preload, runner)
+        results = template_transformer.transform_batch_response(response)
+        if len(results) != len(inputs_list):
+            raise CodeExecutionError(f"Got {len(results)} results for {len(inputs_list)} inputs")
 
+        return results
+
+    @classmethod
+    def _execute_alone(cls, language: CodeLanguage, code: str, inputs: Mapping[str, Any]) -> Mapping[str, Any]:
+        template_transformer = cls.code_template_transformers[language]
+        runner, preload = template_transformer.transform_caller(code, inputs)
+        response = cls.execute_code(language, preload, runner)
         return template_transformer.transform_response(response)
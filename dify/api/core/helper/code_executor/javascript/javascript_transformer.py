@@ -1,4 +1,5 @@
 from textwrap import dedent
+from typing import Optional
 
 from core.helper.code_executor.template_transformer import TemplateTransformer
 
@@ -24,3 +25,24 @@ class NodeJsTemplateTransformer(TemplateTransformer):
             """
         )
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> Optional[str]:
+        runner_script = dedent(
+            f"""
+            // declare main function
+            {cls._code_placeholder}
+
+            // decode and prepare the input object of each execution
+            var inputs_list = JSON.parse(Buffer.from('{cls._inputs_placeholder}', 'base64').toString('utf-8'))
+
+            // execute main function for each input object
+            var output_list = inputs_list.map(function (inputs_obj) {{ return main(inputs_obj) }})
+
+            // convert outputs to json and print
+            var output_json = JSON.stringify(output_list)
+            var result = `<<RESULT>>${{output_json}}<<RESULT>>`
+            console.log(result)
+            """
+        )
+        return runner_script
@@ -0,0 +1,207 @@
+import re
+import string
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from functools import lru_cache, wraps
+from typing import Any
+
+from jinja2 import Template, TemplateError
+from jinja2.runtime import Context
+from jinja2.sandbox import SandboxedEnvironment
+
+from configs import dify_config
+
+
+class Jinja2RenderError(Exception):
+    pass
+
+
+_render_state = threading.local()
+
+
+def _check_deadline() -> None:
+    deadline = getattr(_render_state, "deadline", None)
+    if deadline is not None and time.perf_counter() > deadline:
+        raise Jinja2RenderError(f"Template rendering exceeds {dify_config.JINJA2_IN_PROCESS_RENDERING_TIMEOUT} seconds")
+
+
+# width and precision of a printf-style conversion, like `%-20s`, `%(name)*d` or `%.5f`
+_PRINTF_CONVERSION = re.compile(r"%(?:\([^)]*\))?[-#0 +]*(\*|\d+)?(?:\.(\*|\d+))?")
+
+
+def _check_width(name: str, width: Any) -> None:
+    max_output_length = dify_config.JINJA2_IN_PROCESS_RENDERING_MAX_OUTPUT_LENGTH
+    if isinstance(width, int) and width > max_output_length:
+        raise Jinja2RenderError(f"Width of {name} exceeds {max_output_length} characters")
+
+
+def _check_format_widths(name: str, format_string: str, args: Iterable[Any], str_format: bool = False) -> None:
+    """
+    Refuse a format string padding a value to more than the output length, like `'%200000000d' % 1`,
+    before formatting it. Widths taken from the arguments (`*` or nested fields) are checked as well.
+    """
+    widths: list[str] = []
+    if str_format:
+        for _, _, format_spec, _ in string.Formatter().parse(format_string):
+            if format_spec:
+                widths.extend(re.findall(r"\d+", format_spec))
+                if "{" in format_spec:
+                    widths.append("*")
+    else:
+        for match in _PRINTF_CONVERSION.finditer(format_string):
+            widths.extend(width for width in match.groups() if width)
+
+    for width in widths:
+        if width != "*":
+            _check_width(name, int(width))
+    if "*" in widths:
+        for arg in args:
+            _check_width(name, arg)
+
+
+def _check_binop_size(operator: str, left: Any, right: Any) -> None:
+    """
+    Refuse a multiplication or power whose result would exceed the output length before computing it,
+    a single operation like `9 ** 30000000` or `"x" * 10 ** 9` runs or allocates without reaching any
+    deadline check.
+    """
+    max_output_length = dify_config.JINJA2_IN_PROCESS_RENDERING_MAX_OUTPUT_LENGTH
+    if operator == "**":
+        if isinstance(left, int) and isinstance(right, int) and right > 0:
+            # the result has about log10(2) decimal digits per bit
+            if left.bit_length() * right * 0.30103 > max_output_length:
+                raise Jinja2RenderError(f"Result of ** exceeds {max_output_length} digits")
+    elif isinstance(left, int) and isinstance(right, str | bytes | list | tuple):
+        if len(right) * left > max_output_length:
+            raise Jinja2RenderError(f"Result of * exceeds {max_output_length} items")
+    elif operator == "%":
+        if isinstance(left, str):
+            args = right.values() if isinstance(right, Mapping) else right if isinstance(right, tuple) else (right,)
+            _check_format_widths("%", left, args)
+    elif isinstance(right, int) and isinstance(left, str | bytes | list | tuple):
+        if len(left) * right > max_output_length:
+            raise Jinja2RenderError(f"Result of * exceeds {max_output_length} items")
+
+
+def _check_call_size(obj: Any, args: tuple[Any, ...], kwargs: Mapping[str, Any]) -> None:
+    """
+    Refuse the string methods padding to a width, and `str.format`, if their result would outgrow the output length.
+    """
+    name = getattr(obj, "__name__", None)
+    if name in ("format", "format_map"):
+        # the sandbox wraps str.format and str.format_map
+        format_string = getattr(getattr(obj, "__wrapped__", None), "__self__", None)
+        if isinstance(format_string, str):
+            values = args[0].values() if name == "format_map" and args else [*args, *kwargs.values()]
+            _check_format_widths(name, format_string, values, str_format=True)
+    elif isinstance(getattr(obj, "__self__", None), str):
+        if name in ("center", "ljust", "rjust", "zfill"):
+            _check_width(name, args[0] if args else kwargs.get("width"))
+        elif name == "expandtabs":
+            tabsize = args[0] if args else kwargs.get("tabsize", 8)
+            if isinstance(tabsize, int):
+                _check_width(name, tabsize * obj.__self__.count("\t"))
+
+
+def _size_limited_filter(name: str, filter_func: Callable[..., str]) -> Callable[..., str]:
+    """
+    Wrap a filter padding its value, checking the size of its result before running it.
+    """
+
+    @wraps(filter_func)
+    def wrapper(value: Any, *args: Any, **kwargs: Any) -> str:
+        if name == "center":
+            _check_width(name, args[0] if args else kwargs.get("width"))
+        elif name == "indent":
+            width = args[0] if args else kwargs.get("width", 4)
+            lines = str(value).count("\n") + 1
+            _check_width(name, (len(width) if isinstance(width, str) else width) * lines)
+        elif name == "format" and isinstance(value, str):
+            _check_format_widths(name, value, kwargs.values() if kwargs else args)
+        return filter_func(value, *args, **kwargs)
+
+    return wrapper
+
+
+class _TimeLimitedSandboxedEnvironment(SandboxedEnvironment):
+    """
+    Sandboxed environment stopping a render once its deadline passed. The deadline is checked on
+    every call, attribute and item access and every multiplication, power and modulo of a template, in
+    addition to every rendered chunk. Multiplications, powers, string formatting and padding to a width
+    are refused if their result would outgrow the output length.
+    """
+
+    intercepted_binops = frozenset(["*", "**", "%"])
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        for name in ("center", "indent", "format"):
+            self.filters[name] = _size_limited_filter(name, self.filters[name])
+
+    def call_binop(self, context: Context, operator: str, left: Any, right: Any) -> Any:
+        _check_deadline()
+        _check_binop_size(operator, left, right)
+        return super().call_binop(context, operator, left, right)
+
+    def call(self, context: Context, obj: Any, /, *args: Any, **kwargs: Any) -> Any:
+        _check_deadline()
+        _check_call_size(obj, args, kwargs)
+        return super().call(context, obj, *args, **kwargs)
+
+    def getattr(self, obj: Any, attribute: str) -> Any:
+        _check_deadline()
+        return super().getattr(obj, attribute)
+
+    def getitem(self, obj: Any, argument: Any) -> Any:
+        _check_deadline()
+        return super().getitem(obj, argument)
+
+
+_environment = _TimeLimitedSandboxedEnvironment()
+
+
+@lru_cache(maxsize=256)
+def _compile_template(template: str) -> Template:
+    return _environment.from_string(template)
+
+
+class Jinja2Renderer:
+    """
+    Renders Jinja2 templates in a sandboxed environment of the current process, which saves the
+    round trip to the code execution service for templates that only format their inputs.
+    """
+
+    @classmethod
+    def render(cls, template: str, inputs: Mapping[str, Any]) -> str:
+        """
+        Render template
+        :param template: template
+        :param inputs: inputs
+        :return: rendered template
+        """
+        max_output_length = dify_config.JINJA2_IN_PROCESS_RENDERING_MAX_OUTPUT_LENGTH
+        _render_state.deadline = time.perf_counter() + dify_config.JINJA2_IN_PROCESS_RENDERING_TIMEOUT
+        try:
+            chunks: list[str] = []
+            output_length = 0
+            for chunk in _compile_template(template).generate(**inputs):
+                output_length += len(chunk)
+                if output_length > max_output_length:
+                    raise Jinja2RenderError(f"Template output exceeds {max_output_length} characters")
+                _check_deadline()
+                chunks.append(chunk)
+            return "".join(chunks)
+        except (
+            TemplateError,
+            TypeError,
+            ValueError,
+            ArithmeticError,
+            LookupError,
+            AttributeError,
+            RecursionError,
+            MemoryError,
+        ) as e:
+            raise Jinja2RenderError(f"{type(e).__name__}: {e}") from e
+        finally:
+            _render_state.deadline = None
@@ -1,4 +1,5 @@
 from textwrap import dedent
+from typing import Optional
 
 from core.helper.code_executor.template_transformer import TemplateTransformer
 
@@ -25,3 +26,25 @@ class Python3TemplateTransformer(TemplateTransformer):
             print(result)
             """)
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> Optional[str]:
+        runner_script = dedent(f"""
+            # declare main function
+            {cls._code_placeholder}
+
+            import json
+            from base64 import b64decode
+
+            # decode and prepare the input dict of each execution
+            inputs_list = json.loads(b64decode('{cls._inputs_placeholder}').decode('utf-8'))
+
+            # execute main function for each input dict
+            output_list = [main(**inputs_obj) for inputs_obj in inputs_list]
+
+            # convert outputs to json and print
+            output_json = json.dumps(output_list, indent=4)
+            result = f'''<<RESULT>>{{output_json}}<<RESULT>>'''
+            print(result)
+            """)
+        return runner_script
@@ -2,8 +2,9 @@ import json
 import re
 from abc import ABC, abstractmethod
 from base64 import b64encode
-from collections.abc import Mapping
-from typing import Any
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Any, Optional
 
 
 class TemplateTransformer(ABC):
@@ -24,6 +25,20 @@ class TemplateTransformer(ABC):
 
         return runner_script, preload_script
 
+    @classmethod
+    def transform_batch_caller(cls, code: str, inputs_list: Sequence[Mapping[str, Any]]) -> tuple[str, str]:
+        """
+        Transform code to a runner executing it once for each of the inputs
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :return: runner, preload
+        """
+        prefix, suffix = _get_runner_script_parts(cls, code, batch=True)
+        runner_script = prefix + cls.serialize_inputs(inputs_list) + suffix
+        preload_script = cls.get_preload_script()
+
+        return runner_script, preload_script
+
     @classmethod
     def extract_result_str_from_response(cls, response: str):
         result = re.search(rf"{cls._result_tag}(.*){cls._result_tag}", response, re.DOTALL)
@@ -42,6 +57,25 @@ class TemplateTransformer(ABC):
             result = json.loads(cls.extract_result_str_from_response(response))
         except json.JSONDecodeError:
             raise ValueError("failed to parse response")
+        return cls._validate_result(result)
+
+    @classmethod
+    def transform_batch_response(cls, response: str) -> list[Mapping[str, Any]]:
+        """
+        Transform response of a batch runner to a dict for each execution
+        :param response: response
+        :return:
+        """
+        try:
+            results = json.loads(cls.extract_result_str_from_response(response))
+        except json.JSONDecodeError:
+            raise ValueError("failed to parse response")
+        if not isinstance(results, list):
+            raise ValueError("batch result must be a list")
+        return [cls._validate_result(result) for result in results]
+
+    @classmethod
+    def _validate_result(cls, result: Any) -> Mapping[str, Any]:
         if not isinstance(result, dict):
             raise ValueError("result must be a dict")
         if not all(isinstance(k, str) for k in result):
@@ -57,7 +91,15 @@ class TemplateTransformer(ABC):
         pass
 
     @classmethod
-    def serialize_inputs(cls, inputs: Mapping[str, Any]) -> str:
+    def get_batch_runner_script(cls) -> Optional[str]:
+        """
+        Get runner script executing the code once for each of a list of inputs,
+        None if the language does not support batch execution
+        """
+        return None
+
+    @classmethod
+    def serialize_inputs(cls, inputs: Mapping[str, Any] | Sequence[Mapping[str, Any]]) -> str:
         inputs_json_str = json.dumps(inputs, ensure_ascii=False).encode()
         input_base64_encoded = b64encode(inputs_json_str).decode("utf-8")
         return input_base64_encoded
@@ -65,11 +107,8 @@ class TemplateTransformer(ABC):
     @classmethod
     def assemble_runner_script(cls, code: str, inputs: Mapping[str, Any]) -> str:
         # assemble runner script
-        script = cls.get_runner_script()
-        script = script.replace(cls._code_placeholder, code)
-        inputs_str = cls.serialize_inputs(inputs)
-        script = script.replace(cls._inputs_placeholder, inputs_str)
-        return script
+        prefix, suffix = _get_runner_script_parts(cls, code, batch=False)
+        return prefix + cls.serialize_inputs(inputs) + suffix
 
     @classmethod
     def get_preload_script(cls) -> str:
@@ -77,3 +116,17 @@ class TemplateTransformer(ABC):
         Get preload script
         """
         return ""
+
+
+@lru_cache(maxsize=256)
+def _get_runner_script_parts(transformer: type[TemplateTransformer], code: str, batch: bool) -> tuple[str, str]:
+    """
+    Get the runner script of a code with everything filled in but the inputs, as the parts
+    before and after the inputs. The same code is mostly executed many times with other inputs.
+    """
+    script = transformer.get_batch_runner_script() if batch else transformer.get_runner_script()
+    if script is None:
+        raise ValueError(f"{transformer.__name__} does not support batch execution")
+
+    prefix, suffix = script.split(transformer._inputs_placeholder, 1)
+    return prefix.replace(transformer._code_placeholder, code), suffix.replace(transformer._code_placeholder, code)
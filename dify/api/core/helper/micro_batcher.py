@@ -0,0 +1,87 @@
+import logging
+import time
+from collections.abc import Callable, Hashable, Sequence
+from threading import Event, Lock
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+
+class _Batch(Generic[ItemT, ResultT]):
+    def __init__(self) -> None:
+        self.items: list[ItemT] = []
+        self.results: list[ResultT] = []
+        self.failed = False
+        self.done = Event()
+
+
+class MicroBatcher(Generic[ItemT, ResultT]):
+    """
+    Collects the items of concurrent calls with the same key for a short window and processes them in one batch.
+
+    The first call of a batch waits for the window and runs the batch, the others wait for its results.
+    A batch failing as a whole runs each of its calls alone, so every call gets its own results or error.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._open_batches: dict[Hashable, _Batch[ItemT, ResultT]] = {}
+        self._open_batches_lock = Lock()
+
+    def run(
+        self,
+        key: Hashable,
+        items: Sequence[ItemT],
+        *,
+        run_batch: Callable[[list[ItemT]], Sequence[ResultT]],
+        run_alone: Callable[[Sequence[ItemT]], Sequence[ResultT]],
+        window_ms: int,
+        max_size: int,
+    ) -> list[ResultT]:
+        """
+        Process items together with the items of concurrent calls with the same key
+        :param key: only calls with the same key are batched together
+        :param items: items of this call
+        :param run_batch: processes the items of a batch, returning one result per item
+        :param run_alone: processes the items of a single call, returning one result per item
+        :param window_ms: time in milliseconds the first call waits for others to join its batch
+        :param max_size: number of items closing a batch early
+        :return: the results of the items of this call
+        """
+        with self._open_batches_lock:
+            batch = self._open_batches.get(key)
+            is_leader = batch is None
+            if batch is None:
+                batch = self._open_batches[key] = _Batch()
+            start = len(batch.items)
+            batch.items.extend(items)
+            if len(batch.items) >= max_size:
+                # the batch is full, the next call starts a new one
+                del self._open_batches[key]
+
+        if is_leader:
+            time.sleep(window_ms / 1000)
+            with self._open_batches_lock:
+                if self._open_batches.get(key) is batch:
+                    del self._open_batches[key]
+
+            if len(batch.items) == len(items):
+                batch.done.set()
+                return list(run_alone(items))
+
+            try:
+                batch.results = list(run_batch(batch.items))
+            except Exception:
+                logger.warning("Failed to run %s batch, running each call alone", self._name, exc_info=True)
+                batch.failed = True
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.failed:
+            return list(run_alone(items))
+        return batch.results[start : start + len(items)]
@@ -50,3 +50,33 @@ class ProviderCredentialsCache:
         :return:
         """
         redis_client.delete(self.cache_key)
+
+
+class ProviderConfigurationsCache:
+    """
+    Version of the provider configurations of a workspace, bumped whenever its providers,
+    models or credentials change so that every process rebuilds its cached configurations.
+    """
+
+    def __init__(self, tenant_id: str):
+        self.cache_key = f"provider_configurations_version:tenant_id:{tenant_id}"
+
+    def get_version(self) -> int:
+        """
+        Get the current version of the provider configurations.
+
+        :return:
+        """
+        version = redis_client.get(self.cache_key)
+        return int(version) if version else 0
+
+    def invalidate(self) -> None:
+        """
+        Invalidate the provider configurations cached by any process.
+
+        :return:
+        """
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.incr(self.cache_key)
+        pipeline.expire(self.cache_key, 86400)
+        pipeline.execute()
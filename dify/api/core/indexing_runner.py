@@ -1,11 +1,14 @@
 import concurrent.futures
 import datetime
+import itertools
 import json
 import logging
+import queue
 import re
 import threading
 import time
 import uuid
+from collections.abc import Iterator
 from typing import Any, Optional, cast
 
 from flask import current_app
@@ -21,6 +24,7 @@ from core.rag.cleaner.clean_processor import CleanProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
 from core.rag.docstore.dataset_docstore import DatasetDocumentStore
 from core.rag.extractor.entity.extract_setting import ExtractSetting
+from core.rag.extractor.extract_processor import ExtractProcessor
 from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.index_processor.index_processor_base import BaseIndexProcessor
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
@@ -38,8 +42,12 @@ from libs import helper
 from models.dataset import ChildChunk, Dataset, DatasetProcessRule, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import UploadFile
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 from services.feature_service import FeatureService
 
+# marks the end of the pages extracted for the indexing pipeline
+_PIPELINE_END = object()
+
 
 class IndexingRunner:
     def __init__(self):
@@ -66,6 +74,10 @@ class IndexingRunner:
                     raise ValueError("no process rule found")
                 index_type = dataset_document.doc_form
                 index_processor = IndexProcessorFactory(index_type).init_index_processor()
+                if self._can_run_pipeline(dataset, dataset_document):
+                    self._run_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict())
+                    continue
+
                 # extract
                 text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
@@ -331,15 +343,9 @@ class IndexingRunner:
             return IndexingEstimate(total_segments=total_segments * 20, qa_preview=preview_texts, preview=[])
         return IndexingEstimate(total_segments=total_segments, preview=preview_texts)  # type: ignore
 
-    def _extract(
-        self, index_processor: BaseIndexProcessor, dataset_document: DatasetDocument, process_rule: dict
-    ) -> list[Document]:
-        # load file
-        if dataset_document.data_source_type not in {"upload_file", "notion_import", "website_crawl"}:
-            return []
-
+    @staticmethod
+    def _get_extract_setting(dataset_document: DatasetDocument) -> Optional[ExtractSetting]:
         data_source_info = dataset_document.data_source_info_dict
-        text_docs = []
         if dataset_document.data_source_type == "upload_file":
             if not data_source_info or "upload_file_id" not in data_source_info:
                 raise ValueError("no upload file found")
@@ -349,10 +355,9 @@ class IndexingRunner:
             )
 
             if file_detail:
-                extract_setting = ExtractSetting(
+                return ExtractSetting(
                     datasource_type="upload_file", upload_file=file_detail, document_model=dataset_document.doc_form
                 )
-                text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
         elif dataset_document.data_source_type == "notion_import":
             if (
                 not data_source_info
@@ -360,7 +365,7 @@ class IndexingRunner:
                 or "notion_page_id" not in data_source_info
             ):
                 raise ValueError("no notion import info found")
-            extract_setting = ExtractSetting(
+            return ExtractSetting(
                 datasource_type="notion_import",
                 notion_info={
                     "notion_workspace_id": data_source_info["notion_workspace_id"],
@@ -371,7 +376,6 @@ class IndexingRunner:
                 },
                 document_model=dataset_document.doc_form,
             )
-            text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
         elif dataset_document.data_source_type == "website_crawl":
             if (
                 not data_source_info
@@ -380,7 +384,7 @@ class IndexingRunner:
                 or "job_id" not in data_source_info
             ):
                 raise ValueError("no website import info found")
-            extract_setting = ExtractSetting(
+            return ExtractSetting(
                 datasource_type="website_crawl",
                 website_info={
                     "provider": data_source_info["provider"],
@@ -392,7 +396,20 @@ class IndexingRunner:
                 },
                 document_model=dataset_document.doc_form,
             )
+        return None
+
+    def _extract(
+        self, index_processor: BaseIndexProcessor, dataset_document: DatasetDocument, process_rule: dict
+    ) -> list[Document]:
+        # load file
+        if dataset_document.data_source_type not in {"upload_file", "notion_import", "website_crawl"}:
+            return []
+
+        text_docs = []
+        extract_setting = self._get_extract_setting(dataset_document)
+        if extract_setting:
             text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
+
         # update document status to splitting
         self._update_document_index_status(
             document_id=dataset_document.id,
@@ -576,6 +593,183 @@ class IndexingRunner:
             create_keyword_thread.join()
         indexing_end_at = time.perf_counter()
 
+        # recount, the per-chunk increments also count segments completed by an earlier run
+        DocumentSegmentStatisticsService.refresh([dataset_document.id])
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+
+    @staticmethod
+    def _can_run_pipeline(dataset: Dataset, dataset_document: DatasetDocument) -> bool:
+        # the segments of a paragraph document only depend on their own page, and embedding them is the slow part
+        return (
+            dify_config.INDEXING_PIPELINE_ENABLED
+            and dataset.indexing_technique == "high_quality"
+            and dataset_document.doc_form == IndexType.PARAGRAPH_INDEX
+            and dataset_document.data_source_type in {"upload_file", "notion_import", "website_crawl"}
+        )
+
+    def _run_pipeline(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+    ) -> None:
+        """
+        Extract, split, save and load a document with the stages running at the same time.
+
+        Pages are split and their segments saved as soon as they are extracted, and the saved segments are embedded
+        and loaded in batches. A full page queue holds extraction back, and a loader group that is still busy holds
+        splitting back, so the pages and segments in flight stay bounded.
+        """
+        flask_app = current_app._get_current_object()  # type: ignore
+        embedding_model_instance = self.model_manager.get_model_instance(
+            tenant_id=dataset.tenant_id,
+            provider=dataset.embedding_model_provider,
+            model_type=ModelType.TEXT_EMBEDDING,
+            model=dataset.embedding_model,
+        )
+        batch_size = dify_config.INDEXING_PIPELINE_BATCH_SIZE
+        doc_store = DatasetDocumentStore(
+            dataset=dataset, user_id=dataset_document.created_by, document_id=dataset_document.id
+        )
+
+        extract_setting = self._get_extract_setting(dataset_document)
+        text_docs: Iterator[Document] = iter([])
+        if extract_setting:
+            text_docs = ExtractProcessor.iter_extract(
+                extract_setting, is_automatic=process_rule["mode"] in {"automatic", "hierarchical"}
+            )
+        pages: queue.Queue = queue.Queue(maxsize=dify_config.INDEXING_PIPELINE_QUEUE_SIZE)
+        stopped = threading.Event()
+        extract_thread: Optional[threading.Thread] = None
+
+        max_workers = 10
+        indexing_start_at = time.perf_counter()
+        word_count = 0
+        tokens = 0
+        documents: list[Document] = []
+        unsaved_documents: list[Document] = []
+        # documents are grouped by the hash of their content like in `_load`, one chunk of a group is loaded at a time
+        document_groups: list[list[Document]] = [[] for _ in range(max_workers)]
+        group_futures: list[Optional[concurrent.futures.Future]] = [None] * max_workers
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+        def submit(group_index: int) -> None:
+            nonlocal tokens
+            previous_future = group_futures[group_index]
+            if previous_future:
+                tokens += previous_future.result()
+            group_futures[group_index] = executor.submit(
+                self._process_pipeline_chunk,
+                flask_app,
+                index_processor,
+                document_groups[group_index],
+                dataset.id,
+                dataset_document.id,
+                embedding_model_instance,
+            )
+            document_groups[group_index] = []
+
+        def save(segment_documents: list[Document]) -> None:
+            if not documents:
+                self._update_document_index_status(document_id=dataset_document.id, after_indexing_status="indexing")
+            self._save_pipeline_segments(doc_store, dataset_document, segment_documents)
+            documents.extend(segment_documents)
+            for document in segment_documents:
+                group_index = int(helper.generate_text_hash(document.page_content), 16) % max_workers
+                document_groups[group_index].append(document)
+                if len(document_groups[group_index]) >= batch_size:
+                    submit(group_index)
+
+        try:
+            # the first page is extracted here, so the extract thread no longer reads from the database session
+            first_text_doc = next(text_docs, None)
+            # the pages extracted from now on are split right away
+            self._update_document_index_status(document_id=dataset_document.id, after_indexing_status="splitting")
+            extract_thread = threading.Thread(
+                target=self._extract_pages, args=(first_text_doc, text_docs, pages, stopped), daemon=True
+            )
+            extract_thread.start()
+            while True:
+                text_doc = pages.get()
+                if isinstance(text_doc, Exception):
+                    raise text_doc
+                if text_doc is _PIPELINE_END:
+                    break
+
+                # split the pages extracted in the meantime together
+                page_docs = [text_doc]
+                while len(page_docs) < batch_size:
+                    try:
+                        text_doc = pages.get_nowait()
+                    except queue.Empty:
+                        break
+                    if text_doc is _PIPELINE_END or isinstance(text_doc, Exception):
+                        pages.put(text_doc)
+                        break
+                    page_docs.append(text_doc)
+
+                for page_doc in page_docs:
+                    word_count += len(page_doc.page_content)
+                    if page_doc.metadata is not None:
+                        page_doc.metadata["document_id"] = dataset_document.id
+                        page_doc.metadata["dataset_id"] = dataset_document.dataset_id
+                unsaved_documents.extend(
+                    self._transform(index_processor, dataset, page_docs, dataset_document.doc_language, process_rule)
+                )
+                while len(unsaved_documents) >= batch_size:
+                    save(unsaved_documents[:batch_size])
+                    unsaved_documents = unsaved_documents[batch_size:]
+            if unsaved_documents:
+                save(unsaved_documents)
+
+            cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            self._update_document_index_status(
+                document_id=dataset_document.id,
+                after_indexing_status="indexing",
+                extra_update_params={
+                    DatasetDocument.word_count: word_count,
+                    DatasetDocument.parsing_completed_at: cur_time,
+                    DatasetDocument.cleaning_completed_at: cur_time,
+                    DatasetDocument.splitting_completed_at: cur_time,
+                },
+            )
+
+            # create keyword index
+            create_keyword_thread = threading.Thread(
+                target=self._process_keyword_index,
+                args=(flask_app, dataset.id, dataset_document.id, documents),
+            )
+            create_keyword_thread.start()
+            for group_index, document_group in enumerate(document_groups):
+                if document_group:
+                    submit(group_index)
+            for future in group_futures:
+                if future:
+                    tokens += future.result()
+            create_keyword_thread.join()
+        finally:
+            stopped.set()
+            executor.shutdown(cancel_futures=True)
+            # a running extract thread closes the pages once it sees the pipeline stopped
+            if extract_thread is None or not extract_thread.is_alive():
+                self._close_text_docs(text_docs)
+        indexing_end_at = time.perf_counter()
+
+        # recount, the per-chunk increments also count segments completed by an earlier run
+        DocumentSegmentStatisticsService.refresh([dataset_document.id])
+
         # update document status to completed
         self._update_document_index_status(
             document_id=dataset_document.id,
@@ -588,6 +782,76 @@ class IndexingRunner:
             },
         )
 
+    @classmethod
+    def _extract_pages(
+        cls,
+        first_text_doc: Optional[Document],
+        text_docs: Iterator[Document],
+        pages: queue.Queue,
+        stopped: threading.Event,
+    ) -> None:
+        def put(item) -> None:
+            while not stopped.is_set():
+                try:
+                    pages.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        try:
+            for text_doc in itertools.chain([first_text_doc] if first_text_doc else [], text_docs):
+                put(text_doc)
+                if stopped.is_set():
+                    return
+        except Exception as e:
+            put(e)
+        else:
+            put(_PIPELINE_END)
+        finally:
+            cls._close_text_docs(text_docs)
+
+    @staticmethod
+    def _close_text_docs(text_docs: Iterator[Document]) -> None:
+        # extraction generators remove their temporary files once closed
+        close = getattr(text_docs, "close", None)
+        if close:
+            close()
+
+    def _save_pipeline_segments(
+        self, doc_store: DatasetDocumentStore, dataset_document: DatasetDocument, documents: list[Document]
+    ) -> None:
+        doc_store.add_documents(docs=documents)
+        document_ids = [document.metadata["doc_id"] for document in documents if document.metadata]
+        db.session.query(DocumentSegment).filter(
+            DocumentSegment.document_id == dataset_document.id,
+            DocumentSegment.index_node_id.in_(document_ids),
+        ).update(
+            {
+                DocumentSegment.status: "indexing",
+                DocumentSegment.indexing_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+            },
+            synchronize_session=False,
+        )
+        DocumentSegmentStatisticsService.refresh([dataset_document.id])
+        db.session.commit()
+
+    def _process_pipeline_chunk(
+        self, flask_app, index_processor, chunk_documents, dataset_id, dataset_document_id, embedding_model_instance
+    ) -> int:
+        # the dataset and document of the pipeline belong to the session of the splitting thread, which keeps committing
+        with flask_app.app_context():
+            dataset = db.session.query(Dataset).filter_by(id=dataset_id).first()
+            if not dataset:
+                raise ValueError("no dataset found")
+            dataset_document = db.session.query(DatasetDocument).filter_by(id=dataset_document_id).first()
+            if not dataset_document:
+                raise DocumentIsDeletedPausedError()
+
+            tokens: int = self._process_chunk(
+                flask_app, index_processor, chunk_documents, dataset, dataset_document, embedding_model_instance
+            )
+            return tokens
+
     @staticmethod
     def _process_keyword_index(flask_app, dataset_id, document_id, documents):
         with flask_app.app_context():
@@ -598,18 +862,23 @@ class IndexingRunner:
             keyword.create(documents)
             if dataset.indexing_technique != "high_quality":
                 document_ids = [document.metadata["doc_id"] for document in documents]
-                db.session.query(DocumentSegment).filter(
-                    DocumentSegment.document_id == document_id,
-                    DocumentSegment.dataset_id == dataset_id,
-                    DocumentSegment.index_node_id.in_(document_ids),
-                    DocumentSegment.status == "indexing",
-                ).update(
-                    {
-                        DocumentSegment.status: "completed",
-                        DocumentSegment.enabled: True,
-                        DocumentSegment.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-                    }
+                completed_count = (
+                    db.session.query(DocumentSegment)
+                    .filter(
+                        DocumentSegment.document_id == document_id,
+                        DocumentSegment.dataset_id == dataset_id,
+                        DocumentSegment.index_node_id.in_(document_ids),
+                        DocumentSegment.status == "indexing",
+                    )
+                    .update(
+                        {
+                            DocumentSegment.status: "completed",
+                            DocumentSegment.enabled: True,
+                            DocumentSegment.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                        }
+                    )
                 )
+                DocumentSegmentStatisticsService.increment_completed_segments(document_id, completed_count)
 
                 db.session.commit()
 
@@ -629,18 +898,23 @@ class IndexingRunner:
             index_processor.load(dataset, chunk_documents, with_keywords=False)
 
             document_ids = [document.metadata["doc_id"] for document in chunk_documents]
-            db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.dataset_id == dataset.id,
-                DocumentSegment.index_node_id.in_(document_ids),
-                DocumentSegment.status == "indexing",
-            ).update(
-                {
-                    DocumentSegment.status: "completed",
-                    DocumentSegment.enabled: True,
-                    DocumentSegment.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-                }
+            completed_count = (
+                db.session.query(DocumentSegment)
+                .filter(
+                    DocumentSegment.document_id == dataset_document.id,
+                    DocumentSegment.dataset_id == dataset.id,
+                    DocumentSegment.index_node_id.in_(document_ids),
+                    DocumentSegment.status == "indexing",
+                )
+                .update(
+                    {
+                        DocumentSegment.status: "completed",
+                        DocumentSegment.enabled: True,
+                        DocumentSegment.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                    }
+                )
             )
+            DocumentSegmentStatisticsService.increment_completed_segments(dataset_document.id, completed_count)
 
             db.session.commit()
 
@@ -725,6 +999,7 @@ class IndexingRunner:
 
         # add document segments
         doc_store.add_documents(docs=documents, save_child=dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX)
+        DocumentSegmentStatisticsService.refresh([dataset_document.id])
 
         # update document status to indexing
         cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
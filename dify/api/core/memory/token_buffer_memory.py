@@ -1,6 +1,7 @@
 from collections.abc import Sequence
 from typing import Optional
 
+from configs import dify_config
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
 from core.file import file_manager
 from core.model_manager import ModelInstance
@@ -15,10 +16,13 @@ from core.model_runtime.entities import (
 from core.model_runtime.entities.message_entities import PromptMessageContentUnionTypes
 from core.prompt.utils.extract_thread_messages import extract_thread_messages
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from factories import file_factory
 from models.model import AppMode, Conversation, Message, MessageFile
 from models.workflow import WorkflowRun
 
+HISTORY_TOKENS_CACHE_TTL = 3600
+
 
 class TokenBufferMemory:
     def __init__(self, conversation: Conversation, model_instance: ModelInstance) -> None:
@@ -69,18 +73,22 @@ class TokenBufferMemory:
 
         messages = list(reversed(thread_messages))
 
+        message_files = self._get_message_files([message.id for message in messages])
+        workflow_runs = self._get_workflow_runs(
+            [message.workflow_run_id for message in messages if message.id in message_files]
+        )
+
         prompt_messages: list[PromptMessage] = []
+        token_cache_fields: list[str] = []
         for message in messages:
-            files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
+            files = message_files.get(message.id)
             if files:
                 file_extra_config = None
                 if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
                     file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
                 else:
                     if message.workflow_run_id:
-                        workflow_run = (
-                            db.session.query(WorkflowRun).filter(WorkflowRun.id == message.workflow_run_id).first()
-                        )
+                        workflow_run = workflow_runs.get(message.workflow_run_id)
 
                         if workflow_run and workflow_run.workflow:
                             file_extra_config = FileUploadConfigManager.convert(
@@ -115,21 +123,108 @@ class TokenBufferMemory:
                 prompt_messages.append(UserPromptMessage(content=message.query))
 
             prompt_messages.append(AssistantPromptMessage(content=message.answer))
+            token_cache_fields.extend([f"{message.id}:user", f"{message.id}:assistant"])
 
         if not prompt_messages:
             return []
 
-        # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        if not dify_config.PLUGIN_BASED_TOKEN_COUNTING_ENABLED:
+            # every message counts as 0 tokens, nothing to prune
+            return prompt_messages
+
+        # prune the chat message if it exceeds the max token limit, the tokens of each message are
+        # cached so only the messages added since the last turn need to be counted
+        message_tokens = self._get_message_tokens(token_cache_fields, prompt_messages)
+        curr_message_tokens = sum(message_tokens)
 
         if curr_message_tokens > max_token_limit:
-            pruned_memory = []
+            pruned = 0
+            while curr_message_tokens > max_token_limit and len(prompt_messages) - pruned > 1:
+                curr_message_tokens -= message_tokens[pruned]
+                pruned += 1
+            prompt_messages = prompt_messages[pruned:]
+
+            # the sum of single message tokens is an estimate, check it once on the pruned messages
+            curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
             while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
+                prompt_messages.pop(0)
                 curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
 
         return prompt_messages
 
+    @staticmethod
+    def _get_message_files(message_ids: list[str]) -> dict[str, list[MessageFile]]:
+        """
+        Get the files of all given messages with a single query.
+        """
+        message_files: dict[str, list[MessageFile]] = {}
+        if not message_ids:
+            return message_files
+
+        files = db.session.query(MessageFile).filter(MessageFile.message_id.in_(message_ids)).all()
+        for file in files:
+            message_files.setdefault(file.message_id, []).append(file)
+        return message_files
+
+    @staticmethod
+    def _get_workflow_runs(workflow_run_ids: list[Optional[str]]) -> dict[str, WorkflowRun]:
+        """
+        Get the workflow runs of all given ids with a single query.
+        """
+        workflow_run_ids = [workflow_run_id for workflow_run_id in workflow_run_ids if workflow_run_id]
+        if not workflow_run_ids:
+            return {}
+
+        workflow_runs = db.session.query(WorkflowRun).filter(WorkflowRun.id.in_(set(workflow_run_ids))).all()
+        return {workflow_run.id: workflow_run for workflow_run in workflow_runs}
+
+    def _get_message_tokens(self, cache_fields: list[str], prompt_messages: list[PromptMessage]) -> list[int]:
+        """
+        Get the tokens of each history prompt message.
+
+        Finished messages do not change, so their tokens are cached per conversation and model,
+        a regenerated message or another thread of the conversation gets its own entries.
+        The messages missing from the cache are counted together and their tokens split by text length.
+        """
+        cache_key = "conversation_history_tokens:{}:{}:{}".format(
+            self.conversation.id, self.model_instance.provider, self.model_instance.model
+        )
+        cached_tokens = redis_client.hmget(cache_key, cache_fields)
+
+        uncached = [index for index, cached in enumerate(cached_tokens) if cached is None]
+        new_tokens: dict[str, int] = {}
+        if uncached:
+            total_tokens = self.model_instance.get_llm_num_tokens([prompt_messages[index] for index in uncached])
+            lengths = [max(len(self._get_text(prompt_messages[index])), 1) for index in uncached]
+            total_length = sum(lengths)
+            counted_length = 0
+            counted_tokens = 0
+            for index, length in zip(uncached, lengths):
+                counted_length += length
+                tokens = total_tokens * counted_length // total_length - counted_tokens
+                counted_tokens += tokens
+                new_tokens[cache_fields[index]] = tokens
+
+        message_tokens = [
+            new_tokens[cache_field] if cached is None else int(cached)
+            for cache_field, cached in zip(cache_fields, cached_tokens)
+        ]
+
+        if new_tokens:
+            pipeline = redis_client.pipeline(transaction=False)
+            pipeline.hset(cache_key, mapping=new_tokens)
+            pipeline.expire(cache_key, HISTORY_TOKENS_CACHE_TTL)
+            pipeline.execute()
+        return message_tokens
+
+    @staticmethod
+    def _get_text(prompt_message: PromptMessage) -> str:
+        if isinstance(prompt_message.content, list):
+            return "".join(
+                content.data for content in prompt_message.content if isinstance(content, TextPromptMessageContent)
+            )
+        return prompt_message.content or ""
+
     def get_history_prompt_text(
         self,
         human_prefix: str = "Human",
@@ -1,12 +1,34 @@
-from collections.abc import Sequence
-from typing import Any
+import re
+from functools import lru_cache
+from typing import Optional
 
 from core.moderation.base import Moderation, ModerationAction, ModerationInputsResult, ModerationOutputsResult
 
 
+@lru_cache(maxsize=1024)
+def _compile_keywords(keywords: str) -> Optional[tuple[re.Pattern[str], int]]:
+    """
+    Compile the keyword rows of a config into a single pattern matching any of them in lowercase text.
+
+    :param keywords: the keywords config, one keyword per row
+    :return: the pattern and the length of the longest keyword, None if there is no keyword
+    """
+    # Filter out empty values
+    keywords_list = {keyword.lower() for keyword in keywords.split("\n") if keyword}
+    if not keywords_list:
+        return None
+
+    pattern = re.compile("|".join(re.escape(keyword) for keyword in keywords_list))
+    return pattern, max(len(keyword) for keyword in keywords_list)
+
+
 class KeywordsModeration(Moderation):
     name: str = "keywords"
 
+    # the last output text found without keywords, streamed outputs only grow so the next check
+    # of the same output only needs to scan the appended text
+    _moderated_output: str = ""
+
     @classmethod
     def validate_config(cls, tenant_id: str, config: dict) -> None:
         """
@@ -40,10 +62,7 @@ class KeywordsModeration(Moderation):
             if query:
                 inputs["query__"] = query
 
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
-
-            flagged = self._is_violated(inputs, keywords_list)
+            flagged = self._is_violated(inputs, _compile_keywords(self.config["keywords"]))
 
         return ModerationInputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
@@ -56,18 +75,25 @@ class KeywordsModeration(Moderation):
             raise ValueError("The config is not set.")
 
         if self.config["outputs_config"]["enabled"]:
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
+            matcher = _compile_keywords(self.config["keywords"])
+
+            start = 0
+            if matcher and self._moderated_output and text.startswith(self._moderated_output):
+                # only keywords overlapping the appended text can be new
+                start = max(0, len(self._moderated_output) - matcher[1] + 1)
 
-            flagged = self._is_violated({"text": text}, keywords_list)
+            flagged = self._is_violated({"text": text[start:]}, matcher)
+            if not flagged:
+                self._moderated_output = text
             preset_response = self.config["outputs_config"]["preset_response"]
 
         return ModerationOutputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
         )
 
-    def _is_violated(self, inputs: dict, keywords_list: list) -> bool:
-        return any(self._check_keywords_in_value(keywords_list, value) for value in inputs.values())
+    def _is_violated(self, inputs: dict, matcher: Optional[tuple[re.Pattern[str], int]]) -> bool:
+        if matcher is None:
+            return False
 
-    def _check_keywords_in_value(self, keywords_list: Sequence[str], value: Any) -> bool:
-        return any(keyword.lower() in str(value).lower() for keyword in keywords_list)
+        pattern, _ = matcher
+        return any(pattern.search(str(value).lower()) for value in inputs.values())
@@ -1,10 +1,10 @@
 import logging
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
 from flask import Flask, current_app
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from configs import dify_config
 from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
@@ -20,6 +20,23 @@ class ModerationRule(BaseModel):
     config: dict[str, Any]
 
 
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Get the executor moderating the outputs of all streamed responses of this process.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=dify_config.MODERATION_MAX_WORKERS, thread_name_prefix="output_moderation"
+            )
+        return _executor
+
+
 class OutputModeration(BaseModel):
     tenant_id: str
     app_id: str
@@ -27,13 +44,19 @@ class OutputModeration(BaseModel):
     rule: ModerationRule
     queue_manager: AppQueueManager
 
-    thread: Optional[threading.Thread] = None
-    thread_running: bool = True
+    running: bool = True
     buffer: str = ""
     is_final_chunk: bool = False
     final_output: Optional[str] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    # whether a moderation of the buffer is queued or running on the executor
+    _moderating: bool = PrivateAttr(default=False)
+    _moderated_length: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # reused for every check of the output, so moderations can keep state about the text checked before
+    _moderation_factory: Optional[ModerationFactory] = PrivateAttr(default=None)
+
     def should_direct_output(self) -> bool:
         return self.final_output is not None
 
@@ -43,8 +66,12 @@ class OutputModeration(BaseModel):
     def append_new_token(self, token: str) -> None:
         self.buffer += token
 
-        if not self.thread:
-            self.thread = self.start_thread()
+        with self._lock:
+            if self._moderating or not self._should_moderate(self.buffer):
+                return
+            self._moderating = True
+
+        _get_executor().submit(self.worker, flask_app=current_app._get_current_object())  # type: ignore
 
     def moderation_completion(self, completion: str, public_event: bool = False) -> tuple[str, bool]:
         self.buffer = completion
@@ -70,68 +97,63 @@ class OutputModeration(BaseModel):
 
         return final_output, True
 
-    def start_thread(self) -> threading.Thread:
-        buffer_size = dify_config.MODERATION_BUFFER_SIZE
-        thread = threading.Thread(
-            target=self.worker,
-            kwargs={
-                "flask_app": current_app._get_current_object(),  # type: ignore
-                "buffer_size": buffer_size if buffer_size > 0 else dify_config.MODERATION_BUFFER_SIZE,
-            },
-        )
-
-        thread.start()
-
-        return thread
+    def stop(self) -> None:
+        self.running = False
 
-    def stop_thread(self):
-        if self.thread and self.thread.is_alive():
-            self.thread_running = False
+    def _should_moderate(self, buffer: str) -> bool:
+        return self.running and len(buffer) - self._moderated_length >= dify_config.MODERATION_BUFFER_SIZE
 
-    def worker(self, flask_app: Flask, buffer_size: int):
+    def worker(self, flask_app: Flask) -> None:
+        """
+        Moderate the buffer until less than a buffer size of new text is left, then return the
+        thread to the executor. The next token crossing the buffer size queues the worker again.
+        """
         with flask_app.app_context():
-            current_length = 0
-            while self.thread_running:
-                moderation_buffer = self.buffer
-                buffer_length = len(moderation_buffer)
-                if not self.is_final_chunk:
-                    chunk_length = buffer_length - current_length
-                    if 0 <= chunk_length < buffer_size:
-                        time.sleep(1)
-                        continue
-
-                current_length = buffer_length
-
-                result = self.moderation(
-                    tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer
-                )
+            while True:
+                with self._lock:
+                    moderation_buffer = self.buffer
+                    if not self._should_moderate(moderation_buffer):
+                        self._moderating = False
+                        return
+                    self._moderated_length = len(moderation_buffer)
+
+                try:
+                    self._moderate_buffer(moderation_buffer)
+                except Exception:
+                    logger.exception(f"Moderation Output error, app_id: {self.app_id}")
+
+    def _moderate_buffer(self, moderation_buffer: str) -> None:
+        result = self.moderation(tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer)
 
-                if not result or not result.flagged:
-                    continue
+        if not result or not result.flagged:
+            return
 
-                if result.action == ModerationAction.DIRECT_OUTPUT:
-                    final_output = result.preset_response
-                    self.final_output = final_output
-                else:
-                    final_output = result.text + self.buffer[len(moderation_buffer) :]
+        if result.action == ModerationAction.DIRECT_OUTPUT:
+            final_output = result.preset_response
+            self.final_output = final_output
+        else:
+            final_output = result.text + self.buffer[len(moderation_buffer) :]
 
-                # trigger replace event
-                if self.thread_running:
-                    self.queue_manager.publish(
-                        QueueMessageReplaceEvent(
-                            text=final_output, reason=QueueMessageReplaceEvent.MessageReplaceReason.OUTPUT_MODERATION
-                        ),
-                        PublishFrom.TASK_PIPELINE,
-                    )
+        # trigger replace event
+        if self.running:
+            self.queue_manager.publish(
+                QueueMessageReplaceEvent(
+                    text=final_output, reason=QueueMessageReplaceEvent.MessageReplaceReason.OUTPUT_MODERATION
+                ),
+                PublishFrom.TASK_PIPELINE,
+            )
 
-                if result.action == ModerationAction.DIRECT_OUTPUT:
-                    break
+        if result.action == ModerationAction.DIRECT_OUTPUT:
+            self.stop()
 
     def moderation(self, tenant_id: str, app_id: str, moderation_buffer: str) -> Optional[ModerationOutputsResult]:
         try:
-            moderation_factory = ModerationFactory(
-                name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
-            )
+            moderation_factory = self._moderation_factory
+            if moderation_factory is None:
+                moderation_factory = ModerationFactory(
+                    name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
+                )
+                self._moderation_factory = moderation_factory
 
             result: ModerationOutputsResult = moderation_factory.moderation_for_outputs(moderation_buffer)
             return result
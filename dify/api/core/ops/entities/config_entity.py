@@ -120,4 +120,5 @@ class WeaveConfig(BaseTracingConfig):
 
 
 OPS_FILE_PATH = "ops_trace/"
+OPS_SEGMENT_PATH = f"{OPS_FILE_PATH}segments/"
 OPS_TRACE_FAILED_KEY = "FAILED_OPS_TRACE"
@@ -15,7 +15,7 @@ from sqlalchemy.orm import Session
 
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
 from core.ops.entities.config_entity import (
-    OPS_FILE_PATH,
+    OPS_SEGMENT_PATH,
     TracingProviderEnum,
 )
 from core.ops.entities.trace_entity import (
@@ -35,7 +35,7 @@ from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models.model import App, AppModelConfig, Conversation, Message, MessageFile, TraceAppConfig
 from models.workflow import WorkflowAppLog, WorkflowRun
-from tasks.ops_trace_task import process_trace_tasks
+from tasks.ops_trace_task import process_trace_segment
 
 
 class OpsTraceProviderConfigMap(dict[str, dict[str, Any]]):
@@ -840,20 +840,26 @@ class TraceQueueManager:
 
     def send_to_celery(self, tasks: list[TraceTask]):
         with self.flask_app.app_context():
+            # the traces of a batch are stored as one segment of json lines and processed by a single task
+            lines: list[str] = []
             for task in tasks:
                 if task.app_id is None:
                     continue
-                file_id = uuid4().hex
-                trace_info = task.execute()
+                try:
+                    trace_info = task.execute()
+                except Exception:
+                    logging.exception(f"Error executing trace task, trace_type {task.trace_type}")
+                    continue
                 task_data = TaskData(
                     app_id=task.app_id,
                     trace_info_type=type(trace_info).__name__,
                     trace_info=trace_info.model_dump() if trace_info else None,
                 )
-                file_path = f"{OPS_FILE_PATH}{task.app_id}/{file_id}.json"
-                storage.save(file_path, task_data.model_dump_json().encode("utf-8"))
-                file_info = {
-                    "file_id": file_id,
-                    "app_id": task.app_id,
-                }
-                process_trace_tasks.delay(file_info)
+                lines.append(task_data.model_dump_json())
+
+            if not lines:
+                return
+
+            file_id = uuid4().hex
+            storage.save(f"{OPS_SEGMENT_PATH}{file_id}.jsonl", "\n".join(lines).encode("utf-8"))
+            process_trace_segment.delay({"file_id": file_id})
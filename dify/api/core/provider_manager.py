@@ -1,8 +1,10 @@
 import json
+import threading
 from collections import defaultdict
 from json import JSONDecodeError
 from typing import Any, Optional, cast
 
+from cachetools import TTLCache
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
@@ -22,7 +24,11 @@ from core.entities.provider_entities import (
     SystemConfiguration,
 )
 from core.helper import encrypter
-from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
+from core.helper.model_provider_cache import (
+    ProviderConfigurationsCache,
+    ProviderCredentialsCache,
+    ProviderCredentialsCacheType,
+)
 from core.helper.position_helper import is_filtered
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import (
@@ -47,6 +53,29 @@ from models.provider import (
 )
 from services.feature_service import FeatureService
 
+# provider configurations by tenant id, along with the version they were built for
+_provider_configurations: TTLCache = TTLCache(maxsize=1024, ttl=dify_config.PROVIDER_CONFIGURATIONS_CACHE_TTL or 1)
+_provider_configurations_lock = threading.Lock()
+
+
+def _copy_provider_configurations(provider_configurations: ProviderConfigurations) -> ProviderConfigurations:
+    """
+    Copy the workspace specific parts of cached configurations, so callers can't change them for others.
+    The provider entities are shared with the model provider factory and are not copied.
+    """
+    copied = ProviderConfigurations(tenant_id=provider_configurations.tenant_id)
+    for key, provider_configuration in provider_configurations.configurations.items():
+        copied[key] = provider_configuration.model_copy(
+            update={
+                "system_configuration": provider_configuration.system_configuration.model_copy(deep=True),
+                "custom_configuration": provider_configuration.custom_configuration.model_copy(deep=True),
+                "model_settings": [
+                    model_setting.model_copy(deep=True) for model_setting in provider_configuration.model_settings
+                ],
+            }
+        )
+    return copied
+
 
 class ProviderManager:
     """
@@ -91,9 +120,89 @@ class ProviderManager:
         - Get provider instance
         - Switch selection priority
 
+        The configurations are reused by the process until they expire or the version of the
+        workspace's provider configurations changes. The usage of hosting quotas changes with every
+        call of a hosting provider, so it is not part of the reused configurations but read on every call.
+
         :param tenant_id:
         :return:
         """
+        if not dify_config.PROVIDER_CONFIGURATIONS_CACHE_TTL:
+            return self._get_configurations(tenant_id)
+
+        version = ProviderConfigurationsCache(tenant_id=tenant_id).get_version()
+        with _provider_configurations_lock:
+            cached = _provider_configurations.get(tenant_id)
+        if cached is not None and cached[0] == version:
+            provider_configurations = _copy_provider_configurations(cached[1])
+            if self._apply_quota_usage(provider_configurations, self._get_system_quota_usage(tenant_id)):
+                return provider_configurations
+
+        cached = (version, self._get_configurations(tenant_id))
+        with _provider_configurations_lock:
+            _provider_configurations[tenant_id] = cached
+
+        return _copy_provider_configurations(cached[1])
+
+    @staticmethod
+    def _get_system_quota_usage(tenant_id: str) -> dict[tuple[str, str], tuple[int, int]]:
+        """
+        Get the used quota and quota limit of the hosting quotas of the workspace.
+
+        :param tenant_id: workspace id
+        :return: used quota and quota limit by provider name and quota type
+        """
+        with Session(db.engine) as session:
+            stmt = select(Provider.provider_name, Provider.quota_type, Provider.quota_used, Provider.quota_limit).where(
+                Provider.tenant_id == tenant_id,
+                Provider.provider_type == ProviderType.SYSTEM.value,
+                Provider.is_valid == True,
+            )
+            return {
+                # Use provider name with prefix after the data migration
+                (str(ModelProviderID(provider_name)), quota_type): (quota_used or 0, quota_limit or 0)
+                for provider_name, quota_type, quota_used, quota_limit in session.execute(stmt)
+            }
+
+    @staticmethod
+    def _apply_quota_usage(
+        provider_configurations: ProviderConfigurations, quota_usage: dict[tuple[str, str], tuple[int, int]]
+    ) -> bool:
+        """
+        Update the hosting quotas of reused configurations to their current usage.
+
+        :param provider_configurations: copied provider configurations
+        :param quota_usage: used quota and quota limit by provider name and quota type
+        :return: False if a quota changed its validity or was added, the configurations need to be rebuilt then
+        """
+        quota_usage = dict(quota_usage)
+        for provider_configuration in provider_configurations.values():
+            system_configuration = provider_configuration.system_configuration
+            if not system_configuration.enabled:
+                continue
+
+            provider_name = provider_configuration.provider.provider
+            for quota_configuration in system_configuration.quota_configurations:
+                quota_used, quota_limit = quota_usage.pop((provider_name, quota_configuration.quota_type.value), (0, 0))
+                if (quota_limit > quota_used or quota_limit == -1) != quota_configuration.is_valid:
+                    return False
+
+                quota_configuration.quota_used = quota_used
+                quota_configuration.quota_limit = quota_limit
+
+            # records of quota types the hosting configuration doesn't offer never become quotas
+            provider_hosting_configuration = ext_hosting_provider.hosting_configuration.provider_map.get(provider_name)
+            hosted_quota_types = (
+                {quota.quota_type.value for quota in provider_hosting_configuration.quotas}
+                if provider_hosting_configuration
+                else set()
+            )
+            if any(name == provider_name and quota_type in hosted_quota_types for name, quota_type in quota_usage):
+                return False
+
+        return True
+
+    def _get_configurations(self, tenant_id: str) -> ProviderConfigurations:
         # Get all provider records of the workspace
         provider_name_to_provider_records_dict = self._get_all_providers(tenant_id)
 
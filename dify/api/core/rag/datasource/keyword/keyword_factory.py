@@ -3,6 +3,7 @@ from typing import Any
 from configs import dify_config
 from core.rag.datasource.keyword.keyword_base import BaseKeyword
 from core.rag.datasource.keyword.keyword_type import KeyWordType
+from core.rag.datasource.retrieval_cache import RetrievalResultCache
 from core.rag.models.document import Document
 from models.dataset import Dataset
 
@@ -28,19 +29,31 @@ class Keyword:
                 raise ValueError(f"Keyword store {keyword_type} is not supported.")
 
     def create(self, texts: list[Document], **kwargs):
-        self._keyword_processor.create(texts, **kwargs)
+        try:
+            self._keyword_processor.create(texts, **kwargs)
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
 
     def add_texts(self, texts: list[Document], **kwargs):
-        self._keyword_processor.add_texts(texts, **kwargs)
+        try:
+            self._keyword_processor.add_texts(texts, **kwargs)
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
 
     def text_exists(self, id: str) -> bool:
         return self._keyword_processor.text_exists(id)
 
     def delete_by_ids(self, ids: list[str]) -> None:
-        self._keyword_processor.delete_by_ids(ids)
+        try:
+            self._keyword_processor.delete_by_ids(ids)
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
 
     def delete(self) -> None:
-        self._keyword_processor.delete()
+        try:
+            self._keyword_processor.delete()
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
 
     def search(self, query: str, **kwargs: Any) -> list[Document]:
         return self._keyword_processor.search(query, **kwargs)
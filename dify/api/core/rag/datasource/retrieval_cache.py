@@ -0,0 +1,86 @@
+import hashlib
+import json
+import logging
+from typing import Any, Optional
+
+from configs import dify_config
+from core.rag.models.document import Document
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalResultCache:
+    """
+    Results of retrievals from a dataset, cached under the version of its index. The version is bumped whenever
+    documents or segments are added to, changed in or removed from the vector or keyword index, so a result
+    retrieved before a change is never returned after it.
+    """
+
+    def __init__(self, dataset_id: str):
+        self.dataset_id = dataset_id
+        self.version_key = f"dataset_index_version:dataset_id:{dataset_id}"
+
+    def get_version(self) -> int:
+        """
+        Get the current version of the dataset index.
+
+        :return:
+        """
+        version = redis_client.get(self.version_key)
+        return int(version) if version else 0
+
+    def invalidate(self) -> None:
+        """
+        Invalidate the results retrieved from the current version of the dataset index.
+        The version never expires, as results of an earlier version would become valid again.
+
+        :return:
+        """
+        redis_client.incr(self.version_key)
+
+    def get_result_key(self, version: int, query: str, **retrieval_config: Any) -> str:
+        """
+        Get the cache key of the result of a query and retrieval config on a version of the dataset index.
+        Queries differing only in whitespace share their result.
+
+        :param version: version of the dataset index
+        :param query: query
+        :param retrieval_config: retrieval method, top k, score threshold, reranking and filters of the retrieval
+        :return:
+        """
+        normalized_query = " ".join(query.split())
+        digest = hashlib.sha256(
+            json.dumps([normalized_query, retrieval_config], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"retrieval_result:dataset_id:{self.dataset_id}:version:{version}:{digest}"
+
+    def get(self, result_key: str) -> Optional[list[Document]]:
+        """
+        Get a cached retrieval result.
+
+        :param result_key: cache key of the result
+        :return:
+        """
+        cached_result = redis_client.get(result_key)
+        if not cached_result:
+            return None
+        try:
+            return [Document(**document) for document in json.loads(cached_result)]
+        except (ValueError, TypeError):
+            logger.warning(f"Invalid cached retrieval result {result_key}", exc_info=True)
+            return None
+
+    def set(self, result_key: str, documents: list[Document]) -> None:
+        """
+        Cache a retrieval result.
+
+        :param result_key: cache key of the result
+        :param documents: retrieved documents
+        :return:
+        """
+        redis_client.setex(
+            result_key,
+            dify_config.RETRIEVAL_RESULT_CACHE_TTL,
+            json.dumps([document.model_dump(mode="json") for document in documents]),
+        )
@@ -8,6 +8,7 @@ from sqlalchemy.orm import load_only
 from configs import dify_config
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.retrieval_cache import RetrievalResultCache
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.entities.metadata_entities import MetadataCondition
@@ -50,6 +51,54 @@ class RetrievalService:
         if not dataset:
             return []
 
+        cache = None
+        if dify_config.RETRIEVAL_RESULT_CACHE_TTL > 0:
+            # the version is read first, a result retrieved while the index changes is cached under the old one
+            cache = RetrievalResultCache(dataset_id)
+            result_key = cache.get_result_key(
+                cache.get_version(),
+                query,
+                retrieval_method=retrieval_method,
+                top_k=top_k,
+                score_threshold=score_threshold,
+                reranking_model=reranking_model,
+                reranking_mode=reranking_mode,
+                weights=weights,
+                document_ids_filter=document_ids_filter,
+            )
+            cached_documents = cache.get(result_key)
+            if cached_documents is not None:
+                return cached_documents
+
+        all_documents = cls._retrieve(
+            dataset,
+            retrieval_method,
+            query,
+            top_k,
+            score_threshold,
+            reranking_model,
+            reranking_mode,
+            weights,
+            document_ids_filter,
+        )
+        if cache:
+            cache.set(result_key, all_documents)
+        return all_documents
+
+    @classmethod
+    def _retrieve(
+        cls,
+        dataset: Dataset,
+        retrieval_method: str,
+        query: str,
+        top_k: int,
+        score_threshold: Optional[float],
+        reranking_model: Optional[dict],
+        reranking_mode: str,
+        weights: Optional[dict],
+        document_ids_filter: Optional[list[str]],
+    ) -> list[Document]:
+        dataset_id = dataset.id
         all_documents: list[Document] = []
         exceptions: list[str] = []
 
@@ -177,6 +177,16 @@ class PGVectoRS(BaseVector):
             result = session.execute(select_statement).fetchall()
         return len(result) > 0
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        with Session(self._client) as session:
+            select_statement = sql_text(
+                f"SELECT meta->>'doc_id' FROM {self._collection_name} WHERE meta->>'doc_id' = ANY(:ids); "
+            )
+            result = session.execute(select_statement, {"ids": ids}).fetchall()
+        return {record[0] for record in result}
+
     def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
         with Session(self._client) as session:
             stmt = (
@@ -4,7 +4,8 @@ from typing import Any, Optional
 from configs import dify_config
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
-from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.retrieval_cache import RetrievalResultCache
+from core.rag.datasource.vdb.vector_base import EXISTING_IDS_BATCH_SIZE, BaseVector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.embedding.embedding_base import Embeddings
@@ -170,23 +171,38 @@ class Vector:
     def create(self, texts: Optional[list] = None, **kwargs):
         if texts:
             embeddings = self._embeddings.embed_documents([document.page_content for document in texts])
-            self._vector_processor.create(texts=texts, embeddings=embeddings, **kwargs)
+            try:
+                self._vector_processor.create(texts=texts, embeddings=embeddings, **kwargs)
+            finally:
+                RetrievalResultCache(self._dataset.id).invalidate()
 
     def add_texts(self, documents: list[Document], **kwargs):
         if kwargs.get("duplicate_check", False):
             documents = self._filter_duplicate_texts(documents)
 
         embeddings = self._embeddings.embed_documents([document.page_content for document in documents])
-        self._vector_processor.create(texts=documents, embeddings=embeddings, **kwargs)
+        try:
+            self._vector_processor.create(texts=documents, embeddings=embeddings, **kwargs)
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
 
     def text_exists(self, id: str) -> bool:
         return self._vector_processor.text_exists(id)
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        return self._vector_processor.get_existing_ids(ids)
+
     def delete_by_ids(self, ids: list[str]) -> None:
-        self._vector_processor.delete_by_ids(ids)
+        try:
+            self._vector_processor.delete_by_ids(ids)
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
 
     def delete_by_metadata_field(self, key: str, value: str) -> None:
-        self._vector_processor.delete_by_metadata_field(key, value)
+        try:
+            self._vector_processor.delete_by_metadata_field(key, value)
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
 
     def search_by_vector(self, query: str, **kwargs: Any) -> list[Document]:
         query_vector = self._embeddings.embed_query(query)
@@ -196,7 +212,10 @@ class Vector:
         return self._vector_processor.search_by_full_text(query, **kwargs)
 
     def delete(self) -> None:
-        self._vector_processor.delete()
+        try:
+            self._vector_processor.delete()
+        finally:
+            RetrievalResultCache(self._dataset.id).invalidate()
         # delete collection redis cache
         if self._vector_processor.collection_name:
             collection_exist_cache_key = "vector_indexing_{}".format(self._vector_processor.collection_name)
@@ -214,16 +233,12 @@ class Vector:
         return CacheEmbedding(embedding_model)
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            if text.metadata is None:
-                continue
-            doc_id = text.metadata["doc_id"]
-            if doc_id:
-                exists_duplicate_node = self.text_exists(doc_id)
-                if exists_duplicate_node:
-                    texts.remove(text)
-
-        return texts
+        doc_ids = [text.metadata["doc_id"] for text in texts if text.metadata and text.metadata.get("doc_id")]
+        existing_ids: set[str] = set()
+        for i in range(0, len(doc_ids), EXISTING_IDS_BATCH_SIZE):
+            existing_ids.update(self.get_existing_ids(doc_ids[i : i + EXISTING_IDS_BATCH_SIZE]))
+
+        return [text for text in texts if (text.metadata or {}).get("doc_id") not in existing_ids]
 
     def __getattr__(self, name):
         if self._vector_processor is not None:
@@ -1,16 +1,31 @@
+import io
+import uuid
 from collections.abc import Sequence
-from typing import Any, Optional
+from typing import Any, Optional, cast
 
-from sqlalchemy import func
+from sqlalchemy import Table, func, insert, select, update
 
+from configs import dify_config
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.models.document import Document
 from extensions.ext_database import db
 from models.dataset import ChildChunk, Dataset, DocumentSegment
+from models.dataset import Document as DatasetDocument
+
+
+def _to_copy_text(value: Any) -> str:
+    """Format a value for the text format of COPY."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
 
 
 class DatasetDocumentStore:
+    _BATCH_SIZE = 1000
+
     def __init__(
         self,
         dataset: Dataset,
@@ -61,14 +76,26 @@ class DatasetDocumentStore:
         return output
 
     def add_documents(self, docs: Sequence[Document], allow_update: bool = True, save_child: bool = False) -> None:
-        max_position = (
-            db.session.query(func.max(DocumentSegment.position))
-            .filter(DocumentSegment.document_id == self._document_id)
-            .scalar()
-        )
+        """
+        Persist documents as segments of the document, updating segments that already exist.
+
+        All segments and child chunks are written with a few bulk statements in one transaction.
+        """
+        for doc in docs:
+            if not isinstance(doc, Document):
+                raise ValueError("doc must be a Document")
+
+            if doc.metadata is None:
+                raise ValueError("doc.metadata must be a dict")
+
+        doc_ids = [cast(dict[str, Any], doc.metadata)["doc_id"] for doc in docs]
+        # NOTE: doc could already exist in the store, but we overwrite it
+        existing_segments = self._get_document_segments(doc_ids)
+        if not allow_update:
+            for doc_id in doc_ids:
+                if doc_id in existing_segments:
+                    raise ValueError(f"doc_id {doc_id} already exists. Set allow_update to True to overwrite.")
 
-        if max_position is None:
-            max_position = 0
         embedding_model = None
         if self._dataset.indexing_technique == "high_quality":
             model_manager = ModelManager()
@@ -85,92 +112,137 @@ class DatasetDocumentStore:
         else:
             tokens_list = [0] * len(docs)
 
-        for doc, tokens in zip(docs, tokens_list):
-            if not isinstance(doc, Document):
-                raise ValueError("doc must be a Document")
-
-            if doc.metadata is None:
-                raise ValueError("doc.metadata must be a dict")
-
-            segment_document = self.get_document_segment(doc_id=doc.metadata["doc_id"])
+        # reserve the positions of all new segments at once, the lock is held until commit
+        if self._document_id:
+            db.session.execute(
+                select(DatasetDocument.id).where(DatasetDocument.id == self._document_id).with_for_update()
+            )
+        max_position = (
+            db.session.query(func.max(DocumentSegment.position))
+            .filter(DocumentSegment.document_id == self._document_id)
+            .scalar()
+        )
 
-            # NOTE: doc could already exist in the store, but we overwrite it
-            if not allow_update and segment_document:
-                raise ValueError(
-                    f"doc_id {doc.metadata['doc_id']} already exists. Set allow_update to True to overwrite."
-                )
+        if max_position is None:
+            max_position = 0
 
-            if not segment_document:
+        # Key: index node id, Value: row of a new segment
+        new_segment_rows: dict[str, dict[str, Any]] = {}
+        # Key: segment id, Value: changed columns of an existing segment
+        segment_updates: dict[str, dict[str, Any]] = {}
+        # Key: segment id, Value: rows of the child chunks replacing the current ones
+        child_chunk_rows: dict[str, list[dict[str, Any]]] = {}
+        for doc, tokens in zip(docs, tokens_list):
+            metadata = cast(dict[str, Any], doc.metadata)
+            values: dict[str, Any] = {
+                "index_node_hash": metadata.get("doc_hash"),
+                "content": doc.page_content,
+                "word_count": len(doc.page_content),
+                "tokens": tokens,
+            }
+            if metadata.get("answer"):
+                values["answer"] = metadata.pop("answer", "")
+
+            segment_document = existing_segments.get(metadata["doc_id"])
+            if segment_document:
+                segment_id = segment_document.id
+                segment_updates.setdefault(segment_id, {"id": segment_id}).update(values)
+            elif metadata["doc_id"] in new_segment_rows:
+                segment_id = new_segment_rows[metadata["doc_id"]]["id"]
+                new_segment_rows[metadata["doc_id"]].update(values)
+            else:
                 max_position += 1
+                segment_id = str(uuid.uuid4())
+                new_segment_rows[metadata["doc_id"]] = {
+                    "id": segment_id,
+                    "tenant_id": self._dataset.tenant_id,
+                    "dataset_id": self._dataset.id,
+                    "document_id": self._document_id,
+                    "index_node_id": metadata["doc_id"],
+                    "position": max_position,
+                    "answer": None,
+                    "hit_count": 0,
+                    "enabled": False,
+                    "created_by": self._user_id,
+                    **values,
+                }
+
+            if save_child and doc.children:
+                child_chunk_rows[segment_id] = [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "tenant_id": self._dataset.tenant_id,
+                        "dataset_id": self._dataset.id,
+                        "document_id": self._document_id,
+                        "segment_id": segment_id,
+                        "position": position,
+                        "index_node_id": child.metadata.get("doc_id"),
+                        "index_node_hash": child.metadata.get("doc_hash"),
+                        "content": child.page_content,
+                        "word_count": len(child.page_content),
+                        "type": "automatic",
+                        "created_by": self._user_id,
+                    }
+                    for position, child in enumerate(doc.children, start=1)
+                ]
+
+        # delete the existing child chunks of updated segments
+        replaced_segment_ids = [segment_id for segment_id in child_chunk_rows if segment_id in segment_updates]
+        for i in range(0, len(replaced_segment_ids), self._BATCH_SIZE):
+            db.session.query(ChildChunk).filter(
+                ChildChunk.tenant_id == self._dataset.tenant_id,
+                ChildChunk.dataset_id == self._dataset.id,
+                ChildChunk.document_id == self._document_id,
+                ChildChunk.segment_id.in_(replaced_segment_ids[i : i + self._BATCH_SIZE]),
+            ).delete(synchronize_session=False)
+
+        self._insert_rows(DocumentSegment, list(new_segment_rows.values()))
+        updates = list(segment_updates.values())
+        for i in range(0, len(updates), self._BATCH_SIZE):
+            db.session.execute(update(DocumentSegment), updates[i : i + self._BATCH_SIZE])
+        self._insert_rows(ChildChunk, [row for rows in child_chunk_rows.values() for row in rows])
+
+        db.session.commit()
 
-                segment_document = DocumentSegment(
-                    tenant_id=self._dataset.tenant_id,
-                    dataset_id=self._dataset.id,
-                    document_id=self._document_id,
-                    index_node_id=doc.metadata["doc_id"],
-                    index_node_hash=doc.metadata["doc_hash"],
-                    position=max_position,
-                    content=doc.page_content,
-                    word_count=len(doc.page_content),
-                    tokens=tokens,
-                    enabled=False,
-                    created_by=self._user_id,
+    def _get_document_segments(self, doc_ids: Sequence[str]) -> dict[str, DocumentSegment]:
+        segments: dict[str, DocumentSegment] = {}
+        for i in range(0, len(doc_ids), self._BATCH_SIZE):
+            for segment in db.session.scalars(
+                select(DocumentSegment).where(
+                    DocumentSegment.dataset_id == self._dataset.id,
+                    DocumentSegment.index_node_id.in_(doc_ids[i : i + self._BATCH_SIZE]),
                 )
-                if doc.metadata.get("answer"):
-                    segment_document.answer = doc.metadata.pop("answer", "")
-
-                db.session.add(segment_document)
-                db.session.flush()
-                if save_child:
-                    if doc.children:
-                        for postion, child in enumerate(doc.children, start=1):
-                            child_segment = ChildChunk(
-                                tenant_id=self._dataset.tenant_id,
-                                dataset_id=self._dataset.id,
-                                document_id=self._document_id,
-                                segment_id=segment_document.id,
-                                position=postion,
-                                index_node_id=child.metadata.get("doc_id"),
-                                index_node_hash=child.metadata.get("doc_hash"),
-                                content=child.page_content,
-                                word_count=len(child.page_content),
-                                type="automatic",
-                                created_by=self._user_id,
-                            )
-                            db.session.add(child_segment)
-            else:
-                segment_document.content = doc.page_content
-                if doc.metadata.get("answer"):
-                    segment_document.answer = doc.metadata.pop("answer", "")
-                segment_document.index_node_hash = doc.metadata.get("doc_hash")
-                segment_document.word_count = len(doc.page_content)
-                segment_document.tokens = tokens
-                if save_child and doc.children:
-                    # delete the existing child chunks
-                    db.session.query(ChildChunk).filter(
-                        ChildChunk.tenant_id == self._dataset.tenant_id,
-                        ChildChunk.dataset_id == self._dataset.id,
-                        ChildChunk.document_id == self._document_id,
-                        ChildChunk.segment_id == segment_document.id,
-                    ).delete()
-                    # add new child chunks
-                    for position, child in enumerate(doc.children, start=1):
-                        child_segment = ChildChunk(
-                            tenant_id=self._dataset.tenant_id,
-                            dataset_id=self._dataset.id,
-                            document_id=self._document_id,
-                            segment_id=segment_document.id,
-                            position=position,
-                            index_node_id=child.metadata.get("doc_id"),
-                            index_node_hash=child.metadata.get("doc_hash"),
-                            content=child.page_content,
-                            word_count=len(child.page_content),
-                            type="automatic",
-                            created_by=self._user_id,
-                        )
-                        db.session.add(child_segment)
-
-            db.session.commit()
+            ):
+                segments.setdefault(segment.index_node_id, segment)
+        return segments
+
+    def _insert_rows(self, model: type[DocumentSegment] | type[ChildChunk], rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        if dify_config.SEGMENT_COPY_LOADER_ENABLED and db.session.get_bind().dialect.driver == "psycopg2":
+            self._copy_rows(model.__table__, rows)  # type: ignore[arg-type]
+            return
+        for i in range(0, len(rows), self._BATCH_SIZE):
+            db.session.execute(insert(model), rows[i : i + self._BATCH_SIZE])
+
+    @staticmethod
+    def _copy_rows(table: Table, rows: list[dict[str, Any]]) -> None:
+        """
+        Load rows with COPY in the transaction of the session. Columns left out get their server defaults.
+        """
+        columns = list(rows[0].keys())
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_to_copy_text(row[column]) for column in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        db.session.flush()
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+        finally:
+            cursor.close()
 
     def document_exists(self, doc_id: str) -> bool:
         """Check if document exists."""
@@ -7,6 +7,7 @@ from sqlalchemy.exc import IntegrityError
 
 from configs import dify_config
 from core.entities.embedding_type import EmbeddingInputType
+from core.helper.micro_batcher import MicroBatcher
 from core.model_manager import ModelInstance
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
@@ -20,6 +21,8 @@ logger = logging.getLogger(__name__)
 
 
 class CacheEmbedding(Embeddings):
+    _batcher: MicroBatcher[str, list[float]] = MicroBatcher("embedding")
+
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
         self._model_instance = model_instance
         self._user = user
@@ -46,36 +49,20 @@ class CacheEmbedding(Embeddings):
             embedding_queue_texts = [texts[i] for i in embedding_queue_indices]
             embedding_queue_embeddings = []
             try:
-                model_type_instance = cast(TextEmbeddingModel, self._model_instance.model_type_instance)
-                model_schema = model_type_instance.get_model_schema(
-                    self._model_instance.model, self._model_instance.credentials
-                )
-                max_chunks = (
-                    model_schema.model_properties[ModelPropertyKey.MAX_CHUNKS]
-                    if model_schema and ModelPropertyKey.MAX_CHUNKS in model_schema.model_properties
-                    else 1
-                )
-                for i in range(0, len(embedding_queue_texts), max_chunks):
-                    batch_texts = embedding_queue_texts[i : i + max_chunks]
-
-                    embedding_result = self._model_instance.invoke_text_embedding(
-                        texts=batch_texts, user=self._user, input_type=EmbeddingInputType.DOCUMENT
-                    )
-
-                    for vector in embedding_result.embeddings:
-                        try:
-                            # FIXME: type ignore for numpy here
-                            normalized_embedding = (vector / np.linalg.norm(vector)).tolist()  # type: ignore
-                            # stackoverflow best way: https://stackoverflow.com/questions/20319813/how-to-check-list-containing-nan
-                            if np.isnan(normalized_embedding).any():
-                                # for issue #11827  float values are not json compliant
-                                logger.warning(f"Normalized embedding is nan: {normalized_embedding}")
-                                continue
-                            embedding_queue_embeddings.append(normalized_embedding)
-                        except IntegrityError:
-                            db.session.rollback()
-                        except Exception:
-                            logging.exception("Failed transform embedding")
+                for vector in self._embed_texts(embedding_queue_texts, EmbeddingInputType.DOCUMENT):
+                    try:
+                        # FIXME: type ignore for numpy here
+                        normalized_embedding = (vector / np.linalg.norm(vector)).tolist()  # type: ignore
+                        # stackoverflow best way: https://stackoverflow.com/questions/20319813/how-to-check-list-containing-nan
+                        if np.isnan(normalized_embedding).any():
+                            # for issue #11827  float values are not json compliant
+                            logger.warning(f"Normalized embedding is nan: {normalized_embedding}")
+                            continue
+                        embedding_queue_embeddings.append(normalized_embedding)
+                    except IntegrityError:
+                        db.session.rollback()
+                    except Exception:
+                        logging.exception("Failed transform embedding")
                 cache_embeddings = []
                 try:
                     for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
@@ -111,11 +98,7 @@ class CacheEmbedding(Embeddings):
             decoded_embedding = np.frombuffer(base64.b64decode(embedding), dtype="float")
             return [float(x) for x in decoded_embedding]
         try:
-            embedding_result = self._model_instance.invoke_text_embedding(
-                texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
-            )
-
-            embedding_results = embedding_result.embeddings[0]
+            embedding_results = self._embed_texts([text], EmbeddingInputType.QUERY)[0]
             # FIXME: type ignore for numpy here
             embedding_results = (embedding_results / np.linalg.norm(embedding_results)).tolist()  # type: ignore
             if np.isnan(embedding_results).any():
@@ -140,3 +123,52 @@ class CacheEmbedding(Embeddings):
             raise ex
 
         return embedding_results  # type: ignore
+
+    def _embed_texts(self, texts: list[str], input_type: EmbeddingInputType) -> list[list[float]]:
+        """
+        Embed texts with the model, together with concurrent requests for the same model if batching is enabled
+        """
+        if dify_config.EMBEDDING_BATCH_WINDOW_MS > 0 and len(texts) < dify_config.EMBEDDING_BATCH_MAX_SIZE:
+            return self._embed_in_batch(texts, input_type)
+
+        return self._embed_alone(texts, input_type)
+
+    def _embed_in_batch(self, texts: list[str], input_type: EmbeddingInputType) -> list[list[float]]:
+        """
+        Embed texts in a batch with the texts of concurrent requests for the same model and input type
+        """
+        key = (
+            self._model_instance.provider_model_bundle.configuration.tenant_id,
+            self._model_instance.provider,
+            self._model_instance.model,
+            input_type,
+        )
+        return self._batcher.run(
+            key,
+            texts,
+            run_batch=lambda batch_texts: self._embed_alone(batch_texts, input_type),
+            run_alone=lambda request_texts: self._embed_alone(list(request_texts), input_type),
+            window_ms=dify_config.EMBEDDING_BATCH_WINDOW_MS,
+            max_size=dify_config.EMBEDDING_BATCH_MAX_SIZE,
+        )
+
+    def _embed_alone(self, texts: list[str], input_type: EmbeddingInputType) -> list[list[float]]:
+        """
+        Embed texts with the model, in chunks of the maximum number of texts it accepts per request
+        """
+        max_chunks = 1
+        if len(texts) > 1:
+            model_type_instance = cast(TextEmbeddingModel, self._model_instance.model_type_instance)
+            model_schema = model_type_instance.get_model_schema(
+                self._model_instance.model, self._model_instance.credentials
+            )
+            if model_schema and ModelPropertyKey.MAX_CHUNKS in model_schema.model_properties:
+                max_chunks = model_schema.model_properties[ModelPropertyKey.MAX_CHUNKS]
+
+        embeddings: list[list[float]] = []
+        for i in range(0, len(texts), max_chunks):
+            embedding_result = self._model_instance.invoke_text_embedding(
+                texts=texts[i : i + max_chunks], user=self._user, input_type=input_type
+            )
+            embeddings.extend(embedding_result.embeddings)
+        return embeddings
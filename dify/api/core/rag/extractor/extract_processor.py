@@ -1,5 +1,6 @@
 import re
 import tempfile
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Optional, Union
 from urllib.parse import unquote
@@ -88,6 +89,26 @@ class ExtractProcessor:
             else:
                 return cls.extract(extract_setting=extract_setting, file_path=file_path)
 
+    @classmethod
+    def iter_extract(cls, extract_setting: ExtractSetting, is_automatic: bool = False) -> Iterator[Document]:
+        """
+        Extract lazily, the pages of uploaded PDF files are yielded as soon as they are extracted.
+        """
+        upload_file = extract_setting.upload_file
+        if (
+            extract_setting.datasource_type != DatasourceType.FILE.value
+            or upload_file is None
+            or Path(upload_file.key).suffix.lower() != ".pdf"
+        ):
+            yield from cls.extract(extract_setting, is_automatic)
+            return
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # FIXME mypy: Cannot determine type of 'tempfile._get_candidate_names' better not use it here
+            file_path = f"{temp_dir}/{next(tempfile._get_candidate_names())}.pdf"  # type: ignore
+            storage.download(upload_file.key, file_path)
+            yield from PdfExtractor(file_path).load()
+
     @classmethod
     def extract(
         cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
@@ -1,13 +1,63 @@
 """Abstract interface for document loader implementations."""
 
+import logging
+import multiprocessing
+import threading
+from collections import deque
 from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional, cast
 
+from configs import dify_config
 from core.rag.extractor.blob.blob import Blob
 from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.models.document import Document
 from extensions.ext_storage import storage
 
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn the workers, forking a threaded api or celery process is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=dify_config.PDF_EXTRACTION_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _reset_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a broken executor, the next parallel extraction starts new processes."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_texts(file_path: str, start: int, stop: int) -> list[str]:
+    """Extract the text of the pages in [start, stop) of a pdf file, run in the extraction processes."""
+    import pypdfium2  # type: ignore
+
+    pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
+    try:
+        texts = []
+        for page_number in range(start, stop):
+            page = pdf_reader[page_number]
+            text_page = page.get_textpage()
+            texts.append(text_page.get_text_range())
+            text_page.close()
+            page.close()
+        return texts
+    finally:
+        pdf_reader.close()
+
 
 class PdfExtractor(BaseExtractor):
     """Load pdf files.
@@ -57,6 +107,15 @@ class PdfExtractor(BaseExtractor):
         with blob.as_bytes_io() as file_path:
             pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
             try:
+                page_count = len(pdf_reader)
+                if (
+                    blob.path
+                    and dify_config.PDF_EXTRACTION_PROCESSES
+                    and page_count >= dify_config.PDF_EXTRACTION_PARALLEL_MIN_PAGES
+                ):
+                    yield from self._parse_in_parallel(str(blob.path), blob.source, page_count)
+                    return
+
                 for page_number, page in enumerate(pdf_reader):
                     text_page = page.get_textpage()
                     content = text_page.get_text_range()
@@ -66,3 +125,43 @@ class PdfExtractor(BaseExtractor):
                     yield Document(page_content=content, metadata=metadata)
             finally:
                 pdf_reader.close()
+
+    def _parse_in_parallel(self, file_path: str, source: Optional[str], page_count: int) -> Iterator[Document]:
+        """
+        Extract ranges of pages in the extraction processes, yielding the pages in order.
+        Only a few ranges are in flight at a time, so the texts of a large file are not all held in memory.
+        If an extraction process dies, e.g. killed for running out of memory, the remaining pages are
+        extracted in this process.
+        """
+        executor = _get_executor()
+        pages_per_task = dify_config.PDF_EXTRACTION_PAGES_PER_TASK
+        max_pending = dify_config.PDF_EXTRACTION_PROCESSES * 2
+        ranges = iter(range(0, page_count, pages_per_task))
+        pending: deque[tuple[int, Future[list[str]]]] = deque()
+        next_page = 0
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    start = next(ranges, None)
+                    if start is None:
+                        break
+                    stop = min(start + pages_per_task, page_count)
+                    pending.append((start, executor.submit(_extract_page_texts, file_path, start, stop)))
+                if not pending:
+                    return
+
+                start, future = pending.popleft()
+                for page_number, content in enumerate(future.result(), start):
+                    yield Document(page_content=content, metadata={"source": source, "page": page_number})
+                    next_page = page_number + 1
+        except BrokenProcessPool:
+            logger.warning("PDF extraction processes terminated abruptly, extracting %s in process", source)
+            _reset_executor(executor)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+        for start in range(next_page, page_count, pages_per_task):
+            stop = min(start + pages_per_task, page_count)
+            for page_number, content in enumerate(_extract_page_texts(file_path, start, stop), start):
+                yield Document(page_content=content, metadata={"source": source, "page": page_number})
@@ -1,8 +1,10 @@
 """Paragraph index processor."""
 
+import concurrent.futures
+import json
 import logging
 import re
-import threading
+import time
 import uuid
 from typing import Optional
 
@@ -10,6 +12,9 @@ import pandas as pd
 from flask import Flask, current_app
 from werkzeug.datastructures import FileStorage
 
+from configs import dify_config
+from core.app.features.rate_limiting import RateLimit
+from core.errors.error import AppInvokeQuotaExceededError
 from core.llm_generator.llm_generator import LLMGenerator
 from core.rag.cleaner.clean_processor import CleanProcessor
 from core.rag.datasource.retrieval_service import RetrievalService
@@ -19,10 +24,13 @@ from core.rag.extractor.extract_processor import ExtractProcessor
 from core.rag.index_processor.index_processor_base import BaseIndexProcessor
 from core.rag.models.document import Document
 from core.tools.utils.text_processing_utils import remove_leading_symbols
+from extensions.ext_redis import redis_client
 from libs import helper
 from models.dataset import Dataset
 from services.entities.knowledge_entities.knowledge_entities import Rule
 
+logger = logging.getLogger(__name__)
+
 
 class QAIndexProcessor(BaseIndexProcessor):
     def extract(self, extract_setting: ExtractSetting, **kwargs) -> list[Document]:
@@ -52,7 +60,6 @@ class QAIndexProcessor(BaseIndexProcessor):
 
         # Split the text documents into nodes.
         all_documents: list[Document] = []
-        all_qa_documents: list[Document] = []
         for document in documents:
             # document clean
             document_text = CleanProcessor.clean(document.page_content, kwargs.get("process_rule") or {})
@@ -73,33 +80,15 @@ class QAIndexProcessor(BaseIndexProcessor):
                     document_node.page_content = remove_leading_symbols(page_content)
                     split_documents.append(document_node)
             all_documents.extend(split_documents)
+        flask_app = current_app._get_current_object()  # type: ignore
         if preview:
-            self._format_qa_document(
-                current_app._get_current_object(),  # type: ignore
-                kwargs.get("tenant_id"),  # type: ignore
-                all_documents[0],
-                all_qa_documents,
-                kwargs.get("doc_language", "English"),
-            )
-        else:
-            for i in range(0, len(all_documents), 10):
-                threads = []
-                sub_documents = all_documents[i : i + 10]
-                for doc in sub_documents:
-                    document_format_thread = threading.Thread(
-                        target=self._format_qa_document,
-                        kwargs={
-                            "flask_app": current_app._get_current_object(),  # type: ignore
-                            "tenant_id": kwargs.get("tenant_id"),  # type: ignore
-                            "document_node": doc,
-                            "all_qa_documents": all_qa_documents,
-                            "document_language": kwargs.get("doc_language", "English"),
-                        },
-                    )
-                    threads.append(document_format_thread)
-                    document_format_thread.start()
-                for thread in threads:
-                    thread.join()
+            all_documents = all_documents[:1]
+        all_qa_documents = self._generate_qa_documents(
+            flask_app,
+            kwargs.get("tenant_id"),  # type: ignore
+            all_documents,
+            kwargs.get("doc_language", "English"),
+        )
         return all_qa_documents
 
     def format_by_template(self, file: FileStorage, **kwargs) -> list[Document]:
@@ -161,30 +150,101 @@ class QAIndexProcessor(BaseIndexProcessor):
                 docs.append(doc)
         return docs
 
-    def _format_qa_document(self, flask_app: Flask, tenant_id: str, document_node, all_qa_documents, document_language):
-        format_documents = []
-        if document_node.page_content is None or not document_node.page_content.strip():
-            return
+    def _generate_qa_documents(
+        self, flask_app: Flask, tenant_id: str, document_nodes: list[Document], document_language: str
+    ) -> list[Document]:
+        """
+        Generate the QA documents of all nodes, keeping up to QA_INDEXING_CONCURRENCY LLM calls in flight.
+
+        The pairs generated for a node are checkpointed in Redis, so a document whose indexing was
+        interrupted only generates the pairs of the nodes that were not finished yet.
+        """
+        document_nodes = [node for node in document_nodes if node.page_content and node.page_content.strip()]
+        checkpoint_keys = [self._checkpoint_key(tenant_id, node, document_language) for node in document_nodes]
+        qa_pairs_list: list[Optional[list[dict]]] = [
+            json.loads(checkpoint) if checkpoint else None
+            for checkpoint in (redis_client.mget(checkpoint_keys) if checkpoint_keys else [])
+        ]
+
+        pending = [i for i, qa_pairs in enumerate(qa_pairs_list) if qa_pairs is None]
+        if pending:
+            logger.info(
+                "Generating QA pairs for %d nodes, %d restored from checkpoint",
+                len(pending),
+                len(document_nodes) - len(pending),
+            )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(dify_config.QA_INDEXING_CONCURRENCY, max(len(pending), 1))
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self._generate_qa_pairs,
+                    flask_app,
+                    tenant_id,
+                    document_nodes[i].page_content,
+                    document_language,
+                    checkpoint_keys[i],
+                ): i
+                for i in pending
+            }
+            for future in concurrent.futures.as_completed(futures):
+                qa_pairs_list[futures[future]] = future.result()
+
+        all_qa_documents: list[Document] = []
+        for document_node, qa_pairs in zip(document_nodes, qa_pairs_list):
+            for result in qa_pairs or []:
+                qa_document = Document(page_content=result["question"], metadata=document_node.metadata.copy())
+                if qa_document.metadata is not None:
+                    doc_id = str(uuid.uuid4())
+                    hash = helper.generate_text_hash(result["question"])
+                    qa_document.metadata["answer"] = result["answer"]
+                    qa_document.metadata["doc_id"] = doc_id
+                    qa_document.metadata["doc_hash"] = hash
+                all_qa_documents.append(qa_document)
+        return all_qa_documents
+
+    def _generate_qa_pairs(
+        self, flask_app: Flask, tenant_id: str, content: str, document_language: str, checkpoint_key: str
+    ) -> list[dict]:
+        """
+        Generate the QA pairs of a node and checkpoint them, retrying failed LLM calls with backoff.
+        Calls of a tenant are limited to QA_INDEXING_TENANT_CONCURRENCY across all workers.
+        """
+        rate_limit = RateLimit(f"qa_index:{tenant_id}", dify_config.QA_INDEXING_TENANT_CONCURRENCY)
         with flask_app.app_context():
+            for attempt in range(dify_config.QA_INDEXING_MAX_RETRIES + 1):
+                try:
+                    request_id = self._enter_rate_limit(rate_limit)
+                    try:
+                        response = LLMGenerator.generate_qa_document(tenant_id, content, document_language)
+                    finally:
+                        rate_limit.exit(request_id)
+                except Exception:
+                    if attempt == dify_config.QA_INDEXING_MAX_RETRIES:
+                        logger.exception("Failed to format qa document")
+                        return []
+                    logger.warning("Failed to format qa document, retrying", exc_info=True)
+                    time.sleep(2**attempt)
+                    continue
+
+                qa_pairs: list[dict] = self._format_split_text(response)
+                redis_client.setex(checkpoint_key, dify_config.QA_INDEXING_CHECKPOINT_TTL, json.dumps(qa_pairs))
+                return qa_pairs
+        return []
+
+    @staticmethod
+    def _enter_rate_limit(rate_limit: RateLimit) -> str:
+        # wait for a free slot instead of failing, the tenant's other calls finish eventually
+        while True:
             try:
-                # qa model document
-                response = LLMGenerator.generate_qa_document(tenant_id, document_node.page_content, document_language)
-                document_qa_list = self._format_split_text(response)
-                qa_documents = []
-                for result in document_qa_list:
-                    qa_document = Document(page_content=result["question"], metadata=document_node.metadata.copy())
-                    if qa_document.metadata is not None:
-                        doc_id = str(uuid.uuid4())
-                        hash = helper.generate_text_hash(result["question"])
-                        qa_document.metadata["answer"] = result["answer"]
-                        qa_document.metadata["doc_id"] = doc_id
-                        qa_document.metadata["doc_hash"] = hash
-                    qa_documents.append(qa_document)
-                format_documents.extend(qa_documents)
-            except Exception as e:
-                logging.exception("Failed to format qa document")
-
-            all_qa_documents.extend(format_documents)
+                return rate_limit.enter()
+            except AppInvokeQuotaExceededError:
+                time.sleep(1)
+
+    @staticmethod
+    def _checkpoint_key(tenant_id: str, document_node: Document, document_language: str) -> str:
+        content_hash = helper.generate_text_hash(f"{document_language}:{document_node.page_content}")
+        return f"qa_index_checkpoint:{tenant_id}:{content_hash}"
 
     def _format_split_text(self, text):
         regex = r"Q\d+:\s*(.*?)\s*A\d+:\s*([\s\S]*?)(?=Q\d+:|$)"
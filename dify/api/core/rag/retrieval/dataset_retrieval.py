@@ -10,6 +10,7 @@ from flask import Flask, current_app
 from sqlalchemy import Float, and_, or_, text
 from sqlalchemy import cast as sqlalchemy_cast
 
+from configs import dify_config
 from core.app.app_config.entities import (
     DatasetEntity,
     DatasetRetrieveConfigEntity,
@@ -42,6 +43,7 @@ from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
+from core.rag.retrieval.retrieval_statistics import RetrievalStatistics
 from core.rag.retrieval.router.multi_dataset_function_call_router import FunctionCallMultiDatasetRouter
 from core.rag.retrieval.router.multi_dataset_react_route import ReactMultiDatasetRouter
 from core.rag.retrieval.template_prompts import (
@@ -58,6 +60,7 @@ from extensions.ext_database import db
 from libs.json_in_md_parser import parse_and_check_json_markdown
 from models.dataset import ChildChunk, Dataset, DatasetMetadata, DatasetQuery, DocumentSegment
 from models.dataset import Document as DatasetDocument
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 from services.external_knowledge_service import ExternalDatasetService
 
 default_retrieval_model: dict[str, Any] = {
@@ -509,49 +512,54 @@ class DatasetRetrieval:
     ) -> None:
         """Handle retrieval end."""
         dify_documents = [document for document in documents if document.provider == "dify"]
-        for document in dify_documents:
-            if document.metadata is not None:
-                dataset_document = (
-                    db.session.query(DatasetDocument)
-                    .filter(DatasetDocument.id == document.metadata["document_id"])
-                    .first()
-                )
-                if dataset_document:
-                    if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
-                        child_chunk = (
-                            db.session.query(ChildChunk)
-                            .filter(
-                                ChildChunk.index_node_id == document.metadata["doc_id"],
-                                ChildChunk.dataset_id == dataset_document.dataset_id,
-                                ChildChunk.document_id == dataset_document.id,
+        if dify_config.RETRIEVAL_STATISTICS_ASYNC_ENABLED:
+            RetrievalStatistics.record_hits(dify_documents)
+        else:
+            for document in dify_documents:
+                if document.metadata is not None:
+                    dataset_document = (
+                        db.session.query(DatasetDocument)
+                        .filter(DatasetDocument.id == document.metadata["document_id"])
+                        .first()
+                    )
+                    if dataset_document:
+                        if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                            child_chunk = (
+                                db.session.query(ChildChunk)
+                                .filter(
+                                    ChildChunk.index_node_id == document.metadata["doc_id"],
+                                    ChildChunk.dataset_id == dataset_document.dataset_id,
+                                    ChildChunk.document_id == dataset_document.id,
+                                )
+                                .first()
                             )
-                            .first()
-                        )
-                        if child_chunk:
-                            segment = (
-                                db.session.query(DocumentSegment)
-                                .filter(DocumentSegment.id == child_chunk.segment_id)
-                                .update(
-                                    {DocumentSegment.hit_count: DocumentSegment.hit_count + 1},
-                                    synchronize_session=False,
+                            if child_chunk:
+                                segment = (
+                                    db.session.query(DocumentSegment)
+                                    .filter(DocumentSegment.id == child_chunk.segment_id)
+                                    .update(
+                                        {DocumentSegment.hit_count: DocumentSegment.hit_count + 1},
+                                        synchronize_session=False,
+                                    )
                                 )
+                                DocumentSegmentStatisticsService.increment_hit_counts({dataset_document.id: segment})
+                                db.session.commit()
+                        else:
+                            query = db.session.query(DocumentSegment).filter(
+                                DocumentSegment.index_node_id == document.metadata["doc_id"]
                             )
-                            db.session.commit()
-                    else:
-                        query = db.session.query(DocumentSegment).filter(
-                            DocumentSegment.index_node_id == document.metadata["doc_id"]
-                        )
 
-                        # if 'dataset_id' in document.metadata:
-                        if "dataset_id" in document.metadata:
-                            query = query.filter(DocumentSegment.dataset_id == document.metadata["dataset_id"])
+                            # if 'dataset_id' in document.metadata:
+                            if "dataset_id" in document.metadata:
+                                query = query.filter(DocumentSegment.dataset_id == document.metadata["dataset_id"])
 
-                        # add hit count to document segment
-                        query.update(
-                            {DocumentSegment.hit_count: DocumentSegment.hit_count + 1}, synchronize_session=False
-                        )
+                            # add hit count to document segment
+                            hits = query.update(
+                                {DocumentSegment.hit_count: DocumentSegment.hit_count + 1}, synchronize_session=False
+                            )
+                            DocumentSegmentStatisticsService.increment_hit_counts({dataset_document.id: hits})
 
-                    db.session.commit()
+                        db.session.commit()
 
         # get tracing instance
         trace_manager: TraceQueueManager | None = (
@@ -570,6 +578,9 @@ class DatasetRetrieval:
         """
         if not query:
             return
+        if dify_config.RETRIEVAL_STATISTICS_ASYNC_ENABLED:
+            RetrievalStatistics.record_queries(query, dataset_ids, app_id, user_from, user_id)
+            return
         dataset_queries = []
         for dataset_id in dataset_ids:
             dataset_query = DatasetQuery(
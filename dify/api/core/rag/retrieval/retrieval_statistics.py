@@ -0,0 +1,194 @@
+import json
+import logging
+import time
+from collections import Counter
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+from sqlalchemy import insert, text
+
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import DatasetQuery
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalStatistics:
+    """
+    Records segment hit counts and dataset queries off the retrieval path.
+
+    Hits are aggregated in a Redis hash with one `HINCRBY` per retrieved segment and queries are
+    appended to a Redis list. `flush` persists both with a handful of bulk statements, so retrieval
+    neither waits for commits nor contends for row locks on frequently hit segments.
+    """
+
+    _HITS_KEY = "retrieval_statistics:segment_hits"
+    _HITS_PROCESSING_KEY = "retrieval_statistics:segment_hits:processing"
+    _QUERIES_KEY = "retrieval_statistics:dataset_queries"
+    _FLUSH_LOCK_KEY = "retrieval_statistics:flush_lock"
+
+    _FLUSH_BATCH_SIZE = 1000
+
+    @classmethod
+    def record_hits(cls, documents: Sequence[Document]) -> None:
+        """
+        Add one hit to the segment (or the parent segment of the child chunk) behind each document.
+        """
+        hits: Counter[str] = Counter()
+        for document in documents:
+            if document.provider != "dify" or not document.metadata:
+                continue
+            dataset_id = document.metadata.get("dataset_id")
+            index_node_id = document.metadata.get("doc_id")
+            if not dataset_id or not index_node_id:
+                continue
+            hits[f"{dataset_id}:{index_node_id}"] += 1
+
+        if not hits:
+            return
+
+        pipeline = redis_client.pipeline(transaction=False)
+        for field, count in hits.items():
+            pipeline.hincrby(cls._HITS_KEY, field, count)
+        pipeline.execute()
+
+    @classmethod
+    def record_queries(
+        cls, query: str, dataset_ids: Sequence[str], app_id: str, created_by_role: str, created_by: str
+    ) -> None:
+        """
+        Queue one DatasetQuery row per dataset.
+        """
+        if not query or not dataset_ids:
+            return
+
+        created_at = datetime.now(UTC).replace(tzinfo=None).isoformat()
+        rows = [
+            json.dumps(
+                {
+                    "dataset_id": dataset_id,
+                    "content": query,
+                    "source": "app",
+                    "source_app_id": app_id,
+                    "created_by_role": created_by_role,
+                    "created_by": created_by,
+                    "created_at": created_at,
+                }
+            )
+            for dataset_id in dataset_ids
+        ]
+        redis_client.rpush(cls._QUERIES_KEY, *rows)
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Persist all aggregated statistics. A flush is skipped while another one holds the Redis lock,
+        the next one picks up what was recorded meanwhile.
+        """
+        lock = redis_client.lock(cls._FLUSH_LOCK_KEY, timeout=600, blocking=False)
+        if not lock.acquire():
+            logger.info("Retrieval statistics are already being flushed, skipped")
+            return
+
+        try:
+            start_at = time.perf_counter()
+            segment_count = cls._flush_hits()
+            query_count = cls._flush_queries()
+            logger.info(
+                "Flushed hit counts of %d segments and %d dataset queries, latency: %.3fs",
+                segment_count,
+                query_count,
+                time.perf_counter() - start_at,
+            )
+        finally:
+            lock.release()
+
+    @classmethod
+    def _flush_hits(cls) -> int:
+        # Move the hash aside so increments recorded while flushing go to a fresh one.
+        # A processing hash left over by a failed flush is retried first.
+        if not redis_client.exists(cls._HITS_PROCESSING_KEY):
+            if not redis_client.exists(cls._HITS_KEY):
+                return 0
+            redis_client.rename(cls._HITS_KEY, cls._HITS_PROCESSING_KEY)
+
+        hits: list[tuple[str, str, int]] = []
+        for field, count in redis_client.hgetall(cls._HITS_PROCESSING_KEY).items():
+            dataset_id, _, index_node_id = field.decode().partition(":")
+            hits.append((dataset_id, index_node_id, int(count)))
+
+        for offset in range(0, len(hits), cls._FLUSH_BATCH_SIZE):
+            cls._apply_hits(hits[offset : offset + cls._FLUSH_BATCH_SIZE])
+        db.session.commit()
+
+        redis_client.delete(cls._HITS_PROCESSING_KEY)
+        return len(hits)
+
+    @staticmethod
+    def _apply_hits(hits: Sequence[tuple[str, str, int]]) -> None:
+        values = []
+        params: dict[str, str | int] = {}
+        for i, (dataset_id, index_node_id, count) in enumerate(hits):
+            values.append(f"(CAST(:dataset_id_{i} AS uuid), :index_node_id_{i}, CAST(:hits_{i} AS integer))")
+            params[f"dataset_id_{i}"] = dataset_id
+            params[f"index_node_id_{i}"] = index_node_id
+            params[f"hits_{i}"] = count
+        hit_values = f"(VALUES {', '.join(values)}) AS hit(dataset_id, index_node_id, hits)"
+
+        # Retrieved documents are either segments or, in parent-child mode, child chunks whose
+        # hits are credited to the parent segment. Index node ids are unique across both tables.
+        segment_hits = db.session.execute(
+            text(f"""
+                UPDATE document_segments AS segment
+                SET hit_count = segment.hit_count + hit.hits
+                FROM {hit_values}
+                WHERE segment.dataset_id = hit.dataset_id AND segment.index_node_id = hit.index_node_id
+                RETURNING segment.document_id, hit.hits
+            """),
+            params,
+        ).all()
+        child_segment_hits = db.session.execute(
+            text(f"""
+                UPDATE document_segments AS segment
+                SET hit_count = segment.hit_count + child_hit.hits
+                FROM (
+                    SELECT child.segment_id, SUM(hit.hits) AS hits
+                    FROM {hit_values}
+                    JOIN child_chunks AS child
+                        ON child.dataset_id = hit.dataset_id AND child.index_node_id = hit.index_node_id
+                    GROUP BY child.segment_id
+                ) AS child_hit
+                WHERE segment.id = child_hit.segment_id
+                RETURNING segment.document_id, child_hit.hits
+            """),
+            params,
+        ).all()
+
+        document_hits: Counter[str] = Counter()
+        for document_id, count in [*segment_hits, *child_segment_hits]:
+            document_hits[str(document_id)] += count
+        DocumentSegmentStatisticsService.increment_hit_counts(document_hits)
+
+    @classmethod
+    def _flush_queries(cls) -> int:
+        # Only this flush removes entries and new ones are appended at the tail,
+        # so the head of the list can be trimmed once it has been committed.
+        total = 0
+        while True:
+            entries = redis_client.lrange(cls._QUERIES_KEY, 0, cls._FLUSH_BATCH_SIZE - 1)
+            if not entries:
+                return total
+
+            rows = []
+            for entry in entries:
+                row = json.loads(entry)
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                rows.append(row)
+            db.session.execute(insert(DatasetQuery), rows)
+            db.session.commit()
+
+            redis_client.ltrim(cls._QUERIES_KEY, len(entries), -1)
+            total += len(entries)
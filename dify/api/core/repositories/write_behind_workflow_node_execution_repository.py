@@ -0,0 +1,203 @@
+"""
+Write-behind implementation of the WorkflowNodeExecutionRepository.
+"""
+
+import logging
+import threading
+from collections.abc import Sequence
+from typing import Any, Optional, Union
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from configs import dify_config
+from core.repositories.sqlalchemy_workflow_node_execution_repository import SQLAlchemyWorkflowNodeExecutionRepository
+from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution
+from core.workflow.repositories.workflow_node_execution_repository import OrderConfig
+from models import Account, EndUser, WorkflowNodeExecutionModel, WorkflowNodeExecutionTriggeredFrom
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindWorkflowNodeExecutionRepository(SQLAlchemyWorkflowNodeExecutionRepository):
+    """
+    WorkflowNodeExecutionRepository that buffers saves and persists them in bulk.
+
+    `save` only records the latest state of an execution in memory. A background worker
+    upserts the buffered executions in a single statement once `batch_size` executions are
+    pending or `flush_interval` seconds have passed, so the streaming thread neither waits
+    for a commit nor serializes node inputs and outputs.
+
+    `flush` writes everything that is still buffered synchronously. Callers must flush before
+    reporting a workflow run as finished, which makes the final state of the run durable.
+    Reads that have to see the database (such as `get_running_executions`) flush first.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker | Engine,
+        user: Union[Account, EndUser],
+        app_id: Optional[str],
+        triggered_from: Optional[WorkflowNodeExecutionTriggeredFrom],
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        """
+        Initialize the repository.
+
+        Args:
+            session_factory: SQLAlchemy sessionmaker or engine for creating sessions
+            user: Account or EndUser object containing tenant_id, user ID, and role information
+            app_id: App ID for filtering by application (can be None)
+            triggered_from: Source of the execution trigger (SINGLE_STEP or WORKFLOW_RUN)
+            batch_size: Number of pending executions that triggers a background flush
+            flush_interval: Maximum time in seconds a pending execution waits before being flushed
+        """
+        super().__init__(
+            session_factory=session_factory,
+            user=user,
+            app_id=app_id,
+            triggered_from=triggered_from,
+        )
+        self._batch_size = batch_size or dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_BATCH_SIZE
+        self._flush_interval = flush_interval or dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_FLUSH_INTERVAL
+
+        # Guards the buffers below and wakes up the worker
+        self._condition = threading.Condition()
+        # Serializes writers so that a newer snapshot is never overwritten by an older one
+        self._write_lock = threading.Lock()
+
+        # Key: execution id, Value: latest snapshot not yet persisted
+        self._pending: dict[str, WorkflowNodeExecution] = {}
+        # Key: node_execution_id, Value: latest snapshot, persisted or not
+        self._executions: dict[str, WorkflowNodeExecution] = {}
+        self._worker: Optional[threading.Thread] = None
+
+    def save(self, execution: WorkflowNodeExecution) -> None:
+        """
+        Buffer a NodeExecution domain entity for persistence.
+
+        A shallow copy is buffered, so callers may keep mutating the passed entity.
+
+        Args:
+            execution: The NodeExecution domain entity to persist
+        """
+        snapshot = execution.model_copy()
+        with self._condition:
+            self._pending[snapshot.id] = snapshot
+            if snapshot.node_execution_id:
+                self._executions[snapshot.node_execution_id] = snapshot
+
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run_worker, daemon=True)
+                self._worker.start()
+            elif len(self._pending) >= self._batch_size:
+                self._condition.notify()
+
+    def get_by_node_execution_id(self, node_execution_id: str) -> Optional[WorkflowNodeExecution]:
+        """
+        Retrieve a NodeExecution by its node_execution_id.
+
+        Executions saved through this repository are served from memory, even if they are
+        still buffered. Otherwise the lookup falls back to the database.
+
+        Args:
+            node_execution_id: The node execution ID
+
+        Returns:
+            The NodeExecution instance if found, None otherwise
+        """
+        with self._condition:
+            snapshot = self._executions.get(node_execution_id)
+        if snapshot:
+            return snapshot.model_copy()
+        return super().get_by_node_execution_id(node_execution_id)
+
+    def get_db_models_by_workflow_run(
+        self,
+        workflow_run_id: str,
+        order_config: Optional[OrderConfig] = None,
+    ) -> Sequence[WorkflowNodeExecutionModel]:
+        self.flush()
+        return super().get_db_models_by_workflow_run(workflow_run_id, order_config)
+
+    def get_running_executions(self, workflow_run_id: str) -> Sequence[WorkflowNodeExecution]:
+        self.flush()
+        return super().get_running_executions(workflow_run_id)
+
+    def flush(self) -> None:
+        """
+        Persist all buffered executions before returning.
+
+        Raises:
+            Exception: If the buffered executions could not be written. They stay buffered
+                and are retried on the next flush.
+        """
+        self._flush_pending()
+
+    def clear(self) -> None:
+        """
+        Drop all buffered executions, then clear the persisted records.
+        """
+        with self._write_lock:
+            with self._condition:
+                self._pending.clear()
+                self._executions.clear()
+            super().clear()
+
+    def _run_worker(self) -> None:
+        """
+        Flush buffered executions until the repository has been idle for a whole interval.
+
+        The worker exits when idle so that finished runs do not keep threads alive; the next
+        save starts a new one.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._pending) >= self._batch_size, timeout=self._flush_interval)
+                if not self._pending:
+                    self._worker = None
+                    return
+
+            try:
+                self._flush_pending()
+            except Exception:
+                logger.exception("Failed to flush buffered workflow node executions, will retry")
+
+    def _flush_pending(self) -> None:
+        with self._write_lock:
+            with self._condition:
+                batch = self._pending
+                self._pending = {}
+
+            if not batch:
+                return
+
+            try:
+                self._bulk_upsert(list(batch.values()))
+            except Exception:
+                # Re-queue the batch unless a newer snapshot was saved in the meantime
+                with self._condition:
+                    self._pending = {**batch, **self._pending}
+                raise
+
+    def _bulk_upsert(self, executions: Sequence[WorkflowNodeExecution]) -> None:
+        columns = WorkflowNodeExecutionModel.__table__.columns
+        rows: list[dict[str, Any]] = []
+        for execution in executions:
+            db_model = self.to_db_model(execution)
+            rows.append({column.key: getattr(db_model, column.key) for column in columns})
+
+        # A single upsert keyed on the primary key replaces one merge and commit per save
+        stmt = insert(WorkflowNodeExecutionModel).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WorkflowNodeExecutionModel.id],
+            set_={column.key: stmt.excluded[column.key] for column in columns if column.key != "id"},
+        )
+
+        with self._session_factory() as session:
+            session.execute(stmt)
+            session.commit()
+
+        logger.debug(f"Flushed {len(rows)} workflow node executions")
@@ -240,6 +240,17 @@ class ToolFileManager:
 
         return stream, tool_file
 
+    @staticmethod
+    def get_file_range_generator(tool_file: ToolFile, start: int, stop: int) -> Generator:
+        """
+        get the bytes of a file from start up to stop as a stream
+
+        :param tool_file: the tool file
+        :param start: the first byte
+        :param stop: the byte after the last one
+        """
+        return storage.load_range(tool_file.file_key, start, stop)
+
 
 # init tool_file_parser
 from core.file.tool_file_parser import set_tool_file_manager_factory
@@ -1,8 +1,9 @@
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
 from core.model_runtime.entities.llm_entities import LLMUsage
+from core.variables import Variable
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.graph_engine.entities.runtime_route_state import RuntimeRouteState
 
@@ -25,3 +26,7 @@ class GraphRuntimeState(BaseModel):
 
     node_run_state: RuntimeRouteState = RuntimeRouteState()
     """node run state"""
+
+    conversation_variable_updates: Optional[dict[str, Variable]] = None
+    """conversation variables assigned during the run by variable id, shared by graph engine copies,
+    None if they are stored by the assigner nodes right away"""
@@ -14,6 +14,7 @@ from flask import Flask, current_app, has_request_context
 from configs import dify_config
 from core.app.apps.base_app_queue_manager import GenerateTaskStoppedError
 from core.app.entities.app_invoke_entities import InvokeFrom
+from core.variables import Variable
 from core.workflow.entities.node_entities import AgentNodeStrategyInit, NodeRunResult
 from core.workflow.entities.variable_pool import VariablePool, VariableValue
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionMetadataKey, WorkflowNodeExecutionStatus
@@ -105,6 +106,7 @@ class GraphEngine:
         max_execution_steps: int,
         max_execution_time: int,
         thread_pool_id: Optional[str] = None,
+        conversation_variable_updates: Optional[dict[str, Variable]] = None,
     ) -> None:
         thread_pool_max_submit_count = dify_config.MAX_SUBMIT_COUNT
         thread_pool_max_workers = 10
@@ -139,6 +141,8 @@ class GraphEngine:
         )
 
         self.graph_runtime_state = GraphRuntimeState(variable_pool=variable_pool, start_at=time.perf_counter())
+        # Assigned directly, validation would copy the mapping shared with the caller.
+        self.graph_runtime_state.conversation_variable_updates = conversation_variable_updates
 
         self.max_execution_steps = max_execution_steps
         self.max_execution_time = max_execution_time
@@ -9,6 +9,7 @@ from core.helper.code_executor.python3.python3_code_provider import Python3CodeP
 from core.variables.segments import ArrayFileSegment
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
+from core.workflow.enums import SystemVariableKey
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.code.entities import CodeNodeData
 from core.workflow.nodes.enums import NodeType
@@ -56,10 +57,15 @@ class CodeNode(BaseNode[CodeNodeData]):
                 variables[variable_name] = variable.to_object() if variable else None
         # Run code
         try:
+            workflow_run_id = self.graph_runtime_state.variable_pool.get(
+                ["sys", SystemVariableKey.WORKFLOW_EXECUTION_ID.value]
+            )
             result = CodeExecutor.execute_workflow_code_template(
                 language=code_language,
                 code=code,
                 inputs=variables,
+                tenant_id=self.tenant_id,
+                workflow_run_id=workflow_run_id.text if workflow_run_id else None,
             )
 
             # Transform result
@@ -136,6 +136,7 @@ class IterationNode(BaseNode[IterationNodeData]):
             max_execution_steps=dify_config.WORKFLOW_MAX_EXECUTION_STEPS,
             max_execution_time=dify_config.WORKFLOW_MAX_EXECUTION_TIME,
             thread_pool_id=self.thread_pool_id,
+            conversation_variable_updates=self.graph_runtime_state.conversation_variable_updates,
         )
 
         start_at = datetime.now(UTC).replace(tzinfo=None)
@@ -114,6 +114,7 @@ class LoopNode(BaseNode[LoopNodeData]):
             max_execution_steps=dify_config.WORKFLOW_MAX_EXECUTION_STEPS,
             max_execution_time=dify_config.WORKFLOW_MAX_EXECUTION_TIME,
             thread_pool_id=self.thread_pool_id,
+            conversation_variable_updates=self.graph_runtime_state.conversation_variable_updates,
         )
 
         start_at = datetime.now(UTC).replace(tzinfo=None)
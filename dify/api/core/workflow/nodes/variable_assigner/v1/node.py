@@ -46,12 +46,16 @@ class VariableAssignerNode(BaseNode[VariableAssignerData]):
         # Over write the variable.
         self.graph_runtime_state.variable_pool.add(self.node_data.assigned_variable_selector, updated_variable)
 
-        # TODO: Move database operation to the pipeline.
-        # Update conversation variable.
-        conversation_id = self.graph_runtime_state.variable_pool.get(["sys", "conversation_id"])
-        if not conversation_id:
-            raise VariableOperatorNodeError("conversation_id not found")
-        common_helpers.update_conversation_variable(conversation_id=conversation_id.text, variable=updated_variable)
+        conversation_variable_updates = self.graph_runtime_state.conversation_variable_updates
+        if conversation_variable_updates is not None:
+            # Stored by the app runner once the run finishes.
+            conversation_variable_updates[updated_variable.id] = updated_variable
+        else:
+            # Update conversation variable.
+            conversation_id = self.graph_runtime_state.variable_pool.get(["sys", "conversation_id"])
+            if not conversation_id:
+                raise VariableOperatorNodeError("conversation_id not found")
+            common_helpers.update_conversation_variable(conversation_id=conversation_id.text, variable=updated_variable)
 
         return NodeRunResult(
             status=WorkflowNodeExecutionStatus.SUCCEEDED,
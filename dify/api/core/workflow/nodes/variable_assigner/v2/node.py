@@ -122,6 +122,11 @@ class VariableAssignerNode(BaseNode[VariableAssignerNodeData]):
             process_data[variable.name] = variable.value
 
             if variable.selector[0] == CONVERSATION_VARIABLE_NODE_ID:
+                conversation_variable_updates = self.graph_runtime_state.conversation_variable_updates
+                if conversation_variable_updates is not None:
+                    # Stored by the app runner once the run finishes.
+                    conversation_variable_updates[variable.id] = variable
+                    continue
                 conversation_id = self.graph_runtime_state.variable_pool.get(["sys", "conversation_id"])
                 if not conversation_id:
                     if self.invoke_from != InvokeFrom.DEBUGGER:
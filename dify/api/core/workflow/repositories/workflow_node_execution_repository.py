@@ -82,6 +82,16 @@ class WorkflowNodeExecutionRepository(Protocol):
         """
         ...
 
+    def flush(self) -> None:
+        """
+        Make every previously saved NodeExecution durable.
+
+        Implementations that persist synchronously in `save` can treat this as a no-op.
+        Implementations that buffer writes must block until all buffered executions
+        have been persisted, and raise if that is not possible.
+        """
+        ...
+
     def clear(self) -> None:
         """
         Clear all NodeExecution records based on implementation-specific criteria.
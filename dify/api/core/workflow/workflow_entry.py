@@ -8,6 +8,7 @@ from configs import dify_config
 from core.app.apps.base_app_queue_manager import GenerateTaskStoppedError
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.file.models import File
+from core.variables import Variable
 from core.workflow.callbacks import WorkflowCallback
 from core.workflow.constants import ENVIRONMENT_VARIABLE_NODE_ID
 from core.workflow.entities.variable_pool import VariablePool
@@ -46,6 +47,7 @@ class WorkflowEntry:
         call_depth: int,
         variable_pool: VariablePool,
         thread_pool_id: Optional[str] = None,
+        conversation_variable_updates: Optional[dict[str, Variable]] = None,
     ) -> None:
         """
         Init workflow entry
@@ -61,6 +63,7 @@ class WorkflowEntry:
         :param call_depth: call depth
         :param variable_pool: variable pool
         :param thread_pool_id: thread pool id
+        :param conversation_variable_updates: collects the assigned conversation variables, if set
         """
         # check call depth
         workflow_call_max_depth = dify_config.WORKFLOW_CALL_MAX_DEPTH
@@ -83,6 +86,7 @@ class WorkflowEntry:
             max_execution_steps=dify_config.WORKFLOW_MAX_EXECUTION_STEPS,
             max_execution_time=dify_config.WORKFLOW_MAX_EXECUTION_TIME,
             thread_pool_id=thread_pool_id,
+            conversation_variable_updates=conversation_variable_updates,
         )
 
     def run(
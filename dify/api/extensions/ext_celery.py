@@ -71,6 +71,7 @@ def init_app(app: DifyApp) -> Celery:
         "schedule.clean_messages",
         "schedule.mail_clean_document_notify_task",
         "schedule.queue_monitor_task",
+        "schedule.flush_retrieval_statistics_task",
     ]
     day = dify_config.CELERY_BEAT_SCHEDULER_TIME
     beat_schedule = {
@@ -106,6 +107,11 @@ def init_app(app: DifyApp) -> Celery:
             ),
         },
     }
+    if dify_config.RETRIEVAL_STATISTICS_ASYNC_ENABLED:
+        beat_schedule["flush_retrieval_statistics_task"] = {
+            "task": "schedule.flush_retrieval_statistics_task.flush_retrieval_statistics_task",
+            "schedule": timedelta(seconds=dify_config.RETRIEVAL_STATISTICS_FLUSH_INTERVAL),
+        }
     celery_app.conf.update(beat_schedule=beat_schedule, imports=imports)
 
     return celery_app
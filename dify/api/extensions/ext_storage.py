@@ -17,6 +17,17 @@ class Storage:
         storage_factory = self.get_storage_factory(dify_config.STORAGE_TYPE)
         with app.app_context():
             self.storage_runner = storage_factory()
+            if dify_config.STORAGE_READ_CACHE_MAX_SIZE > 0:
+                from extensions.storage.cached_storage import CachedStorage
+
+                self.storage_runner = CachedStorage(
+                    self.storage_runner,
+                    path=dify_config.STORAGE_READ_CACHE_PATH,
+                    max_size=dify_config.STORAGE_READ_CACHE_MAX_SIZE,
+                    # Upload and tool files are never rewritten, other files like keyword tables and
+                    # private keys are updated in place by other processes.
+                    prefixes=("upload_files/", "tools/"),
+                )
 
     @staticmethod
     def get_storage_factory(storage_type: str) -> Callable[[], BaseStorage]:
@@ -93,6 +104,9 @@ class Storage:
     def load_stream(self, filename: str) -> Generator:
         return self.storage_runner.load_stream(filename)
 
+    def load_range(self, filename: str, start: int, stop: int) -> Generator:
+        return self.storage_runner.load_range(filename, start, stop)
+
     def download(self, filename, target_filepath):
         self.storage_runner.download(filename, target_filepath)
 
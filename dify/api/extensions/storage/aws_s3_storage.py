@@ -73,6 +73,18 @@ class AwsS3Storage(BaseStorage):
             else:
                 raise
 
+    def load_range(self, filename: str, start: int, stop: int) -> Generator:
+        try:
+            response = self.client.get_object(Bucket=self.bucket_name, Key=filename, Range=f"bytes={start}-{stop - 1}")
+            yield from response["Body"].iter_chunks()
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] == "NoSuchKey":
+                raise FileNotFoundError("file not found")
+            elif "reached max retries" in str(ex):
+                raise ValueError("please do not request the same file too frequently")
+            else:
+                raise
+
     def download(self, filename, target_filepath):
         self.client.download_file(self.bucket_name, filename, target_filepath)
 
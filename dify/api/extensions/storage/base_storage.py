@@ -19,6 +19,20 @@ class BaseStorage(ABC):
     def load_stream(self, filename: str) -> Generator:
         raise NotImplementedError
 
+    def load_range(self, filename: str, start: int, stop: int) -> Generator:
+        """
+        Load the bytes of a file from start up to stop as a stream.
+        Backends able to read a range of a file override this, the default skips the bytes before start.
+        """
+        position = 0
+        for chunk in self.load_stream(filename):
+            chunk_stop = position + len(chunk)
+            if chunk_stop > start:
+                yield chunk[max(start - position, 0) : stop - position]
+            position = chunk_stop
+            if position >= stop:
+                break
+
     @abstractmethod
     def download(self, filename, target_filepath):
         raise NotImplementedError
@@ -0,0 +1,231 @@
+"""Local disk cache of the files read from a file storage."""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Generator
+from pathlib import Path
+from typing import Optional
+
+from extensions.storage.base_storage import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class CachedStorage(BaseStorage):
+    """
+    Storage reading files through a size-bounded local disk cache in front of another storage.
+
+    Only files under the given prefixes are cached, they must not change once saved, as upload and tool files:
+    saving or deleting a file through this storage drops its entry, but changes made by other processes are not
+    seen. Other files, such as keyword tables and private keys, are always read from the storage.
+
+    Contents are cached under their sha256, so the same content saved under several filenames is cached once,
+    with an entry per filename pointing to it. The least recently read contents are evicted when the cache
+    outgrows its maximum size.
+    """
+
+    def __init__(self, storage: BaseStorage, path: str, max_size: int, prefixes: tuple[str, ...]):
+        self.storage = storage
+        self.max_size = max_size
+        self.prefixes = prefixes
+        self._objects_path = Path(path) / "objects"
+        self._keys_path = Path(path) / "keys"
+        self._objects_path.mkdir(parents=True, exist_ok=True)
+        self._keys_path.mkdir(parents=True, exist_ok=True)
+        self._size_lock = threading.Lock()
+        self._size = sum(
+            entry.stat().st_size for entry in os.scandir(self._objects_path) if not entry.name.startswith(".")
+        )
+
+    def save(self, filename, data):
+        self.storage.save(filename, data)
+        self._drop(filename)
+
+    def load_once(self, filename: str) -> bytes:
+        if not filename.startswith(self.prefixes):
+            return self.storage.load_once(filename)
+
+        object_path = self._get_object_path(filename)
+        if object_path:
+            try:
+                return object_path.read_bytes()
+            except FileNotFoundError:
+                # evicted in the meantime
+                pass
+
+        data = self.storage.load_once(filename)
+        self._put(filename, data)
+        return data
+
+    def load_stream(self, filename: str) -> Generator:
+        if not filename.startswith(self.prefixes):
+            yield from self.storage.load_stream(filename)
+            return
+
+        object_path = self._get_object_path(filename)
+        if object_path:
+            try:
+                file = object_path.open("rb")
+            except FileNotFoundError:
+                pass
+            else:
+                with file:
+                    while chunk := file.read(STREAM_CHUNK_SIZE):
+                        yield chunk
+                return
+
+        # cache the content while it is streamed, unless it is too large for the cache
+        digest = hashlib.sha256()
+        size = 0
+        cached = False
+        temp_fd, temp_path = tempfile.mkstemp(dir=self._objects_path, prefix=".")
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                for chunk in self.storage.load_stream(filename):
+                    size += len(chunk)
+                    if size <= self.max_size:
+                        digest.update(chunk)
+                        temp_file.write(chunk)
+                    yield chunk
+            if size <= self.max_size:
+                self._add_object(filename, digest.hexdigest(), temp_path, size)
+                cached = True
+        finally:
+            if not cached:
+                os.unlink(temp_path)
+
+    def load_range(self, filename: str, start: int, stop: int) -> Generator:
+        if not filename.startswith(self.prefixes):
+            yield from self.storage.load_range(filename, start, stop)
+            return
+
+        object_path = self._get_object_path(filename)
+        if object_path:
+            try:
+                file = object_path.open("rb")
+            except FileNotFoundError:
+                pass
+            else:
+                with file:
+                    file.seek(start)
+                    remaining = stop - start
+                    while remaining > 0 and (chunk := file.read(min(STREAM_CHUNK_SIZE, remaining))):
+                        remaining -= len(chunk)
+                        yield chunk
+                return
+
+        yield from self.storage.load_range(filename, start, stop)
+
+    def download(self, filename, target_filepath):
+        if not filename.startswith(self.prefixes):
+            self.storage.download(filename, target_filepath)
+            return
+
+        object_path = self._get_object_path(filename)
+        if object_path:
+            try:
+                shutil.copyfile(object_path, target_filepath)
+                return
+            except FileNotFoundError:
+                pass
+
+        self.storage.download(filename, target_filepath)
+        size = os.path.getsize(target_filepath)
+        if size <= self.max_size:
+            with open(target_filepath, "rb") as file:
+                digest = hashlib.file_digest(file, "sha256").hexdigest()
+            temp_fd, temp_path = tempfile.mkstemp(dir=self._objects_path, prefix=".")
+            os.close(temp_fd)
+            shutil.copyfile(target_filepath, temp_path)
+            self._add_object(filename, digest, temp_path, size)
+
+    def exists(self, filename):
+        return self.storage.exists(filename)
+
+    def delete(self, filename):
+        self._drop(filename)
+        return self.storage.delete(filename)
+
+    def scan(self, path, files=True, directories=False) -> list[str]:
+        return self.storage.scan(path, files=files, directories=directories)
+
+    def _get_key_path(self, filename: str) -> Path:
+        return self._keys_path / hashlib.sha256(filename.encode()).hexdigest()
+
+    def _get_object_path(self, filename: str) -> Optional[Path]:
+        """
+        Get the path of the cached content of a file, marking it as recently read
+        """
+        key_path = self._get_key_path(filename)
+        try:
+            object_path = self._objects_path / key_path.read_text()
+            os.utime(object_path)
+        except FileNotFoundError:
+            # not cached, or the content was evicted
+            key_path.unlink(missing_ok=True)
+            return None
+        return object_path
+
+    def _put(self, filename: str, data: bytes) -> None:
+        if len(data) > self.max_size:
+            return
+
+        with tempfile.NamedTemporaryFile(dir=self._objects_path, prefix=".", delete=False) as temp_file:
+            temp_file.write(data)
+        self._add_object(filename, hashlib.sha256(data).hexdigest(), temp_file.name, len(data))
+
+    def _add_object(self, filename: str, digest: str, temp_path: str, size: int) -> None:
+        """
+        Add the content written to a temporary file to the cache and point the entry of the file to it
+        """
+        object_path = self._objects_path / digest
+        if object_path.exists():
+            os.unlink(temp_path)
+            os.utime(object_path)
+        else:
+            os.replace(temp_path, object_path)
+            with self._size_lock:
+                self._size += size
+
+        with tempfile.NamedTemporaryFile("w", dir=self._keys_path, prefix=".", delete=False) as temp_file:
+            temp_file.write(digest)
+        os.replace(temp_file.name, self._get_key_path(filename))
+
+        if self._size > self.max_size:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently read contents until the cache is back under 90% of its maximum size.
+        Entries pointing to removed contents are dropped when they are read next.
+        """
+        with self._size_lock:
+            entries = []
+            for entry in os.scandir(self._objects_path):
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+                except FileNotFoundError:
+                    continue
+            # other processes share the cache, recount its size
+            self._size = sum(size for _, size, _ in entries)
+
+            for _, size, path in sorted(entries):
+                if self._size <= self.max_size * 0.9:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                self._size -= size
+            logger.debug(f"storage read cache evicted to {self._size} bytes")
+
+    def _drop(self, filename: str) -> None:
+        self._get_key_path(filename).unlink(missing_ok=True)
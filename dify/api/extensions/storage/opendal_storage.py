@@ -10,6 +10,8 @@ from extensions.storage.base_storage import BaseStorage
 
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 def _get_opendal_kwargs(*, scheme: str, env_file_path: str = ".env", prefix: str = "OPENDAL_"):
     kwargs = {}
@@ -45,29 +47,46 @@ class OpenDALStorage(BaseStorage):
         logger.debug(f"file {filename} saved")
 
     def load_once(self, filename: str) -> bytes:
-        if not self.exists(filename):
+        try:
+            content: bytes = self.op.read(path=filename)
+        except opendal.exceptions.NotFound:
             raise FileNotFoundError("File not found")
-
-        content: bytes = self.op.read(path=filename)
         logger.debug(f"file {filename} loaded")
         return content
 
     def load_stream(self, filename: str) -> Generator:
-        if not self.exists(filename):
+        try:
+            file = self.op.open(path=filename, mode="rb")
+        except opendal.exceptions.NotFound:
             raise FileNotFoundError("File not found")
 
-        batch_size = 4096
-        file = self.op.open(path=filename, mode="rb")
-        while chunk := file.read(batch_size):
-            yield chunk
+        with file:
+            while chunk := file.read(STREAM_CHUNK_SIZE):
+                yield chunk
         logger.debug(f"file {filename} loaded as stream")
 
+    def load_range(self, filename: str, start: int, stop: int) -> Generator:
+        try:
+            file = self.op.open(path=filename, mode="rb")
+        except opendal.exceptions.NotFound:
+            raise FileNotFoundError("File not found")
+
+        with file:
+            file.seek(start)
+            remaining = stop - start
+            while remaining > 0 and (chunk := file.read(min(STREAM_CHUNK_SIZE, remaining))):
+                remaining -= len(chunk)
+                yield chunk
+        logger.debug(f"bytes {start}-{stop} of file {filename} loaded as stream")
+
     def download(self, filename: str, target_filepath: str):
-        if not self.exists(filename):
+        try:
+            content = self.op.read(path=filename)
+        except opendal.exceptions.NotFound:
             raise FileNotFoundError("File not found")
 
         with Path(target_filepath).open("wb") as f:
-            f.write(self.op.read(path=filename))
+            f.write(content)
         logger.debug(f"file {filename} downloaded to {target_filepath}")
 
     def exists(self, filename: str) -> bool:
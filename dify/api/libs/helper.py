@@ -283,30 +283,83 @@ class TokenManager:
         return f"{token_type}:account:{account_id}"
 
 
+# Counts the attempts of the buckets inside the window and optionally records a new attempt,
+# in a single round trip. Buckets that fell out of the window are deleted on the way.
+# KEYS[1]: hash of attempt counts keyed by bucket index
+# ARGV: current bucket, buckets per window, max attempts, key ttl, whether to record an attempt
+_RATE_LIMITER_SCRIPT = """
+local current_bucket = tonumber(ARGV[1])
+local oldest_bucket = current_bucket - tonumber(ARGV[2])
+local attempts = 0
+local buckets = redis.call('HGETALL', KEYS[1])
+for i = 1, #buckets, 2 do
+    if tonumber(buckets[i]) < oldest_bucket then
+        redis.call('HDEL', KEYS[1], buckets[i])
+    else
+        attempts = attempts + tonumber(buckets[i + 1])
+    end
+end
+if attempts >= tonumber(ARGV[3]) then
+    return 1
+end
+if ARGV[5] == '1' then
+    redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+end
+return 0
+"""
+
+
 class RateLimiter:
+    """
+    Sliding window rate limiter backed by a fixed number of per-bucket counters.
+
+    The window is split into `BUCKETS_PER_WINDOW` buckets, so a key never holds more than
+    `BUCKETS_PER_WINDOW + 1` counters no matter how many attempts it records. Attempts expire
+    bucket by bucket, which makes the window up to one bucket longer than `time_window`.
+    """
+
+    BUCKETS_PER_WINDOW = 60
+
     def __init__(self, prefix: str, max_attempts: int, time_window: int):
         self.prefix = prefix
         self.max_attempts = max_attempts
         self.time_window = time_window
+        self.bucket_size = max(1, -(-time_window // self.BUCKETS_PER_WINDOW))
 
     def _get_key(self, email: str) -> str:
-        return f"{self.prefix}:{email}"
+        return f"{self.prefix}:buckets:{email}"
+
+    def _run_script(self, email: str, record_attempt: bool) -> bool:
+        current_bucket = int(time.time()) // self.bucket_size
+        rate_limited = redis_client.register_script(_RATE_LIMITER_SCRIPT)(
+            keys=[self._get_key(email)],
+            args=[
+                current_bucket,
+                -(-self.time_window // self.bucket_size),
+                self.max_attempts,
+                self.time_window * 2,
+                1 if record_attempt else 0,
+            ],
+        )
+        return bool(rate_limited)
 
     def is_rate_limited(self, email: str) -> bool:
-        key = self._get_key(email)
-        current_time = int(time.time())
-        window_start_time = current_time - self.time_window
-
-        redis_client.zremrangebyscore(key, "-inf", window_start_time)
-        attempts = redis_client.zcard(key)
-
-        if attempts and int(attempts) >= self.max_attempts:
-            return True
-        return False
+        return self._run_script(email, record_attempt=False)
 
     def increment_rate_limit(self, email: str):
         key = self._get_key(email)
-        current_time = int(time.time())
+        current_bucket = int(time.time()) // self.bucket_size
+
+        pipeline = redis_client.pipeline()
+        pipeline.hincrby(key, str(current_bucket), 1)
+        pipeline.expire(key, self.time_window * 2)
+        pipeline.execute()
+
+    def check_and_increment_rate_limit(self, email: str) -> bool:
+        """
+        Record an attempt unless the limit has been reached, atomically.
 
-        redis_client.zadd(key, {current_time: current_time})
-        redis_client.expire(key, self.time_window * 2)
+        :return: True if the attempt was rejected because of the rate limit
+        """
+        return self._run_script(email, record_attempt=True)
@@ -1,5 +1,7 @@
 import hashlib
+import threading
 
+from cachetools import TTLCache
 from Crypto.Cipher import AES
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
@@ -8,6 +10,15 @@ from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from libs import gmpy2_pkcs10aep_cipher
 
+# Parsed private keys and ciphers by tenant id. Parsing a key and building its cipher costs more than
+# a decryption, so they are kept in process. A key replaced by another process is replaced here
+# by the first decryption it fails.
+_decrypt_decodings: TTLCache = TTLCache(maxsize=1024, ttl=600)
+# Decrypted texts by private key modulus and ciphertext hash, so the same secret is not decrypted
+# over and over within a request or across requests in quick succession.
+_decrypted_texts: TTLCache = TTLCache(maxsize=4096, ttl=60)
+_cache_lock = threading.Lock()
+
 
 def generate_key_pair(tenant_id):
     private_key = RSA.generate(2048)
@@ -19,6 +30,7 @@ def generate_key_pair(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
     storage.save(filepath, pem_private)
+    invalidate_decrypt_decoding(tenant_id)
 
     return pem_public.decode()
 
@@ -45,10 +57,25 @@ def encrypt(text, public_key):
     return prefix_hybrid + encrypted_data
 
 
-def get_decrypt_decoding(tenant_id):
+def _get_private_key_cache_key(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
+    return filepath, "tenant_privkey:{hash}".format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+
+
+def get_decrypt_decoding(tenant_id):
+    with _cache_lock:
+        decoding = _decrypt_decodings.get(tenant_id)
+    if decoding:
+        return decoding
+
+    rsa_key, cipher_rsa = _load_decrypt_decoding(tenant_id)
+    with _cache_lock:
+        _decrypt_decodings[tenant_id] = (rsa_key, cipher_rsa)
+    return rsa_key, cipher_rsa
 
-    cache_key = "tenant_privkey:{hash}".format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+
+def _load_decrypt_decoding(tenant_id):
+    filepath, cache_key = _get_private_key_cache_key(tenant_id)
     private_key = redis_client.get(cache_key)
     if not private_key:
         try:
@@ -60,11 +87,33 @@ def get_decrypt_decoding(tenant_id):
 
     rsa_key = RSA.import_key(private_key)
     cipher_rsa = gmpy2_pkcs10aep_cipher.new(rsa_key)
-
     return rsa_key, cipher_rsa
 
 
+def invalidate_decrypt_decoding(tenant_id):
+    """
+    Forget the private key of a tenant and everything decrypted in this process,
+    so the next decryption loads the current key from storage.
+    """
+    _, cache_key = _get_private_key_cache_key(tenant_id)
+    redis_client.delete(cache_key)
+    with _cache_lock:
+        _decrypt_decodings.pop(tenant_id, None)
+        _decrypted_texts.clear()
+
+
 def decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa):
+    cache_key = (int(rsa_key.n), hashlib.sha256(encrypted_text).digest())
+    with _cache_lock:
+        decrypted_text = _decrypted_texts.get(cache_key)
+    if decrypted_text is None:
+        decrypted_text = _decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+        with _cache_lock:
+            _decrypted_texts[cache_key] = decrypted_text
+    return decrypted_text
+
+
+def _decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa):
     if encrypted_text.startswith(prefix_hybrid):
         encrypted_text = encrypted_text[len(prefix_hybrid) :]
 
@@ -86,7 +135,17 @@ def decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa):
 def decrypt(encrypted_text, tenant_id):
     rsa_key, cipher_rsa = get_decrypt_decoding(tenant_id)
 
-    return decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+    try:
+        return decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+    except ValueError:
+        # the key pair may have been reset by another process, retry once with the current key
+        current_rsa_key, current_cipher_rsa = _load_decrypt_decoding(tenant_id)
+        if current_rsa_key.n == rsa_key.n:
+            # the key is current, the text itself does not decrypt
+            raise
+        with _cache_lock:
+            _decrypt_decodings[tenant_id] = (current_rsa_key, current_cipher_rsa)
+        return decrypt_token_with_decoding(encrypted_text, current_rsa_key, current_cipher_rsa)
 
 
 class PrivkeyNotFoundError(Exception):
@@ -306,6 +306,7 @@ class Document(Base):
         db.Index("document_is_paused_idx", "is_paused"),
         db.Index("document_tenant_idx", "tenant_id"),
         db.Index("document_metadata_idx", "doc_metadata", postgresql_using="gin"),
+        db.Index("document_dataset_hit_count_idx", "dataset_id", "total_hit_count"),
     )
 
     # initial fields
@@ -366,6 +367,11 @@ class Document(Base):
     doc_form = db.Column(db.String(255), nullable=False, server_default=db.text("'text_model'::character varying"))
     doc_language = db.Column(db.String(255), nullable=True)
 
+    # segment statistics, maintained by DocumentSegmentStatisticsService
+    completed_segments = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    total_segments = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    total_hit_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+
     DATA_SOURCES = ["upload_file", "notion_import", "website_crawl"]
 
     @property
@@ -446,12 +452,7 @@ class Document(Base):
 
     @property
     def hit_count(self):
-        return (
-            db.session.query(DocumentSegment)
-            .with_entities(func.coalesce(func.sum(DocumentSegment.hit_count)))
-            .filter(DocumentSegment.document_id == self.id)
-            .scalar()
-        )
+        return self.total_hit_count
 
     @property
     def uploader(self):
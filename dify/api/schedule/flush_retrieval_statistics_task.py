@@ -0,0 +1,15 @@
+import logging
+
+import app
+from core.rag.retrieval.retrieval_statistics import RetrievalStatistics
+
+
+@app.celery.task(queue="dataset")
+def flush_retrieval_statistics_task():
+    """
+    Persist segment hit counts and dataset queries aggregated in Redis during retrieval.
+    """
+    try:
+        RetrievalStatistics.flush()
+    except Exception:
+        logging.exception("Failed to flush retrieval statistics")
@@ -45,12 +45,11 @@ class AppGenerateService:
             # check if it's free plan
             limit_info = BillingService.get_info(app_model.tenant_id)
             if limit_info["subscription"]["plan"] == "sandbox":
-                if cls.system_rate_limiter.is_rate_limited(app_model.tenant_id):
+                if cls.system_rate_limiter.check_and_increment_rate_limit(app_model.tenant_id):
                     raise InvokeRateLimitError(
                         "Rate limit exceeded, please upgrade your plan "
                         f"or your RPD was {dify_config.APP_DAILY_RATE_LIMIT} requests/day"
                     )
-                cls.system_rate_limiter.increment_rate_limit(app_model.tenant_id)
 
         # app level rate limiter
         max_active_request = AppGenerateService._get_max_active_requests(app_model)
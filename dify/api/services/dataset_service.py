@@ -1,3 +1,4 @@
+import concurrent.futures
 import copy
 import datetime
 import json
@@ -5,11 +6,13 @@ import logging
 import secrets
 import time
 import uuid
-from collections import Counter
+from collections import Counter, deque
+from collections.abc import Mapping, Sequence
 from typing import Any, Optional
 
+from flask import Flask, current_app
 from flask_login import current_user
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.orm import Session
 from werkzeug.exceptions import NotFound
 
@@ -20,6 +23,7 @@ from core.model_runtime.entities.model_entities import ModelType
 from core.plugin.entities.plugin import ModelProviderID
 from core.rag.index_processor.constant.built_in_field import BuiltInField
 from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from events.dataset_event import dataset_was_deleted
 from events.document_event import document_was_deleted
@@ -43,6 +47,7 @@ from models.dataset import (
 )
 from models.model import UploadFile
 from models.source import DataSourceOauthBinding
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 from services.entities.knowledge_entities.knowledge_entities import (
     ChildChunkUpdateArgs,
     KnowledgeConfig,
@@ -898,7 +903,7 @@ class DocumentService:
         created_from: str = "web",
     ):
         # check document limit
-        features = FeatureService.get_features(current_user.current_tenant_id)
+        features = FeatureService.get_features(current_user.current_tenant_id, refresh=True)
 
         if features.billing.enabled:
             if not knowledge_config.original_document_id:
@@ -1359,6 +1364,7 @@ class DocumentService:
         # update document segment
         update_params = {DocumentSegment.status: "re_segment"}
         db.session.query(DocumentSegment).filter_by(document_id=document.id).update(update_params)
+        DocumentSegmentStatisticsService.refresh([document.id])
         db.session.commit()
         # trigger async task
         document_indexing_update_task.delay(document.dataset_id, document.id)
@@ -1366,7 +1372,7 @@ class DocumentService:
 
     @staticmethod
     def save_document_without_dataset_id(tenant_id: str, knowledge_config: KnowledgeConfig, account: Account):
-        features = FeatureService.get_features(current_user.current_tenant_id)
+        features = FeatureService.get_features(current_user.current_tenant_id, refresh=True)
 
         if features.billing.enabled:
             count = 0
@@ -1605,6 +1611,9 @@ class DocumentService:
 
 
 class SegmentService:
+    # batches of bulk created segments indexed at the same time
+    _INDEX_BATCHES_IN_FLIGHT = 2
+
     @classmethod
     def segment_create_args_validate(cls, args: dict, document: Document):
         if document.doc_form == "qa_model":
@@ -1661,6 +1670,7 @@ class SegmentService:
             # update document word count
             document.word_count += segment_document.word_count
             db.session.add(document)
+            DocumentSegmentStatisticsService.refresh([document.id])
             db.session.commit()
 
             # save vector index
@@ -1678,85 +1688,217 @@ class SegmentService:
 
     @classmethod
     def multi_create_segment(cls, segments: list, document: Document, dataset: Dataset):
-        lock_name = "multi_add_segment_lock_document_id_{}".format(document.id)
+        return cls.bulk_create_segments(
+            segments, document, dataset, tenant_id=current_user.current_tenant_id, user_id=current_user.id
+        )
+
+    @classmethod
+    def bulk_create_segments(
+        cls,
+        segments: Sequence[Mapping[str, Any]],
+        document: Document,
+        dataset: Dataset,
+        tenant_id: str,
+        user_id: str,
+        batch_size: Optional[int] = None,
+        raise_on_index_error: bool = False,
+    ) -> list[DocumentSegment]:
+        """
+        Create segments with one INSERT per batch, then build their index batch by batch.
+
+        The segments are inserted as indexing and committed while the document's segment lock is held,
+        which reserves their positions, so the lock and the transaction are not held while embedding.
+        Two batches are indexed at a time in background threads, so one batch is embedded while the
+        vectors of the other are inserted.
+        Segments whose index could not be built are marked as error, or with `raise_on_index_error`
+        the remaining batches are skipped, the created segments are deleted and the error is raised.
+        """
+        batch_size = batch_size or dify_config.SEGMENT_BULK_INSERT_BATCH_SIZE
+        embedding_model = None
+        if dataset.indexing_technique == "high_quality":
+            model_manager = ModelManager()
+            embedding_model = model_manager.get_model_instance(
+                tenant_id=tenant_id,
+                provider=dataset.embedding_model_provider,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=dataset.embedding_model,
+            )
+
+        batches = []
         increment_word_count = 0
+        for offset in range(0, len(segments), batch_size):
+            batch = segments[offset : offset + batch_size]
+            if document.doc_form == "qa_model":
+                texts = [item["content"] + item["answer"] for item in batch]
+            else:
+                texts = [item["content"] for item in batch]
+            if embedding_model:
+                tokens_list = embedding_model.get_text_embedding_num_tokens(texts=texts)
+            else:
+                tokens_list = [0] * len(batch)
+            batches.append((batch, texts, tokens_list))
+            increment_word_count += sum(len(text) for text in texts)
+
+        created_batches: list[list[DocumentSegment]] = []
+        segment_ids: list[str] = []
+        index_node_ids: list[str] = []
+        lock_name = "add_segment_lock_document_id_{}".format(document.id)
         with redis_client.lock(lock_name, timeout=600):
-            embedding_model = None
-            if dataset.indexing_technique == "high_quality":
-                model_manager = ModelManager()
-                embedding_model = model_manager.get_model_instance(
-                    tenant_id=current_user.current_tenant_id,
-                    provider=dataset.embedding_model_provider,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                    model=dataset.embedding_model,
+            max_position = db.session.scalar(
+                select(func.max(DocumentSegment.position)).where(DocumentSegment.document_id == document.id)
+            )
+            position = (max_position or 0) + 1
+            now = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            for batch, texts, tokens_list in batches:
+                rows = []
+                for item, text, tokens in zip(batch, texts, tokens_list):
+                    rows.append(
+                        {
+                            "id": str(uuid.uuid4()),
+                            "tenant_id": tenant_id,
+                            "dataset_id": document.dataset_id,
+                            "document_id": document.id,
+                            "index_node_id": str(uuid.uuid4()),
+                            "index_node_hash": helper.generate_text_hash(item["content"]),
+                            "position": position,
+                            "content": item["content"],
+                            "answer": item["answer"] if document.doc_form == "qa_model" else None,
+                            "word_count": len(text),
+                            "tokens": tokens,
+                            "keywords": item.get("keywords", []),
+                            "status": "indexing",
+                            "indexing_at": now,
+                            "created_by": user_id,
+                        }
+                    )
+                    position += 1
+                segment_ids.extend(row["id"] for row in rows)
+                index_node_ids.extend(row["index_node_id"] for row in rows)
+                created_batches.append(
+                    list(
+                        db.session.scalars(
+                            insert(DocumentSegment).returning(DocumentSegment, sort_by_parameter_order=True), rows
+                        )
+                    )
                 )
-            max_position = (
-                db.session.query(func.max(DocumentSegment.position))
-                .filter(DocumentSegment.document_id == document.id)
-                .scalar()
+            db.session.execute(
+                update(Document)
+                .where(Document.id == document.id)
+                .values(word_count=Document.word_count + increment_word_count)
+                .execution_options(synchronize_session=False)
             )
-            pre_segment_data_list = []
-            segment_data_list = []
-            keywords_list = []
-            position = max_position + 1 if max_position else 1
-            for segment_item in segments:
-                content = segment_item["content"]
-                doc_id = str(uuid.uuid4())
-                segment_hash = helper.generate_text_hash(content)
-                tokens = 0
-                if dataset.indexing_technique == "high_quality" and embedding_model:
-                    # calc embedding use tokens
-                    if document.doc_form == "qa_model":
-                        tokens = embedding_model.get_text_embedding_num_tokens(
-                            texts=[content + segment_item["answer"]]
-                        )[0]
-                    else:
-                        tokens = embedding_model.get_text_embedding_num_tokens(texts=[content])[0]
+            DocumentSegmentStatisticsService.refresh([document.id])
+            db.session.commit()
 
-                segment_document = DocumentSegment(
-                    tenant_id=current_user.current_tenant_id,
-                    dataset_id=document.dataset_id,
-                    document_id=document.id,
-                    index_node_id=doc_id,
-                    index_node_hash=segment_hash,
-                    position=position,
-                    content=content,
-                    word_count=len(content),
-                    tokens=tokens,
-                    keywords=segment_item.get("keywords", []),
-                    status="completed",
-                    indexing_at=datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-                    completed_at=datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-                    created_by=current_user.id,
+        created_segments = [segment for batch_segments in created_batches for segment in batch_segments]
+        # child chunks are generated with the request session, so parent-child indexes are built inline
+        index_in_background = document.doc_form != IndexType.PARENT_CHILD_INDEX
+        flask_app = current_app._get_current_object()  # type: ignore
+        index_errors: list[Exception] = []
+        offset = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=cls._INDEX_BATCHES_IN_FLIGHT) as executor:
+            pending_index: deque[tuple[list[DocumentSegment], concurrent.futures.Future]] = deque()
+            for (batch, _, _), batch_segments in zip(batches, created_batches):
+                if index_errors and raise_on_index_error:
+                    break
+                # load the segments expired by the commit with one query
+                batch_ids = segment_ids[offset : offset + len(batch_segments)]
+                offset += len(batch_segments)
+                list(db.session.scalars(select(DocumentSegment).where(DocumentSegment.id.in_(batch_ids))))
+                keywords_list = [item.get("keywords") for item in batch]
+                if not index_in_background:
+                    error = cls._create_segments_index(keywords_list, batch_segments, dataset, document.doc_form)
+                    cls._mark_segments_indexed(batch_segments, error, index_errors)
+                    continue
+
+                if len(pending_index) >= cls._INDEX_BATCHES_IN_FLIGHT:
+                    pending_segments, future = pending_index.popleft()
+                    cls._mark_segments_indexed(pending_segments, future.result(), index_errors)
+                    if index_errors and raise_on_index_error:
+                        break
+                pending_index.append(
+                    (
+                        batch_segments,
+                        executor.submit(
+                            cls._create_segments_index_in_app_context,
+                            flask_app,
+                            keywords_list,
+                            batch_segments,
+                            dataset.id,
+                            document.doc_form,
+                        ),
+                    )
                 )
-                if document.doc_form == "qa_model":
-                    segment_document.answer = segment_item["answer"]
-                    segment_document.word_count += len(segment_item["answer"])
-                increment_word_count += segment_document.word_count
-                db.session.add(segment_document)
-                segment_data_list.append(segment_document)
-                position += 1
-
-                pre_segment_data_list.append(segment_document)
-                if "keywords" in segment_item:
-                    keywords_list.append(segment_item["keywords"])
-                else:
-                    keywords_list.append(None)
-            # update document word count
-            document.word_count += increment_word_count
-            db.session.add(document)
-            try:
-                # save vector index
-                VectorService.create_segments_vector(keywords_list, pre_segment_data_list, dataset, document.doc_form)
-            except Exception as e:
-                logging.exception("create segment index failed")
-                for segment_document in segment_data_list:
-                    segment_document.enabled = False
-                    segment_document.disabled_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
-                    segment_document.status = "error"
-                    segment_document.error = str(e)
+            for pending_segments, future in pending_index:
+                cls._mark_segments_indexed(pending_segments, future.result(), index_errors)
+
+        if index_errors and raise_on_index_error:
+            # discard the status changes of the segments about to be deleted
+            db.session.rollback()
+            # drop the index of the batches that did succeed, child chunks are found through their segments
+            index_processor = IndexProcessorFactory(document.doc_form).init_index_processor()
+            index_processor.clean(dataset, index_node_ids, with_keywords=True, delete_child_chunks=True)
+            db.session.execute(
+                delete(DocumentSegment)
+                .where(DocumentSegment.id.in_(segment_ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.execute(
+                update(Document)
+                .where(Document.id == document.id)
+                .values(word_count=Document.word_count - increment_word_count)
+                .execution_options(synchronize_session=False)
+            )
+            DocumentSegmentStatisticsService.refresh([document.id])
             db.session.commit()
-            return segment_data_list
+            raise index_errors[0]
+
+        DocumentSegmentStatisticsService.refresh([document.id])
+        db.session.commit()
+        return created_segments
+
+    @staticmethod
+    def _create_segments_index(
+        keywords_list: list[Optional[list[str]]], segments: list[DocumentSegment], dataset: Dataset, doc_form: str
+    ) -> Optional[Exception]:
+        try:
+            VectorService.create_segments_vector(keywords_list, segments, dataset, doc_form)  # type: ignore
+        except Exception as e:
+            logging.exception("create segment index failed")
+            return e
+        return None
+
+    @classmethod
+    def _create_segments_index_in_app_context(
+        cls,
+        flask_app: Flask,
+        keywords_list: list[Optional[list[str]]],
+        segments: list[DocumentSegment],
+        dataset_id: str,
+        doc_form: str,
+    ) -> Optional[Exception]:
+        with flask_app.app_context():
+            dataset = db.session.get(Dataset, dataset_id)
+            if not dataset:
+                return ValueError("Dataset not exist.")
+            return cls._create_segments_index(keywords_list, segments, dataset, doc_form)
+
+    @staticmethod
+    def _mark_segments_indexed(
+        segments: list[DocumentSegment], error: Optional[Exception], index_errors: list[Exception]
+    ) -> None:
+        now = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        for segment in segments:
+            segment.completed_at = now
+            if error is None:
+                segment.status = "completed"
+            else:
+                segment.enabled = False
+                segment.disabled_at = now
+                segment.status = "error"
+                segment.error = str(error)
+        if error is not None:
+            index_errors.append(error)
 
     @classmethod
     def update_segment(cls, args: SegmentUpdateArgs, segment: DocumentSegment, document: Document, dataset: Dataset):
@@ -1943,6 +2085,7 @@ class SegmentService:
         # update document word count
         document.word_count -= segment.word_count
         db.session.add(document)
+        DocumentSegmentStatisticsService.refresh([document.id])
         db.session.commit()
 
     @classmethod
@@ -1962,6 +2105,7 @@ class SegmentService:
 
         delete_segment_from_index_task.delay(index_node_ids, dataset.id, document.id)
         db.session.query(DocumentSegment).filter(DocumentSegment.id.in_(segment_ids)).delete()
+        DocumentSegmentStatisticsService.refresh([document.id])
         db.session.commit()
 
     @classmethod
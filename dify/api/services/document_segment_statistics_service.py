@@ -0,0 +1,70 @@
+from collections.abc import Mapping, Sequence
+
+from sqlalchemy import func, select, update
+
+from extensions.ext_database import db
+from models.dataset import Document, DocumentSegment
+
+
+class DocumentSegmentStatisticsService:
+    """
+    Maintains the segment counters stored on `Document`.
+
+    None of the methods commit, so the counters change in the same transaction as the
+    segments they describe.
+    """
+
+    @staticmethod
+    def refresh(document_ids: Sequence[str]) -> None:
+        """
+        Recalculate the counters of the given documents from their segments.
+        """
+        if not document_ids:
+            return
+
+        segments = select(func.count(DocumentSegment.id)).where(
+            DocumentSegment.document_id == Document.id,
+            DocumentSegment.status != "re_segment",
+        )
+        db.session.execute(
+            update(Document)
+            .where(Document.id.in_(document_ids))
+            .values(
+                total_segments=segments.scalar_subquery(),
+                completed_segments=segments.where(DocumentSegment.completed_at.isnot(None)).scalar_subquery(),
+                total_hit_count=select(func.coalesce(func.sum(DocumentSegment.hit_count), 0))
+                .where(DocumentSegment.document_id == Document.id)
+                .scalar_subquery(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def increment_completed_segments(document_id: str, count: int) -> None:
+        """
+        Count segments that just finished indexing. Safe to call from concurrent indexing threads.
+        """
+        if count <= 0:
+            return
+
+        db.session.execute(
+            update(Document)
+            .where(Document.id == document_id)
+            .values(completed_segments=Document.completed_segments + count)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def increment_hit_counts(document_hits: Mapping[str, int]) -> None:
+        """
+        Add segment hits to the totals of their documents.
+        """
+        for document_id, hits in document_hits.items():
+            if not hits:
+                continue
+            db.session.execute(
+                update(Document)
+                .where(Document.id == document_id)
+                .values(total_hit_count=Document.total_hit_count + hits)
+                .execution_options(synchronize_session=False)
+            )
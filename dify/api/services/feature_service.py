@@ -3,6 +3,7 @@ from enum import StrEnum
 from pydantic import BaseModel, ConfigDict, Field
 
 from configs import dify_config
+from extensions.ext_redis import redis_client
 from services.billing_service import BillingService
 from services.enterprise.enterprise_service import EnterpriseService
 
@@ -132,7 +133,18 @@ class SystemFeatureModel(BaseModel):
 
 class FeatureService:
     @classmethod
-    def get_features(cls, tenant_id: str) -> FeatureModel:
+    def get_features(cls, tenant_id: str, refresh: bool = False) -> FeatureModel:
+        """
+        Get the features of a workspace, reusing a snapshot of the billing and enterprise info of up to
+        FEATURES_CACHE_TTL seconds. Quota checks pass refresh to count the workspace's current resources.
+        """
+        cache_key = f"features:tenant_id:{tenant_id}"
+        is_cached = cls._is_cache_enabled(tenant_id)
+        if is_cached and not refresh:
+            cached_features = redis_client.get(cache_key)
+            if cached_features:
+                return FeatureModel.model_validate_json(cached_features)
+
         features = FeatureModel()
 
         cls._fulfill_params_from_env(features)
@@ -144,18 +156,46 @@ class FeatureService:
             features.webapp_copyright_enabled = True
             cls._fulfill_params_from_workspace_info(features, tenant_id)
 
+        if is_cached:
+            redis_client.setex(cache_key, dify_config.FEATURES_CACHE_TTL, features.model_dump_json())
         return features
 
     @classmethod
     def get_knowledge_rate_limit(cls, tenant_id: str):
+        cache_key = f"knowledge_rate_limit:tenant_id:{tenant_id}"
+        is_cached = cls._is_cache_enabled(tenant_id)
+        if is_cached:
+            cached_knowledge_rate_limit = redis_client.get(cache_key)
+            if cached_knowledge_rate_limit:
+                return KnowledgeRateLimitModel.model_validate_json(cached_knowledge_rate_limit)
+
         knowledge_rate_limit = KnowledgeRateLimitModel()
         if dify_config.BILLING_ENABLED and tenant_id:
             knowledge_rate_limit.enabled = True
             limit_info = BillingService.get_knowledge_rate_limit(tenant_id)
             knowledge_rate_limit.limit = limit_info.get("limit", 10)
             knowledge_rate_limit.subscription_plan = limit_info.get("subscription_plan", "sandbox")
+
+        if is_cached:
+            redis_client.setex(cache_key, dify_config.FEATURES_CACHE_TTL, knowledge_rate_limit.model_dump_json())
         return knowledge_rate_limit
 
+    @classmethod
+    def invalidate_features(cls, tenant_id: str) -> None:
+        """
+        Drop the snapshot of the features of a workspace, e.g. when its subscription changes
+        """
+        redis_client.delete(f"features:tenant_id:{tenant_id}", f"knowledge_rate_limit:tenant_id:{tenant_id}")
+
+    @classmethod
+    def _is_cache_enabled(cls, tenant_id: str) -> bool:
+        # without billing or enterprise, the features only come from the environment
+        return bool(
+            dify_config.FEATURES_CACHE_TTL > 0
+            and tenant_id
+            and (dify_config.BILLING_ENABLED or dify_config.ENTERPRISE_ENABLED)
+        )
+
     @classmethod
     def get_system_features(cls) -> SystemFeatureModel:
         system_features = SystemFeatureModel()
@@ -199,6 +199,13 @@ class FileService:
 
         return generator, upload_file
 
+    @staticmethod
+    def get_file_range_generator(upload_file: UploadFile, start: int, stop: int):
+        """
+        Get the bytes of a file from start up to stop as a stream, e.g. for a range request of a media player
+        """
+        return storage.load_range(upload_file.key, start, stop)
+
     @staticmethod
     def get_public_image_preview(file_id: str):
         upload_file = db.session.query(UploadFile).filter(UploadFile.id == file_id).first()
@@ -7,7 +7,11 @@ from typing import Optional, Union
 from constants import HIDDEN_VALUE
 from core.entities.provider_configuration import ProviderConfiguration
 from core.helper import encrypter
-from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
+from core.helper.model_provider_cache import (
+    ProviderConfigurationsCache,
+    ProviderCredentialsCache,
+    ProviderCredentialsCacheType,
+)
 from core.model_manager import LBModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import (
@@ -276,6 +280,7 @@ class ModelLoadBalancingService:
         )
         db.session.add(inherit_config)
         db.session.commit()
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
 
         return inherit_config
 
@@ -413,6 +418,7 @@ class ModelLoadBalancingService:
 
                 db.session.add(load_balancing_model_config)
                 db.session.commit()
+                ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
 
         # get deleted config ids
         deleted_config_ids = set(current_load_balancing_configs_dict.keys()) - updated_config_ids
@@ -569,3 +575,4 @@ class ModelLoadBalancingService:
         )
 
         provider_model_credentials_cache.delete()
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
@@ -9,6 +9,7 @@ from configs import dify_config
 from core.helper import marketplace
 from core.helper.download import download_with_size_limit
 from core.helper.marketplace import download_plugin_pkg
+from core.helper.model_provider_cache import ProviderConfigurationsCache
 from core.plugin.entities.bundle import PluginBundleDependency
 from core.plugin.entities.plugin import (
     GenericProviderID,
@@ -17,7 +18,12 @@ from core.plugin.entities.plugin import (
     PluginInstallation,
     PluginInstallationSource,
 )
-from core.plugin.entities.plugin_daemon import PluginInstallTask, PluginListResponse, PluginUploadResponse
+from core.plugin.entities.plugin_daemon import (
+    PluginInstallTask,
+    PluginInstallTaskStatus,
+    PluginListResponse,
+    PluginUploadResponse,
+)
 from core.plugin.impl.asset import PluginAssetManager
 from core.plugin.impl.debugging import PluginDebuggingClient
 from core.plugin.impl.plugin import PluginInstaller
@@ -164,7 +170,11 @@ class PluginService:
     @staticmethod
     def fetch_install_task(tenant_id: str, task_id: str) -> PluginInstallTask:
         manager = PluginInstaller()
-        return manager.fetch_plugin_installation_task(tenant_id, task_id)
+        task = manager.fetch_plugin_installation_task(tenant_id, task_id)
+        if task.status == PluginInstallTaskStatus.Success:
+            # installations run in the plugin daemon, model providers they add are known once the task succeeded
+            ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
+        return task
 
     @staticmethod
     def delete_install_task(tenant_id: str, task_id: str) -> bool:
@@ -217,7 +227,7 @@ class PluginService:
             pkg = download_plugin_pkg(new_plugin_unique_identifier)
             manager.upload_pkg(tenant_id, pkg, verify_signature=False)
 
-        return manager.upgrade_plugin(
+        response = manager.upgrade_plugin(
             tenant_id,
             original_plugin_unique_identifier,
             new_plugin_unique_identifier,
@@ -226,6 +236,8 @@ class PluginService:
                 "plugin_unique_identifier": new_plugin_unique_identifier,
             },
         )
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
+        return response
 
     @staticmethod
     def upgrade_plugin_with_github(
@@ -240,7 +252,7 @@ class PluginService:
         Upgrade plugin with github
         """
         manager = PluginInstaller()
-        return manager.upgrade_plugin(
+        response = manager.upgrade_plugin(
             tenant_id,
             original_plugin_unique_identifier,
             new_plugin_unique_identifier,
@@ -251,6 +263,8 @@ class PluginService:
                 "package": package,
             },
         )
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
+        return response
 
     @staticmethod
     def upload_pkg(tenant_id: str, pkg: bytes, verify_signature: bool = False) -> PluginUploadResponse:
@@ -294,12 +308,14 @@ class PluginService:
     @staticmethod
     def install_from_local_pkg(tenant_id: str, plugin_unique_identifiers: Sequence[str]):
         manager = PluginInstaller()
-        return manager.install_from_identifiers(
+        response = manager.install_from_identifiers(
             tenant_id,
             plugin_unique_identifiers,
             PluginInstallationSource.Package,
             [{}],
         )
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
+        return response
 
     @staticmethod
     def install_from_github(tenant_id: str, plugin_unique_identifier: str, repo: str, version: str, package: str):
@@ -308,7 +324,7 @@ class PluginService:
         returns plugin_unique_identifier
         """
         manager = PluginInstaller()
-        return manager.install_from_identifiers(
+        response = manager.install_from_identifiers(
             tenant_id,
             [plugin_unique_identifier],
             PluginInstallationSource.Github,
@@ -320,6 +336,8 @@ class PluginService:
                 }
             ],
         )
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
+        return response
 
     @staticmethod
     def fetch_marketplace_pkg(
@@ -363,7 +381,7 @@ class PluginService:
                 pkg = download_plugin_pkg(plugin_unique_identifier)
                 manager.upload_pkg(tenant_id, pkg, verify_signature)
 
-        return manager.install_from_identifiers(
+        response = manager.install_from_identifiers(
             tenant_id,
             plugin_unique_identifiers,
             PluginInstallationSource.Marketplace,
@@ -374,11 +392,15 @@ class PluginService:
                 for plugin_unique_identifier in plugin_unique_identifiers
             ],
         )
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
+        return response
 
     @staticmethod
     def uninstall(tenant_id: str, plugin_installation_id: str) -> bool:
         manager = PluginInstaller()
-        return manager.uninstall(tenant_id, plugin_installation_id)
+        uninstalled = manager.uninstall(tenant_id, plugin_installation_id)
+        ProviderConfigurationsCache(tenant_id=tenant_id).invalidate()
+        return uninstalled
 
     @staticmethod
     def check_tools_existence(tenant_id: str, provider_ids: Sequence[GenericProviderID]) -> Sequence[bool]:
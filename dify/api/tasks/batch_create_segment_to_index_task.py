@@ -1,20 +1,14 @@
-import datetime
 import logging
 import time
-import uuid
 
 import click
 from celery import shared_task  # type: ignore
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from core.model_manager import ModelManager
-from core.model_runtime.entities.model_entities import ModelType
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
-from libs import helper
-from models.dataset import Dataset, Document, DocumentSegment
-from services.vector_service import VectorService
+from models.dataset import Dataset, Document
+from services.dataset_service import SegmentService
 
 
 @shared_task(queue="dataset")
@@ -58,59 +52,10 @@ def batch_create_segment_to_index_task(
                 or dataset_document.indexing_status != "completed"
             ):
                 raise ValueError("Document is not available.")
-            document_segments = []
-            embedding_model = None
-            if dataset.indexing_technique == "high_quality":
-                model_manager = ModelManager()
-                embedding_model = model_manager.get_model_instance(
-                    tenant_id=dataset.tenant_id,
-                    provider=dataset.embedding_model_provider,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                    model=dataset.embedding_model,
-                )
-        word_count_change = 0
-        if embedding_model:
-            tokens_list = embedding_model.get_text_embedding_num_tokens(
-                texts=[segment["content"] for segment in content]
-            )
-        else:
-            tokens_list = [0] * len(content)
-        for segment, tokens in zip(content, tokens_list):
-            content = segment["content"]
-            doc_id = str(uuid.uuid4())
-            segment_hash = helper.generate_text_hash(content)  # type: ignore
-            max_position = (
-                db.session.query(func.max(DocumentSegment.position))
-                .filter(DocumentSegment.document_id == dataset_document.id)
-                .scalar()
-            )
-            segment_document = DocumentSegment(
-                tenant_id=tenant_id,
-                dataset_id=dataset_id,
-                document_id=document_id,
-                index_node_id=doc_id,
-                index_node_hash=segment_hash,
-                position=max_position + 1 if max_position else 1,
-                content=content,
-                word_count=len(content),
-                tokens=tokens,
-                created_by=user_id,
-                indexing_at=datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-                status="completed",
-                completed_at=datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
-            )
-            if dataset_document.doc_form == "qa_model":
-                segment_document.answer = segment["answer"]
-                segment_document.word_count += len(segment["answer"])
-            word_count_change += segment_document.word_count
-            db.session.add(segment_document)
-            document_segments.append(segment_document)
-        # update document word count
-        dataset_document.word_count += word_count_change
-        db.session.add(dataset_document)
-        # add index to db
-        VectorService.create_segments_vector(None, document_segments, dataset, dataset_document.doc_form)
-        db.session.commit()
+
+        SegmentService.bulk_create_segments(
+            content, dataset_document, dataset, tenant_id=tenant_id, user_id=user_id, raise_on_index_error=True
+        )
         redis_client.setex(indexing_cache_key, 600, "completed")
         end_at = time.perf_counter()
         logging.info(
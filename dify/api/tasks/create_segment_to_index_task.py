@@ -11,6 +11,7 @@ from core.rag.models.document import Document
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import DocumentSegment
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 
 
 @shared_task(queue="dataset")
@@ -42,6 +43,7 @@ def create_segment_to_index_task(segment_id: str, keywords: Optional[list[str]]
             DocumentSegment.indexing_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
         }
         db.session.query(DocumentSegment).filter_by(id=segment.id).update(update_params)
+        DocumentSegmentStatisticsService.refresh([segment.document_id])
         db.session.commit()
         document = Document(
             page_content=segment.content,
@@ -79,6 +81,7 @@ def create_segment_to_index_task(segment_id: str, keywords: Optional[list[str]]
             DocumentSegment.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
         }
         db.session.query(DocumentSegment).filter_by(id=segment.id).update(update_params)
+        DocumentSegmentStatisticsService.refresh([segment.document_id])
         db.session.commit()
 
         end_at = time.perf_counter()
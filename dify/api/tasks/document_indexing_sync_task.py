@@ -11,6 +11,7 @@ from core.rag.index_processor.index_processor_factory import IndexProcessorFacto
 from extensions.ext_database import db
 from models.dataset import Dataset, Document, DocumentSegment
 from models.source import DataSourceOauthBinding
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 
 
 @shared_task(queue="dataset")
@@ -91,6 +92,7 @@ def document_indexing_sync_task(dataset_id: str, document_id: str):
 
                 for segment in segments:
                     db.session.delete(segment)
+                DocumentSegmentStatisticsService.refresh([document_id])
 
                 end_at = time.perf_counter()
                 logging.info(
@@ -30,7 +30,7 @@ def document_indexing_task(dataset_id: str, document_ids: list):
         db.session.close()
         return
     # check document limit
-    features = FeatureService.get_features(dataset.tenant_id)
+    features = FeatureService.get_features(dataset.tenant_id, refresh=True)
     try:
         if features.billing.enabled:
             vector_space = features.vector_space
@@ -9,6 +9,7 @@ from core.indexing_runner import DocumentIsPausedError, IndexingRunner
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from models.dataset import Dataset, Document, DocumentSegment
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 
 
 @shared_task(queue="dataset")
@@ -52,6 +53,7 @@ def document_indexing_update_task(dataset_id: str, document_id: str):
 
             for segment in segments:
                 db.session.delete(segment)
+            DocumentSegmentStatisticsService.refresh([document_id])
             db.session.commit()
         end_at = time.perf_counter()
         logging.info(
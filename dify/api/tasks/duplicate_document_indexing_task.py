@@ -10,6 +10,7 @@ from core.indexing_runner import DocumentIsPausedError, IndexingRunner
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from models.dataset import Dataset, Document, DocumentSegment
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 from services.feature_service import FeatureService
 
 
@@ -32,7 +33,7 @@ def duplicate_document_indexing_task(dataset_id: str, document_ids: list):
         return
 
     # check document limit
-    features = FeatureService.get_features(dataset.tenant_id)
+    features = FeatureService.get_features(dataset.tenant_id, refresh=True)
     try:
         if features.billing.enabled:
             vector_space = features.vector_space
@@ -83,6 +84,7 @@ def duplicate_document_indexing_task(dataset_id: str, document_ids: list):
 
                 for segment in segments:
                     db.session.delete(segment)
+                DocumentSegmentStatisticsService.refresh([document_id])
                 db.session.commit()
 
             document.indexing_status = "parsing"
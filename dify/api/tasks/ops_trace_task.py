@@ -4,7 +4,7 @@ import logging
 from celery import shared_task  # type: ignore
 from flask import current_app
 
-from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
+from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_SEGMENT_PATH, OPS_TRACE_FAILED_KEY
 from core.ops.entities.trace_entity import trace_info_info_map
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
@@ -19,15 +19,49 @@ def process_trace_tasks(file_info):
     Async process trace tasks
     Usage: process_trace_tasks.delay(tasks_data)
     """
-    from core.ops.ops_trace_manager import OpsTraceManager
-
     app_id = file_info.get("app_id")
     file_id = file_info.get("file_id")
     file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.json"
     file_data = json.loads(storage.load(file_path))
+
+    try:
+        _process_trace(app_id, file_data, {})
+    finally:
+        storage.delete(file_path)
+
+
+@shared_task(queue="ops_trace")
+def process_trace_segment(segment_info):
+    """
+    Async process a segment of trace tasks, one json line per trace
+    Usage: process_trace_segment.delay({"file_id": file_id})
+    """
+    file_path = f"{OPS_SEGMENT_PATH}{segment_info.get('file_id')}.jsonl"
+    segment = storage.load(file_path)
+
+    # trace instances by app id, the traces of a segment mostly come from a few apps
+    trace_instances: dict = {}
+    try:
+        for line in segment.splitlines():
+            if not line:
+                continue
+            file_data = json.loads(line)
+            try:
+                _process_trace(file_data.get("app_id"), file_data, trace_instances)
+            except Exception:
+                logging.exception(f"Processing trace tasks failed, app_id: {file_data.get('app_id')}")
+    finally:
+        storage.delete(file_path)
+
+
+def _process_trace(app_id, file_data, trace_instances: dict):
+    from core.ops.ops_trace_manager import OpsTraceManager
+
     trace_info = file_data.get("trace_info")
     trace_info_type = file_data.get("trace_info_type")
-    trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
+    if app_id not in trace_instances:
+        trace_instances[app_id] = OpsTraceManager.get_ops_trace_instance(app_id)
+    trace_instance = trace_instances[app_id]
 
     if trace_info.get("message_data"):
         trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
@@ -51,5 +85,3 @@ def process_trace_tasks(file_info):
         failed_key = f"{OPS_TRACE_FAILED_KEY}_{app_id}"
         redis_client.incr(failed_key)
         logging.info(f"Processing trace tasks failed, app_id: {app_id}")
-    finally:
-        storage.delete(file_path)
@@ -10,6 +10,7 @@ from core.rag.index_processor.index_processor_factory import IndexProcessorFacto
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import Dataset, Document, DocumentSegment
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 from services.feature_service import FeatureService
 
 
@@ -34,7 +35,7 @@ def retry_document_indexing_task(dataset_id: str, document_ids: list[str]):
     for document_id in document_ids:
         retry_indexing_cache_key = "document_{}_is_retried".format(document_id)
         # check document limit
-        features = FeatureService.get_features(dataset.tenant_id)
+        features = FeatureService.get_features(dataset.tenant_id, refresh=True)
         try:
             if features.billing.enabled:
                 vector_space = features.vector_space
@@ -77,6 +78,7 @@ def retry_document_indexing_task(dataset_id: str, document_ids: list[str]):
 
             for segment in segments:
                 db.session.delete(segment)
+            DocumentSegmentStatisticsService.refresh([document_id])
             db.session.commit()
 
             document.indexing_status = "parsing"
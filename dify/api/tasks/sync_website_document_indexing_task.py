@@ -10,6 +10,7 @@ from core.rag.index_processor.index_processor_factory import IndexProcessorFacto
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.dataset import Dataset, Document, DocumentSegment
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
 from services.feature_service import FeatureService
 
 
@@ -30,7 +31,7 @@ def sync_website_document_indexing_task(dataset_id: str, document_id: str):
 
     sync_indexing_cache_key = "document_{}_is_sync".format(document_id)
     # check document limit
-    features = FeatureService.get_features(dataset.tenant_id)
+    features = FeatureService.get_features(dataset.tenant_id, refresh=True)
     try:
         if features.billing.enabled:
             vector_space = features.vector_space
@@ -69,6 +70,7 @@ def sync_website_document_indexing_task(dataset_id: str, document_id: str):
 
         for segment in segments:
             db.session.delete(segment)
+        DocumentSegmentStatisticsService.refresh([document_id])
         db.session.commit()
 
         document.indexing_status = "parsing"
@@ -0,0 +1,15 @@
+import pytest
+from flask import Flask
+
+CACHED_APP = Flask(__name__)
+
+
+@pytest.fixture
+def app() -> Flask:
+    return CACHED_APP
+
+
+@pytest.fixture(autouse=True)
+def _provide_app_context(app: Flask):
+    with app.app_context():
+        yield
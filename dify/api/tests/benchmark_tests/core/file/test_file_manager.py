@@ -0,0 +1,76 @@
+import os
+import time
+from collections import Counter
+
+import pytest
+from cachetools import LRUCache
+
+from core.file import file_manager
+from core.file.enums import FileTransferMethod, FileType
+from core.file.models import File
+
+TURNS = 10
+IMAGE_SIZE = 5 * 1024 * 1024
+
+
+class _LocalStorage:
+    """Stands in for the file storage, counting the files loaded from it."""
+
+    def __init__(self, operations: Counter):
+        self.files: dict[str, bytes] = {}
+        self.operations = operations
+
+    def load(self, filename: str, /, *, stream: bool = False) -> bytes:
+        self.operations["storage.load"] += 1
+        return self.files[filename]
+
+
+@pytest.fixture
+def conversation(monkeypatch):
+    operations: Counter = Counter()
+    storage = _LocalStorage(operations)
+    images = []
+    for turn in range(TURNS):
+        storage.files[f"upload_files/tenant-1/{turn}.png"] = os.urandom(IMAGE_SIZE)
+        images.append(
+            File(
+                tenant_id="tenant-1",
+                type=FileType.IMAGE,
+                transfer_method=FileTransferMethod.LOCAL_FILE,
+                related_id=f"upload-file-{turn}",
+                filename=f"{turn}.png",
+                extension=".png",
+                mime_type="image/png",
+                size=IMAGE_SIZE,
+                storage_key=f"upload_files/tenant-1/{turn}.png",
+            )
+        )
+    monkeypatch.setattr(file_manager, "storage", storage)
+    return images, operations
+
+
+@pytest.mark.parametrize("cache_max_size", [0, 128 * 1024 * 1024])
+def test_prompt_assembly_latency_of_image_conversation(benchmark, conversation, monkeypatch, cache_max_size):
+    monkeypatch.setattr(file_manager.dify_config, "MULTIMODAL_ENCODING_CACHE_MAX_SIZE", cache_max_size)
+    images, operations = conversation
+    latencies: list[float] = []
+
+    def setup():
+        monkeypatch.setattr(file_manager, "_encoded_strings", LRUCache(maxsize=cache_max_size or 1, getsizeof=len))
+        operations.clear()
+        latencies.clear()
+
+    def chat():
+        # every turn sends a new image, and the images of the previous turns with the history
+        for turn in range(TURNS):
+            started_at = time.perf_counter()
+            for image in images[: turn + 1]:
+                assert file_manager.to_prompt_message_content(image).data
+            latencies.append(time.perf_counter() - started_at)
+
+    benchmark.pedantic(chat, setup=setup, rounds=3)
+
+    benchmark.extra_info.update(
+        {**operations, "last_turn_latency": latencies[-1], "mean_turn_latency": sum(latencies) / TURNS}
+    )
+    assert operations["storage.load"] == (TURNS if cache_max_size else TURNS * (TURNS + 1) // 2)
@@ -0,0 +1,104 @@
+from collections import Counter
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import BaseModel
+
+from core.ops import ops_trace_manager
+from core.ops.ops_trace_manager import TraceQueueManager
+from tasks import ops_trace_task
+
+TRACED_RUNS = 1000
+
+
+class _TraceInfo(BaseModel):
+    workflow_run_id: str
+    total_tokens: int
+    metadata: dict
+
+
+class _LocalStorage:
+    """Stands in for the object store, counting its operations."""
+
+    def __init__(self, operations: Counter):
+        self.files: dict[str, bytes] = {}
+        self.operations = operations
+
+    def save(self, filename: str, data: bytes) -> None:
+        self.operations["storage.save"] += 1
+        self.files[filename] = data
+
+    def load(self, filename: str) -> bytes:
+        self.operations["storage.load"] += 1
+        return self.files[filename]
+
+    def delete(self, filename: str) -> None:
+        self.operations["storage.delete"] += 1
+        self.files.pop(filename)
+
+
+class _LocalBroker:
+    """Stands in for the celery broker, counting the messages sent and running them on drain."""
+
+    def __init__(self, operations: Counter, task):
+        self.messages: list = []
+        self.operations = operations
+        self.task = task
+
+    def delay(self, *args) -> None:
+        self.operations["broker.send"] += 1
+        self.messages.append(args)
+
+    def drain(self) -> None:
+        while self.messages:
+            self.task(*self.messages.pop(0))
+
+
+def _trace_task(index: int) -> MagicMock:
+    trace_task = MagicMock(trace_type="workflow")
+    trace_task.execute.return_value = _TraceInfo(
+        workflow_run_id=f"run-{index}", total_tokens=index, metadata={"app_id": "app-1", "index": index}
+    )
+    return trace_task
+
+
+@pytest.fixture
+def spool(monkeypatch):
+    operations: Counter = Counter()
+    storage = _LocalStorage(operations)
+    broker = _LocalBroker(operations, ops_trace_task.process_trace_segment)
+    trace_instance = MagicMock()
+    monkeypatch.setattr(ops_trace_manager, "storage", storage)
+    monkeypatch.setattr(ops_trace_task, "storage", storage)
+    monkeypatch.setattr(ops_trace_manager, "process_trace_segment", broker)
+    monkeypatch.setattr(ops_trace_manager.OpsTraceManager, "get_ops_trace_instance", lambda app_id: trace_instance)
+    monkeypatch.setattr(TraceQueueManager, "start_timer", lambda self: None)
+    return TraceQueueManager(app_id="app-1"), broker, operations, trace_instance
+
+
+def test_trace_spool_operations_per_1000_workflow_runs(benchmark, spool):
+    manager, broker, operations, trace_instance = spool
+    trace_tasks = [_trace_task(index) for index in range(TRACED_RUNS)]
+
+    def setup():
+        operations.clear()
+        trace_instance.reset_mock()
+        for trace_task in trace_tasks:
+            manager.add_trace_task(trace_task)
+
+    def trace_runs():
+        while not ops_trace_manager.trace_manager_queue.empty():
+            manager.run()
+        broker.drain()
+
+    benchmark.pedantic(trace_runs, setup=setup, rounds=5)
+
+    benchmark.extra_info.update(operations)
+    batches = TRACED_RUNS // ops_trace_manager.trace_manager_batch_size
+    assert operations == {
+        "storage.save": batches,
+        "broker.send": batches,
+        "storage.load": batches,
+        "storage.delete": batches,
+    }
+    assert trace_instance.trace.call_count == TRACED_RUNS
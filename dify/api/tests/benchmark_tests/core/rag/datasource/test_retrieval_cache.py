@@ -0,0 +1,77 @@
+import hashlib
+import time
+from collections import Counter
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.datasource import retrieval_cache, retrieval_service
+from core.rag.datasource.retrieval_cache import RetrievalResultCache
+from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.models.document import Document
+
+DISTINCT_QUESTIONS = 400
+# the most asked question is asked this many times, the question ranked n-th a n-th of it, as by Zipf's law
+TOP_QUESTION_COUNT = 100
+# embedding, vector and full text search and rerank of one retrieval
+RETRIEVAL_LATENCY = 0.005
+# documents are added or changed every this many queries
+QUERIES_PER_INDEX_CHANGE = 250
+
+
+def _query_log() -> list[str]:
+    """Questions of a FAQ deployment, about half of them asked before, in a fixed shuffled order."""
+    questions = [f"What is the notice period for terminating contract type {i}?" for i in range(DISTINCT_QUESTIONS)]
+    query_log = [
+        (hashlib.sha256(f"{rank}:{n}".encode()).digest(), question)
+        for rank, question in enumerate(questions)
+        for n in range(max(1, round(TOP_QUESTION_COUNT / (rank + 1))))
+    ]
+    return [question for _, question in sorted(query_log)]
+
+
+@pytest.fixture
+def dataset(monkeypatch, local_redis):
+    operations: Counter = Counter()
+    monkeypatch.setattr(retrieval_cache, "redis_client", local_redis)
+    monkeypatch.setattr(RetrievalService, "_get_dataset", MagicMock(return_value=MagicMock(id="dataset-1")))
+
+    def search(dataset, retrieval_method, query, *args) -> list[Document]:
+        operations["retrieval.search"] += 1
+        time.sleep(RETRIEVAL_LATENCY)
+        # tag the result with the version of the index it was retrieved from
+        version = RetrievalResultCache("dataset-1").get_version()
+        return [
+            Document(page_content=f"Answer {i} to {query}", metadata={"score": 0.9 - i / 10, "version": version})
+            for i in range(4)
+        ]
+
+    monkeypatch.setattr(RetrievalService, "_retrieve", search)
+    return operations
+
+
+@pytest.mark.parametrize("cache_ttl", [0, 600])
+def test_retrievals_replaying_a_query_log(benchmark, dataset, monkeypatch, cache_ttl):
+    monkeypatch.setattr(retrieval_service.dify_config, "RETRIEVAL_RESULT_CACHE_TTL", cache_ttl)
+    operations = dataset
+    query_log = _query_log()
+    stale_results = []
+
+    def replay():
+        for i, query in enumerate(query_log):
+            if i and i % QUERIES_PER_INDEX_CHANGE == 0:
+                RetrievalResultCache("dataset-1").invalidate()
+            documents = RetrievalService.retrieve("hybrid_search", "dataset-1", query, top_k=4)
+            if documents[0].metadata["version"] != RetrievalResultCache("dataset-1").get_version():
+                stale_results.append(query)
+
+    benchmark.pedantic(replay, setup=operations.clear, rounds=3)
+
+    repeat_rate = 1 - len(set(query_log)) / len(query_log)
+    benchmark.extra_info.update({**operations, "repeat_rate": repeat_rate})
+    assert not stale_results
+    if cache_ttl:
+        # only the first time a question is asked after each index change runs a retrieval
+        assert operations["retrieval.search"] < len(query_log) * (1 - repeat_rate / 2)
+    else:
+        assert operations["retrieval.search"] == len(query_log)
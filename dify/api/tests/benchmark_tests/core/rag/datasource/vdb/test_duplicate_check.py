@@ -0,0 +1,75 @@
+import uuid
+from collections import Counter
+from typing import Any
+
+import pytest
+
+from core.rag.datasource.vdb.vector_base import EXISTING_IDS_BATCH_SIZE, BaseVector
+from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.models.document import Document
+
+REINDEXED_SEGMENTS = 10000
+
+
+class _LocalVector(BaseVector):
+    """Stands in for a vector store table, counting the queries it receives."""
+
+    def __init__(self, ids: set[str], operations: Counter):
+        super().__init__("benchmark_collection")
+        self.ids = ids
+        self.operations = operations
+
+    def get_type(self) -> str:
+        return "local"
+
+    def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        raise NotImplementedError
+
+    def add_texts(self, documents: list[Document], embeddings: list[list[float]], **kwargs):
+        raise NotImplementedError
+
+    def text_exists(self, id: str) -> bool:
+        self.operations["vector.query"] += 1
+        return id in self.ids
+
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        self.operations["vector.query"] += 1
+        return self.ids.intersection(ids)
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        raise NotImplementedError
+
+    def delete_by_metadata_field(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        raise NotImplementedError
+
+    def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
+        raise NotImplementedError
+
+    def delete(self) -> None:
+        raise NotImplementedError
+
+
+@pytest.fixture
+def reindex():
+    documents = [
+        Document(page_content=f"segment {i}", metadata={"doc_id": str(uuid.uuid4())}) for i in range(REINDEXED_SEGMENTS)
+    ]
+    # half of the segments are already indexed from the previous run
+    indexed_ids = {document.metadata["doc_id"] for document in documents[::2]}
+    operations: Counter = Counter()
+    vector = Vector.__new__(Vector)
+    vector._vector_processor = _LocalVector(indexed_ids, operations)
+    return vector, documents, operations
+
+
+def test_duplicate_check_queries_per_10000_reindexed_segments(benchmark, reindex):
+    vector, documents, operations = reindex
+
+    result = benchmark.pedantic(lambda: vector._filter_duplicate_texts(documents), setup=operations.clear, rounds=5)
+
+    benchmark.extra_info.update(operations)
+    assert operations == {"vector.query": REINDEXED_SEGMENTS // EXISTING_IDS_BATCH_SIZE}
+    assert result == documents[1::2]
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import Counter
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.rag.embedding import cached_embedding
+from core.rag.embedding.cached_embedding import CacheEmbedding
+
+CONCURRENT_QUERIES = 200
+PROVIDER_CONCURRENCY = 10
+PROVIDER_LATENCY = 0.05
+PROVIDER_MAX_CHUNKS = 64
+
+
+class _LocalEmbeddingProvider:
+    """Stands in for an embedding provider, serving a limited number of requests at a time with a fixed latency."""
+
+    def __init__(self, operations: Counter):
+        self.operations = operations
+        self.slots = threading.Semaphore(PROVIDER_CONCURRENCY)
+
+    def invoke_text_embedding(self, texts: list[str], user=None, input_type=None):
+        self.operations["provider.call"] += 1
+        with self.slots:
+            time.sleep(PROVIDER_LATENCY)
+        return MagicMock(embeddings=[[float(len(text)), 1.0] for text in texts])
+
+
+@pytest.fixture
+def embedding(monkeypatch, local_redis):
+    operations: Counter = Counter()
+    # no query embedding is cached
+    local_redis.get.side_effect = None
+    local_redis.get.return_value = None
+    monkeypatch.setattr(cached_embedding, "redis_client", local_redis)
+    model_instance = MagicMock(provider="openai", model="text-embedding-3-small")
+    model_instance.provider_model_bundle.configuration.tenant_id = "tenant-1"
+    model_instance.model_type_instance.get_model_schema.return_value = MagicMock(
+        model_properties={ModelPropertyKey.MAX_CHUNKS: PROVIDER_MAX_CHUNKS}
+    )
+    model_instance.invoke_text_embedding = _LocalEmbeddingProvider(operations).invoke_text_embedding
+    return CacheEmbedding(model_instance), operations
+
+
+@pytest.mark.parametrize("batch_window_ms", [0, 5])
+def test_embed_query_p99_latency_at_200_concurrent_queries(benchmark, embedding, monkeypatch, batch_window_ms):
+    monkeypatch.setattr(cached_embedding.dify_config, "EMBEDDING_BATCH_WINDOW_MS", batch_window_ms)
+    embedding, operations = embedding
+    latencies: list[float] = []
+    latencies_lock = threading.Lock()
+
+    def query(start: threading.Barrier, i: int) -> None:
+        text = "query " * (i % 7 + 1)
+        start.wait()
+        started_at = time.perf_counter()
+        assert embedding.embed_query(text)[0] == pytest.approx(len(text) / (len(text) ** 2 + 1) ** 0.5)
+        with latencies_lock:
+            latencies.append(time.perf_counter() - started_at)
+
+    def setup():
+        operations.clear()
+        latencies.clear()
+        start = threading.Barrier(CONCURRENT_QUERIES)
+        threads = [threading.Thread(target=query, args=(start, i)) for i in range(CONCURRENT_QUERIES)]
+        return (threads,), {}
+
+    def run(threads: list[threading.Thread]) -> None:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    benchmark.pedantic(run, setup=setup, rounds=3)
+
+    assert len(latencies) == CONCURRENT_QUERIES
+    p99_latency = sorted(latencies)[int(CONCURRENT_QUERIES * 0.99) - 1]
+    benchmark.extra_info.update({**operations, "p99_latency": p99_latency})
+    if batch_window_ms:
+        assert operations["provider.call"] < CONCURRENT_QUERIES / PROVIDER_MAX_CHUNKS * 2
+        assert p99_latency < CONCURRENT_QUERIES / PROVIDER_CONCURRENCY * PROVIDER_LATENCY / 2
+    else:
+        assert operations["provider.call"] == CONCURRENT_QUERIES
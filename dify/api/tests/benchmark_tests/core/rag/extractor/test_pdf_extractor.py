@@ -0,0 +1,79 @@
+import resource
+from pathlib import Path
+
+import pytest
+
+from core.rag.extractor import pdf_extractor
+from core.rag.extractor.pdf_extractor import PdfExtractor
+
+PAGES = 400
+LINES_PER_PAGE = 40
+
+
+def _write_pdf(path: Path, pages: int) -> None:
+    """Write a pdf with a few dozen lines of text on each page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # the page tree, once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page_number in range(pages):
+        lines = b" T* ".join(
+            f"(Clause {page_number}.{line} The parties agree to the terms set out on page {page_number}.) Tj".encode()
+            for line in range(LINES_PER_PAGE)
+        )
+        stream = b"BT /F1 9 Tf 11 TL 40 800 Td " + lines + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    content = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for object_id, obj in enumerate(objects, 1):
+        offsets.append(len(content))
+        content += b"%d 0 obj\n%s\nendobj\n" % (object_id, obj)
+    xref = len(content)
+    content += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    content += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    content += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(content)
+
+
+@pytest.fixture(scope="module")
+def pdf_path(tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp("pdf") / "contract.pdf"
+    _write_pdf(path, PAGES)
+    return str(path)
+
+
+@pytest.mark.parametrize("processes", [0, 4])
+def test_pdf_extraction_pages_per_second(benchmark, pdf_path, monkeypatch, processes):
+    monkeypatch.setattr(pdf_extractor.dify_config, "PDF_EXTRACTION_PROCESSES", processes)
+    monkeypatch.setattr(pdf_extractor, "_executor", None)
+
+    def extract() -> int:
+        page_numbers = [document.metadata["page"] for document in PdfExtractor(pdf_path).load()]
+        assert page_numbers == list(range(PAGES))
+        return len(page_numbers)
+
+    # start the extraction processes outside of the measured rounds
+    first_page = next(PdfExtractor(pdf_path).load())
+    assert "Clause 0.0 The parties agree" in first_page.page_content
+
+    pages = benchmark.pedantic(extract, rounds=3)
+
+    benchmark.extra_info.update(
+        {
+            "pages_per_second": pages / benchmark.stats.stats.mean,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "peak_rss_kb_extraction_processes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        }
+    )
+    if pdf_extractor._executor:
+        pdf_extractor._executor.shutdown()
@@ -0,0 +1,114 @@
+import math
+import threading
+import time
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+
+from core import indexing_runner
+from core.indexing_runner import IndexingRunner
+from core.rag.models.document import Document
+
+PAGES = 200
+SEGMENTS_PER_PAGE = 5
+PAGE_EXTRACTION_LATENCY = 0.002
+EMBEDDING_BATCH_SIZE = 16
+EMBEDDING_LATENCY = 0.03
+PIPELINE_BATCH_SIZE = 20
+
+
+class _FakeEmbeddingModel:
+    """Stands in for an embedding model, taking a fixed time per request of up to EMBEDDING_BATCH_SIZE texts."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = 0.0
+        self.first_indexed_at: float | None = None
+        self.indexed = 0
+
+    def index(self, documents: list[Document]) -> int:
+        time.sleep(EMBEDDING_LATENCY * math.ceil(len(documents) / EMBEDDING_BATCH_SIZE))
+        with self.lock:
+            if self.first_indexed_at is None:
+                self.first_indexed_at = time.perf_counter() - self.started_at
+            self.indexed += len(documents)
+        return len(documents)
+
+
+def _extract_pages():
+    for page in range(PAGES):
+        time.sleep(PAGE_EXTRACTION_LATENCY)
+        yield Document(page_content=f"page {page}", metadata={"page": page})
+
+
+def _split(self, index_processor, dataset, text_docs, doc_language, process_rule) -> list[Document]:
+    return [
+        Document(page_content=f"{text_doc.page_content} segment {i}", metadata={"doc_id": str(uuid.uuid4())})
+        for text_doc in text_docs
+        for i in range(SEGMENTS_PER_PAGE)
+    ]
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    embedding_model = _FakeEmbeddingModel()
+    db = MagicMock()
+    db.session.query.return_value.filter_by.return_value.first.return_value = MagicMock(
+        id="dataset-1", tenant_id="tenant-1", indexing_technique="high_quality"
+    )
+    db.session.query.return_value.filter.return_value.first.return_value.to_dict.return_value = {"mode": "automatic"}
+    monkeypatch.setattr(indexing_runner, "db", db)
+    monkeypatch.setattr(indexing_runner, "DocumentSegmentStatisticsService", MagicMock())
+    monkeypatch.setattr(indexing_runner, "DatasetDocumentStore", MagicMock())
+    monkeypatch.setattr(indexing_runner.dify_config, "INDEXING_PIPELINE_BATCH_SIZE", PIPELINE_BATCH_SIZE)
+    monkeypatch.setattr(IndexingRunner, "_update_document_index_status", MagicMock())
+    monkeypatch.setattr(IndexingRunner, "_process_keyword_index", MagicMock())
+    monkeypatch.setattr(IndexingRunner, "_transform", _split)
+
+    # one stage after another
+    monkeypatch.setattr(IndexingRunner, "_extract", lambda self, *args: list(_extract_pages()))
+    monkeypatch.setattr(IndexingRunner, "_load_segments", MagicMock())
+    monkeypatch.setattr(IndexingRunner, "_process_chunk", lambda self, *args: embedding_model.index(args[2]))
+
+    # pipeline
+    monkeypatch.setattr(IndexingRunner, "_get_extract_setting", staticmethod(lambda dataset_document: MagicMock()))
+    monkeypatch.setattr(indexing_runner.ExtractProcessor, "iter_extract", lambda *args, **kwargs: _extract_pages())
+    monkeypatch.setattr(IndexingRunner, "_save_pipeline_segments", MagicMock())
+    monkeypatch.setattr(IndexingRunner, "_process_pipeline_chunk", lambda self, *args: embedding_model.index(args[2]))
+
+    runner = IndexingRunner()
+    runner.model_manager = MagicMock()
+    return runner, embedding_model
+
+
+@pytest.mark.parametrize("pipeline_enabled", [False, True])
+def test_indexing_wall_time_and_time_to_first_segment(benchmark, runner, monkeypatch, pipeline_enabled):
+    monkeypatch.setattr(indexing_runner.dify_config, "INDEXING_PIPELINE_ENABLED", pipeline_enabled)
+    runner, embedding_model = runner
+    dataset_document = MagicMock(
+        id="document-1", dataset_id="dataset-1", doc_form="text_model", data_source_type="upload_file"
+    )
+    first_indexed_at: list[float] = []
+
+    def setup():
+        embedding_model.first_indexed_at = None
+        embedding_model.indexed = 0
+        embedding_model.started_at = time.perf_counter()
+
+    def run():
+        runner.run([dataset_document])
+        first_indexed_at.append(embedding_model.first_indexed_at)
+
+    benchmark.pedantic(run, setup=setup, rounds=3)
+
+    time_to_first_segment = sum(first_indexed_at) / len(first_indexed_at)
+    benchmark.extra_info.update(
+        {"time_to_first_segment_indexed": time_to_first_segment, "wall_time": benchmark.stats.stats.mean}
+    )
+    assert embedding_model.indexed == PAGES * SEGMENTS_PER_PAGE
+    extraction_time = PAGES * PAGE_EXTRACTION_LATENCY
+    if pipeline_enabled:
+        assert time_to_first_segment < extraction_time
+    else:
+        assert time_to_first_segment > extraction_time
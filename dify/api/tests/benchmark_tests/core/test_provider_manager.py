@@ -0,0 +1,87 @@
+from collections import Counter
+
+import pytest
+
+from core import provider_manager
+from core.helper import model_provider_cache
+from core.helper.model_provider_cache import ProviderConfigurationsCache
+from core.model_runtime.entities.common_entities import I18nObject
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.entities.provider_entities import ConfigurateMethod, ProviderEntity
+from core.provider_manager import ProviderManager
+
+LLM_NODES_PER_RUN = 10
+
+WORKSPACE_QUERIES = [
+    "_get_all_providers",
+    "_get_all_provider_models",
+    "_get_all_preferred_model_providers",
+    "_get_all_provider_model_settings",
+    "_get_all_provider_load_balancing_configs",
+]
+
+
+class _LocalModelProviderFactory:
+    """Stands in for the plugin backed model provider factory."""
+
+    providers = [
+        ProviderEntity(
+            provider=f"langgenius/{name}/{name}",
+            label=I18nObject(en_US=name),
+            supported_model_types=[ModelType.LLM],
+            configurate_methods=[ConfigurateMethod.PREDEFINED_MODEL],
+        )
+        for name in ["openai", "anthropic", "ollama"]
+    ]
+
+    def __init__(self, tenant_id: str):
+        pass
+
+    def get_providers(self) -> list[ProviderEntity]:
+        return self.providers
+
+
+@pytest.fixture
+def workspace(monkeypatch, local_redis):
+    operations: Counter = Counter()
+
+    def count_query(tenant_id: str) -> dict:
+        operations["db.query"] += 1
+        return {}
+
+    for name in [*WORKSPACE_QUERIES, "_get_system_quota_usage"]:
+        monkeypatch.setattr(ProviderManager, name, staticmethod(count_query))
+    monkeypatch.setattr(model_provider_cache, "redis_client", local_redis)
+    monkeypatch.setattr(provider_manager, "ModelProviderFactory", _LocalModelProviderFactory)
+    monkeypatch.setattr(provider_manager, "_provider_configurations", {})
+    return operations
+
+
+@pytest.mark.parametrize(
+    ("cache_ttl", "expected_queries"),
+    [
+        (0, LLM_NODES_PER_RUN * len(WORKSPACE_QUERIES)),
+        # the first node builds the configurations, the others read the hosting quota usage
+        (60, len(WORKSPACE_QUERIES) + LLM_NODES_PER_RUN - 1),
+    ],
+)
+def test_provider_configuration_queries_per_workflow_run(
+    benchmark, workspace, local_redis, monkeypatch, cache_ttl, expected_queries
+):
+    monkeypatch.setattr(provider_manager.dify_config, "PROVIDER_CONFIGURATIONS_CACHE_TTL", cache_ttl)
+    operations = workspace
+
+    def setup():
+        # every run follows a change of the workspace's providers
+        ProviderConfigurationsCache(tenant_id="tenant-1").invalidate()
+        operations.clear()
+        local_redis.reset_mock()
+
+    def workflow_run():
+        for _ in range(LLM_NODES_PER_RUN):
+            assert ProviderManager().get_configurations("tenant-1").get("openai")
+
+    benchmark.pedantic(workflow_run, setup=setup, rounds=5)
+
+    benchmark.extra_info.update({**operations, "redis.get": local_redis.get.call_count})
+    assert operations["db.query"] == expected_queries
@@ -0,0 +1,91 @@
+import os
+from collections import Counter
+
+import pytest
+
+from extensions.ext_storage import Storage
+from extensions.storage.base_storage import BaseStorage
+from extensions.storage.cached_storage import CachedStorage
+from extensions.storage.opendal_storage import OpenDALStorage
+
+IMAGE_SIZE = 2 * 1024 * 1024
+LLM_CALLS_WITH_IMAGE = 20
+VIDEO_SIZE = 64 * 1024 * 1024
+RANGE_SIZE = 1024 * 1024
+
+
+class _CountingOpenDALStorage(OpenDALStorage):
+    """Local filesystem OpenDAL storage, counting the bytes read from it."""
+
+    def __init__(self, root: str, operations: Counter):
+        super().__init__(scheme="fs", root=root)
+        self.operations = operations
+
+    def load_once(self, filename: str) -> bytes:
+        data = super().load_once(filename)
+        self.operations["backend.read"] += 1
+        self.operations["backend.bytes_read"] += len(data)
+        return data
+
+    def load_stream(self, filename: str):
+        self.operations["backend.read"] += 1
+        for chunk in super().load_stream(filename):
+            self.operations["backend.bytes_read"] += len(chunk)
+            yield chunk
+
+    def load_range(self, filename: str, start: int, stop: int):
+        self.operations["backend.read"] += 1
+        for chunk in super().load_range(filename, start, stop):
+            self.operations["backend.bytes_read"] += len(chunk)
+            yield chunk
+
+
+@pytest.fixture
+def backend(tmp_path):
+    operations: Counter = Counter()
+    return _CountingOpenDALStorage(str(tmp_path / "storage"), operations), operations
+
+
+@pytest.mark.parametrize("cache_max_size", [0, 64 * 1024 * 1024])
+def test_image_reads_per_conversation(benchmark, backend, tmp_path, cache_max_size):
+    backend, operations = backend
+    storage = Storage()
+    storage.storage_runner = backend
+    if cache_max_size:
+        storage.storage_runner = CachedStorage(
+            backend, path=str(tmp_path / "cache"), max_size=cache_max_size, prefixes=("upload_files/",)
+        )
+    image = os.urandom(IMAGE_SIZE)
+    storage.save("upload_files/tenant-1/image.png", image)
+
+    def conversation():
+        for _ in range(LLM_CALLS_WITH_IMAGE):
+            assert len(storage.load("upload_files/tenant-1/image.png")) == IMAGE_SIZE
+
+    benchmark.pedantic(conversation, setup=operations.clear, rounds=5)
+
+    benchmark.extra_info.update({"backend.read": operations["backend.read"]})
+    # the cache keeps the image between conversations
+    assert operations["backend.read"] == (0 if cache_max_size else LLM_CALLS_WITH_IMAGE)
+
+
+@pytest.mark.parametrize("range_read", ["backend", "stream"])
+def test_range_read_at_the_end_of_a_video(benchmark, backend, tmp_path, range_read):
+    backend, operations = backend
+    with open(tmp_path / "storage" / "video.mp4", "wb") as video:
+        for _ in range(VIDEO_SIZE // RANGE_SIZE):
+            video.write(os.urandom(RANGE_SIZE))
+    storage = Storage()
+    storage.storage_runner = backend
+    if range_read == "stream":
+        # skip to the range while streaming the file, as backends without range reads do
+        storage.load_range = lambda filename, start, stop: BaseStorage.load_range(backend, filename, start, stop)
+
+    def seek():
+        data = b"".join(storage.load_range("video.mp4", VIDEO_SIZE - RANGE_SIZE, VIDEO_SIZE))
+        assert len(data) == RANGE_SIZE
+
+    benchmark.pedantic(seek, setup=operations.clear, rounds=5)
+
+    benchmark.extra_info.update(operations)
+    assert operations["backend.bytes_read"] == (RANGE_SIZE if range_read == "backend" else VIDEO_SIZE)
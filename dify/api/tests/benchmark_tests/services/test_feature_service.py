@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import feature_service
+from services.billing_service import BillingService
+from services.feature_service import FeatureService
+
+REQUESTS = 200
+BILLING_LATENCY = 0.01
+SUBSCRIPTION_INFO = {
+    "enabled": True,
+    "subscription": {"plan": "team", "interval": "month"},
+    "members": {"size": 3, "limit": 50},
+    "apps": {"size": 12, "limit": 200},
+    "vector_space": {"size": 40, "limit": 20480},
+    "documents_upload_quota": {"size": 100, "limit": 1000},
+    "annotation_quota_limit": {"size": 0, "limit": 10000},
+    "docs_processing": "top-priority",
+    "can_replace_logo": True,
+    "model_load_balancing_enabled": True,
+    "knowledge_rate_limit": {"limit": 1000},
+}
+
+
+@pytest.fixture
+def billing_server(monkeypatch, local_redis):
+    """A local billing service answering subscription info requests after a fixed latency."""
+    operations: Counter = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            operations["billing.request"] += 1
+            time.sleep(BILLING_LATENCY)
+            body = json.dumps(SUBSCRIPTION_INFO).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(BillingService, "base_url", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(feature_service, "redis_client", local_redis)
+    monkeypatch.setattr(feature_service.dify_config, "BILLING_ENABLED", True)
+    yield operations
+    server.shutdown()
+
+
+@pytest.mark.parametrize("cache_ttl", [0, 30])
+def test_added_latency_per_request(benchmark, billing_server, monkeypatch, cache_ttl):
+    monkeypatch.setattr(feature_service.dify_config, "FEATURES_CACHE_TTL", cache_ttl)
+    operations = billing_server
+
+    def setup():
+        # the first request follows a subscription event
+        FeatureService.invalidate_features("tenant-1")
+        operations.clear()
+
+    def requests():
+        for _ in range(REQUESTS):
+            # the checks of the decorators of a console request
+            assert FeatureService.get_features("tenant-1").billing.subscription.plan == "team"
+
+    benchmark.pedantic(requests, setup=setup, rounds=3)
+
+    benchmark.extra_info.update({**operations, "added_latency_per_request": benchmark.stats.stats.mean / REQUESTS})
+    assert operations["billing.request"] == (1 if cache_ttl else REQUESTS)
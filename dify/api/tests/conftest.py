@@ -0,0 +1,29 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def local_redis() -> MagicMock:
+    """A redis client keeping its values in memory, whose calls can be asserted like any mock."""
+    values: dict[str, bytes] = {}
+
+    def setex(key: str, seconds: int, value) -> None:
+        values[key] = value if isinstance(value, bytes) else str(value).encode()
+
+    def delete(*keys: str) -> int:
+        return sum(values.pop(key, None) is not None for key in keys)
+
+    def incr(key: str, amount: int = 1) -> int:
+        value = int(values.get(key, b"0")) + amount
+        values[key] = str(value).encode()
+        return value
+
+    redis = MagicMock()
+    redis.get.side_effect = values.get
+    redis.setex.side_effect = setex
+    redis.delete.side_effect = delete
+    redis.incr.side_effect = incr
+    # the commands of a pipeline run right away
+    redis.pipeline.return_value = redis
+    return redis
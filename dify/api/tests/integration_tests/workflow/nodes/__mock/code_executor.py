@@ -1,5 +1,5 @@
 import os
-from typing import Literal
+from typing import Any, Literal
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
@@ -12,7 +12,9 @@ MOCK = os.getenv("MOCK_SWITCH", "false") == "true"
 
 class MockedCodeExecutor:
     @classmethod
-    def invoke(cls, language: Literal["python3", "javascript", "jinja2"], code: str, inputs: dict) -> dict:
+    def invoke(
+        cls, language: Literal["python3", "javascript", "jinja2"], code: str, inputs: dict, **kwargs: Any
+    ) -> dict:
         # invoke directly
         match language:
             case CodeLanguage.PYTHON3:
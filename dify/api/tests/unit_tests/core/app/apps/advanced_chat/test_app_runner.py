@@ -0,0 +1,133 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from core.app.apps.advanced_chat import app_runner
+from core.app.apps.advanced_chat.app_runner import AdvancedChatAppRunner
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.variables import StringVariable
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_engine import GraphEngine
+from core.workflow.nodes.variable_assigner.v1 import VariableAssignerNode
+from core.workflow.nodes.variable_assigner.v1.node_data import WriteMode
+from models.enums import UserFrom
+from models.workflow import WorkflowType
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = MagicMock()
+    monkeypatch.setattr(app_runner, "Session", MagicMock(return_value=MagicMock(__enter__=lambda _: session)))
+    monkeypatch.setattr(app_runner, "db", MagicMock())
+    return session
+
+
+@pytest.fixture
+def runner() -> AdvancedChatAppRunner:
+    conversation = MagicMock(id="conversation-1", app_id="app-1")
+    return AdvancedChatAppRunner(
+        application_generate_entity=MagicMock(),
+        queue_manager=MagicMock(),
+        conversation=conversation,
+        message=MagicMock(),
+        dialogue_count=1,
+    )
+
+
+def _variable(id: str, value: str) -> StringVariable:
+    return StringVariable(id=id, name=f"name-{id}", value=value)
+
+
+def test_save_conversation_variables_upserts_changed_variables_once(session, runner):
+    unchanged, changed = _variable("1", "same"), _variable("2", "old")
+    runner._stored_conversation_variables = {
+        unchanged.id: unchanged.model_dump_json(),
+        changed.id: changed.model_dump_json(),
+    }
+    variable_pool = VariablePool(conversation_variables=[unchanged, changed])
+    variable_pool.add(("conversation", changed.name), changed.model_copy(update={"value": "new"}))
+
+    runner._save_conversation_variables(variable_pool)
+    runner._save_conversation_variables(variable_pool)
+
+    (call,) = session.execute.call_args_list
+    stmt = call.args[0].compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (id, conversation_id) DO UPDATE" in str(stmt)
+    assert stmt.params["id_m0"] == "2"
+    assert '"value":"new"' in stmt.params["data_m0"]
+    assert "id_m1" not in stmt.params
+    session.commit.assert_called_once()
+
+
+def test_save_conversation_variables_creates_variables_of_new_conversation(session, runner):
+    runner._stored_conversation_variables = {}
+    variable_pool = VariablePool(conversation_variables=[_variable("1", "a"), _variable("2", "b")])
+
+    runner._save_conversation_variables(variable_pool)
+
+    stmt = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert {stmt.params["id_m0"], stmt.params["id_m1"]} == {"1", "2"}
+
+
+def test_save_conversation_variables_skips_runs_without_conversation_variables(session, runner):
+    runner._save_conversation_variables(VariablePool(conversation_variables=[_variable("1", "a")]))
+
+    session.execute.assert_not_called()
+
+
+def test_save_conversation_variables_keeps_assignments_in_parallel_iterations(session, runner):
+    variable = _variable("1", "old")
+    runner._stored_conversation_variables = {variable.id: variable.model_dump_json()}
+    variable_pool = VariablePool(
+        system_variables={SystemVariableKey.CONVERSATION_ID: "conversation-1"},
+        conversation_variables=[variable],
+    )
+    variable_pool.add(("input", "value"), "new")
+    graph_config = {
+        "edges": [{"id": "start-assigner", "source": "start", "target": "assigner"}],
+        "nodes": [{"data": {"type": "start"}, "id": "start"}, {"data": {"type": "assigner"}, "id": "assigner"}],
+    }
+    graph_engine = GraphEngine(
+        tenant_id="tenant-1",
+        app_id="app-1",
+        workflow_type=WorkflowType.CHAT,
+        workflow_id="workflow-1",
+        graph_config=graph_config,
+        user_id="user-1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.WEB_APP,
+        call_depth=0,
+        graph=Graph.init(graph_config=graph_config),
+        variable_pool=variable_pool,
+        max_execution_steps=500,
+        max_execution_time=1200,
+        conversation_variable_updates=runner._conversation_variable_updates,
+    )
+    # Parallel iterations run on copies of the graph engine with their own copy of the variable pool.
+    graph_engine_copy = graph_engine.create_copy()
+    node = VariableAssignerNode(
+        id="assigner-run",
+        graph_init_params=graph_engine_copy.init_params,
+        graph=graph_engine_copy.graph,
+        graph_runtime_state=graph_engine_copy.graph_runtime_state,
+        config={
+            "id": "assigner",
+            "data": {
+                "title": "assigner",
+                "assigned_variable_selector": ["conversation", variable.name],
+                "write_mode": WriteMode.OVER_WRITE.value,
+                "input_variable_selector": ["input", "value"],
+            },
+        },
+    )
+
+    list(node.run())
+    runner._save_conversation_variables(variable_pool)
+
+    assert variable_pool.get(["conversation", variable.name]).value == "old"
+    stmt = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert stmt.params["id_m0"] == "1"
+    assert '"value":"new"' in stmt.params["data_m0"]
@@ -0,0 +1,96 @@
+from collections.abc import Iterator
+
+import pytest
+
+from core.app.apps.base_app_generator import BaseAppGenerator
+from core.app.apps.event_stream_coalescer import EventStreamCoalescer
+
+
+def _message(answer: str, message_id: str = "message-1") -> dict:
+    return {
+        "event": "message",
+        "conversation_id": "conversation-1",
+        "message_id": message_id,
+        "created_at": 1700000000,
+        "task_id": "task-1",
+        "id": message_id,
+        "answer": answer,
+    }
+
+
+def _text_chunk(text: str, selector: list[str]) -> dict:
+    return {
+        "event": "text_chunk",
+        "workflow_run_id": "run-1",
+        "task_id": "task-1",
+        "data": {"text": text, "from_variable_selector": selector},
+    }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Let each message arrive at the next of the given points in time."""
+
+    def set_arrivals(*arrivals: float) -> None:
+        times: Iterator[float] = iter([0.0, *arrivals])
+        monkeypatch.setattr("core.app.apps.event_stream_coalescer.time.perf_counter", lambda: next(times))
+
+    return set_arrivals
+
+
+def test_merges_fast_chunks_and_flushes_on_other_events(clock):
+    clock(0.001, 0.002, 0.003, 0.004)
+    coalescer = EventStreamCoalescer(window=0.04, max_bytes=4096)
+    messages = [_message("Hel"), _message("lo"), _message(" world"), {"event": "message_end", "id": "message-1"}]
+
+    result = list(coalescer.coalesce(iter(messages)))
+
+    assert [message.get("answer") for message in result] == ["Hello world", None]
+    assert result[0] == _message("Hello world")
+    assert messages[0]["answer"] == "Hel"
+
+
+def test_slow_chunks_are_not_held_back(clock):
+    clock(0.1, 0.2)
+    coalescer = EventStreamCoalescer(window=0.04, max_bytes=4096)
+
+    result = list(coalescer.coalesce(iter([_message("a"), _message("b")])))
+
+    assert [message["answer"] for message in result] == ["a", "b"]
+
+
+def test_flushes_when_byte_budget_is_reached(clock):
+    clock(0.001, 0.002, 0.003)
+    coalescer = EventStreamCoalescer(window=0.04, max_bytes=4)
+
+    result = list(coalescer.coalesce(iter([_message("ab"), _message("cd"), _message("ef")])))
+
+    assert [message["answer"] for message in result] == ["abcd", "ef"]
+
+
+def test_only_merges_chunks_of_the_same_variable(clock):
+    clock(0.001, 0.002, 0.003)
+    coalescer = EventStreamCoalescer(window=0.04, max_bytes=4096)
+    messages = [
+        _text_chunk("a", ["llm", "text"]),
+        _text_chunk("b", ["llm", "text"]),
+        _text_chunk("c", ["llm2", "text"]),
+    ]
+
+    result = list(coalescer.coalesce(iter(messages)))
+
+    assert [message["data"]["text"] for message in result] == ["ab", "c"]
+    assert messages[0]["data"]["text"] == "a"
+
+
+def test_convert_to_event_stream_coalesces_when_enabled(clock, monkeypatch):
+    monkeypatch.setattr("core.app.apps.base_app_generator.dify_config.SSE_COALESCING_ENABLED", True)
+    clock(0.001, 0.002, 0.003)
+
+    stream = BaseAppGenerator.convert_to_event_stream(iter([_message("a"), _message("é"), "ping"]))
+
+    assert list(stream) == [
+        'data: {"event":"message","conversation_id":"conversation-1","message_id":"message-1",'
+        '"created_at":1700000000,"task_id":"task-1","id":"message-1","answer":"aé"}\n\n',
+        "event: ping\n\n",
+    ]
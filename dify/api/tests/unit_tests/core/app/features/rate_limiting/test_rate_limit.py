@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.features.rate_limiting import rate_limit
+from core.app.features.rate_limiting.rate_limit import RateLimit
+from core.errors.error import AppInvokeQuotaExceededError
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = MagicMock()
+    monkeypatch.setattr(rate_limit, "redis_client", redis)
+    monkeypatch.setattr(RateLimit, "_instance_dict", {})
+    return redis
+
+
+def test_enter_admits_with_one_script_call(redis):
+    redis.register_script.return_value.return_value = 1
+    limit = RateLimit("app-1", 2)
+    redis.reset_mock()
+
+    request_id = limit.enter("request-1")
+
+    assert request_id == "request-1"
+    script = redis.register_script.return_value
+    script.assert_called_once()
+    assert script.call_args.kwargs["keys"] == [limit.active_requests_key]
+    assert script.call_args.kwargs["args"][0] == "request-1"
+    redis.hlen.assert_not_called()
+
+
+def test_enter_rejects_when_script_denies(redis):
+    redis.register_script.return_value.return_value = 0
+    limit = RateLimit("app-1", 2)
+
+    with pytest.raises(AppInvokeQuotaExceededError):
+        limit.enter()
+
+
+def test_exit_releases_request(redis):
+    limit = RateLimit("app-1", 2)
+
+    limit.exit("request-1")
+
+    redis.zrem.assert_called_once_with(limit.active_requests_key, "request-1")
+
+
+def test_disabled_limit_skips_redis(redis):
+    limit = RateLimit("app-2", 0)
+
+    assert limit.enter() == RateLimit._UNLIMITED_REQUEST_ID
+    redis.register_script.assert_not_called()
@@ -0,0 +1,88 @@
+import base64
+from unittest.mock import MagicMock
+
+import pytest
+from cachetools import LRUCache
+
+from core.file import file_manager
+from core.file.enums import FileTransferMethod, FileType
+from core.file.models import File
+
+IMAGE = b"\x89PNG image"
+ENCODED_IMAGE = base64.b64encode(IMAGE).decode()
+
+
+@pytest.fixture
+def storage(monkeypatch) -> MagicMock:
+    storage = MagicMock()
+    storage.load.return_value = IMAGE
+    monkeypatch.setattr(file_manager, "storage", storage)
+    return storage
+
+
+def _use_cache(monkeypatch, max_size: int) -> LRUCache:
+    monkeypatch.setattr(file_manager.dify_config, "MULTIMODAL_ENCODING_CACHE_MAX_SIZE", max_size)
+    encoded_strings: LRUCache = LRUCache(maxsize=max_size or 1, getsizeof=len)
+    monkeypatch.setattr(file_manager, "_encoded_strings", encoded_strings)
+    return encoded_strings
+
+
+def _file(transfer_method: FileTransferMethod = FileTransferMethod.LOCAL_FILE) -> File:
+    return File(
+        tenant_id="tenant-1",
+        type=FileType.IMAGE,
+        transfer_method=transfer_method,
+        related_id="upload-file-1" if transfer_method != FileTransferMethod.REMOTE_URL else None,
+        remote_url="https://example.com/image.png" if transfer_method == FileTransferMethod.REMOTE_URL else None,
+        filename="image.png",
+        extension=".png",
+        mime_type="image/png",
+        size=len(IMAGE),
+        storage_key="upload_files/tenant-1/image.png",
+    )
+
+
+def test_get_encoded_string_reuses_the_encoding_of_a_file(monkeypatch, storage):
+    encoded_strings = _use_cache(monkeypatch, 1024)
+
+    assert file_manager._get_encoded_string(_file()) == ENCODED_IMAGE
+    assert file_manager._get_encoded_string(_file()) == ENCODED_IMAGE
+
+    storage.load.assert_called_once_with("upload_files/tenant-1/image.png", stream=False)
+    assert list(encoded_strings.keys()) == [("upload-file-1", "upload_files/tenant-1/image.png")]
+
+
+def test_get_encoded_string_does_not_cache_remote_files(monkeypatch, storage):
+    encoded_strings = _use_cache(monkeypatch, 1024)
+    get = MagicMock(return_value=MagicMock(content=IMAGE))
+    monkeypatch.setattr(file_manager.ssrf_proxy, "get", get)
+
+    assert file_manager._get_encoded_string(_file(FileTransferMethod.REMOTE_URL)) == ENCODED_IMAGE
+    assert file_manager._get_encoded_string(_file(FileTransferMethod.REMOTE_URL)) == ENCODED_IMAGE
+
+    # the content behind a url may change
+    assert get.call_count == 2
+    assert len(encoded_strings) == 0
+
+
+def test_get_encoded_string_skips_encodings_larger_than_the_cache(monkeypatch, storage):
+    encoded_strings = _use_cache(monkeypatch, len(ENCODED_IMAGE) - 1)
+
+    assert file_manager._get_encoded_string(_file()) == ENCODED_IMAGE
+    assert file_manager._get_encoded_string(_file()) == ENCODED_IMAGE
+
+    assert storage.load.call_count == 2
+    assert len(encoded_strings) == 0
+
+
+def test_get_encoded_string_without_cache(monkeypatch, storage):
+    _use_cache(monkeypatch, 0)
+    # a cache that still has room is not used once disabled
+    encoded_strings: LRUCache = LRUCache(maxsize=1024, getsizeof=len)
+    monkeypatch.setattr(file_manager, "_encoded_strings", encoded_strings)
+
+    assert file_manager._get_encoded_string(_file()) == ENCODED_IMAGE
+    assert file_manager._get_encoded_string(_file()) == ENCODED_IMAGE
+
+    assert storage.load.call_count == 2
+    assert len(encoded_strings) == 0
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.helper.code_executor import code_executor
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
+
+CODE = "def main(a: int) -> dict:\n    return {'b': a + 1}\n"
+
+
+@pytest.fixture
+def batching(monkeypatch):
+    monkeypatch.setattr(code_executor.dify_config, "CODE_EXECUTION_BATCH_WINDOW_MS", 50)
+    monkeypatch.setattr(code_executor.dify_config, "CODE_EXECUTION_BATCH_MAX_SIZE", 32)
+
+
+def test_runner_script_is_assembled_from_cached_parts():
+    runner, _ = Python3TemplateTransformer.transform_caller(CODE, {"a": 1})
+
+    assert CODE in runner
+    assert Python3TemplateTransformer.serialize_inputs({"a": 1}) in runner
+    assert "{{code}}" not in runner
+    assert "{{inputs}}" not in runner
+
+
+def test_execute_workflow_code_template_batch(monkeypatch):
+    execute_code = MagicMock(return_value='<<RESULT>>[{"b": 2}, {"b": 3}]<<RESULT>>')
+    monkeypatch.setattr(CodeExecutor, "execute_code", execute_code)
+
+    results = CodeExecutor.execute_workflow_code_template_batch(CodeLanguage.PYTHON3, CODE, [{"a": 1}, {"a": 2}])
+
+    assert results == [{"b": 2}, {"b": 3}]
+    runner = execute_code.call_args.args[2]
+    assert Python3TemplateTransformer.serialize_inputs([{"a": 1}, {"a": 2}]) in runner
+    with pytest.raises(CodeExecutionError, match="Unsupported language"):
+        CodeExecutor.execute_workflow_code_template_batch(CodeLanguage.JINJA2, "{{ a }}", [{"a": 1}])
+
+
+def _execute(a: int, tenant_id: str = "tenant-1", workflow_run_id: str = "run-1"):
+    return CodeExecutor.execute_workflow_code_template(
+        CodeLanguage.PYTHON3, CODE, {"a": a}, tenant_id=tenant_id, workflow_run_id=workflow_run_id
+    )
+
+
+def test_concurrent_executions_of_the_same_code_run_in_one_batch(batching, monkeypatch):
+    execute_batch = MagicMock(side_effect=lambda language, code, inputs_list: [{"b": i["a"] + 1} for i in inputs_list])
+    monkeypatch.setattr(CodeExecutor, "execute_workflow_code_template_batch", execute_batch)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(_execute, range(4)))
+
+    assert results == [{"b": 1}, {"b": 2}, {"b": 3}, {"b": 4}]
+    execute_batch.assert_called_once()
+    assert CodeExecutor._batcher._open_batches == {}
+
+
+def test_executions_of_other_tenants_and_workflow_runs_are_not_batched_together(batching, monkeypatch):
+    execute_batch = MagicMock()
+    monkeypatch.setattr(CodeExecutor, "execute_workflow_code_template_batch", execute_batch)
+    execute_alone = MagicMock(side_effect=lambda language, code, inputs: {"b": inputs["a"] + 1})
+    monkeypatch.setattr(CodeExecutor, "_execute_alone", execute_alone)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(
+            executor.map(_execute, range(3), ["tenant-1", "tenant-2", "tenant-1"], ["run-1", "run-2", "run-3"])
+        )
+    # executions outside of a workflow run are never batched
+    results.append(CodeExecutor.execute_workflow_code_template(CodeLanguage.PYTHON3, CODE, {"a": 3}))
+
+    assert results == [{"b": 1}, {"b": 2}, {"b": 3}, {"b": 4}]
+    execute_batch.assert_not_called()
+    assert execute_alone.call_count == 4
+
+
+def test_failed_batch_executes_each_input_alone(batching, monkeypatch):
+    monkeypatch.setattr(
+        CodeExecutor, "execute_workflow_code_template_batch", MagicMock(side_effect=CodeExecutionError("boom"))
+    )
+    execute_alone = MagicMock(side_effect=lambda language, code, inputs: {"b": inputs["a"] + 1})
+    monkeypatch.setattr(CodeExecutor, "_execute_alone", execute_alone)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(_execute, range(2)))
+
+    assert results == [{"b": 1}, {"b": 2}]
+    assert execute_alone.call_count == 2
+
+
+def test_client_is_shared():
+    assert CodeExecutor._get_client() is CodeExecutor._get_client()
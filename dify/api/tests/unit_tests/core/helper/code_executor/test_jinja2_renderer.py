@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.helper.code_executor import code_executor
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2 import jinja2_renderer
+from core.helper.code_executor.jinja2.jinja2_renderer import Jinja2Renderer, Jinja2RenderError
+
+
+@pytest.fixture(autouse=True)
+def in_process_rendering(monkeypatch):
+    monkeypatch.setattr(jinja2_renderer.dify_config, "JINJA2_IN_PROCESS_RENDERING_ENABLED", True)
+    monkeypatch.setattr(jinja2_renderer.dify_config, "JINJA2_IN_PROCESS_RENDERING_TIMEOUT", 1.0)
+    monkeypatch.setattr(jinja2_renderer.dify_config, "JINJA2_IN_PROCESS_RENDERING_MAX_OUTPUT_LENGTH", 1000)
+
+
+def test_render_template():
+    template = "{% for item in items %}{{ item.name | upper }}{% if not loop.last %}, {% endif %}{% endfor %}"
+
+    assert Jinja2Renderer.render(template, {"items": [{"name": "a"}, {"name": "b"}]}) == "A, B"
+    assert Jinja2Renderer.render(template, {"items": []}) == ""
+
+
+def test_render_refuses_unsafe_templates():
+    with pytest.raises(Jinja2RenderError, match="SecurityError"):
+        Jinja2Renderer.render("{{ ''.__class__.__mro__ }}", {})
+
+
+def test_render_limits_output_length():
+    with pytest.raises(Jinja2RenderError, match="exceeds 1000 characters"):
+        Jinja2Renderer.render("{% for i in range(100) %}{{ text }}{% endfor %}", {"text": "x" * 20})
+
+
+def test_render_limits_time(monkeypatch):
+    monkeypatch.setattr(jinja2_renderer.dify_config, "JINJA2_IN_PROCESS_RENDERING_TIMEOUT", 0.01)
+
+    with pytest.raises(Jinja2RenderError, match="exceeds 0.01 seconds"):
+        Jinja2Renderer.render(
+            "{% for i in range(100000) %}{% for j in range(100000) %}{% set x = i.real %}{% endfor %}{% endfor %}", {}
+        )
+
+
+def test_render_limits_power_and_multiplication():
+    assert Jinja2Renderer.render("{{ (a ** b) % 10 }} {{ 'ab' * 3 }}", {"a": 9, "b": 3}) == "9 ababab"
+
+    with pytest.raises(Jinja2RenderError, match="Result of \\*\\* exceeds 1000 digits"):
+        Jinja2Renderer.render("{{ (a ** b) % 10 }}", {"a": 9, "b": 30000000})
+    with pytest.raises(Jinja2RenderError, match="Result of \\* exceeds 1000 items"):
+        Jinja2Renderer.render("{{ ('x' * n) | length }}", {"n": 10**9})
+    with pytest.raises(Jinja2RenderError, match="Result of \\* exceeds 1000 items"):
+        Jinja2Renderer.render("{{ (n * [0]) | length }}", {"n": 10**9})
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ ('x' | center(200000000)) | length }}",
+        "{{ 'x'.ljust(200000000) | length }}",
+        "{{ ('%200000000d' % 1) | length }}",
+        "{{ ('%*d' % (200000000, 1)) | length }}",
+        "{{ ('%200000000d' | format(1)) | length }}",
+        "{{ '{:>200000000}'.format(1) | length }}",
+        "{{ ('a' | indent(200000000, true)) | length }}",
+    ],
+)
+def test_render_limits_padding_width(template):
+    with pytest.raises(Jinja2RenderError, match="exceeds 1000 characters"):
+        Jinja2Renderer.render(template, {})
+
+
+def test_render_formats_and_pads_within_limits():
+    template = "{{ '%3d|%-3s|' % (7, 'a') }}{{ '%(n)2d' | format(n=5) }}{{ '{:>3}'.format(1) }}{{ 'x' | center(3) }}"
+
+    assert Jinja2Renderer.render(template, {}) == "  7|a  | 5  1 x "
+
+
+def test_render_refuses_infinite_recursion():
+    with pytest.raises(Jinja2RenderError, match="RecursionError"):
+        Jinja2Renderer.render("{% macro f() %}{{ f() }}{% endmacro %}{{ f() }}", {})
+
+
+def test_execute_workflow_code_template_renders_jinja2_in_process(monkeypatch):
+    execute_code = MagicMock()
+    monkeypatch.setattr(CodeExecutor, "execute_code", execute_code)
+
+    result = CodeExecutor.execute_workflow_code_template(CodeLanguage.JINJA2, "Hello {{ name }}", {"name": "Dify"})
+
+    assert result == {"result": "Hello Dify"}
+    execute_code.assert_not_called()
+    with pytest.raises(CodeExecutionError, match="UndefinedError"):
+        CodeExecutor.execute_workflow_code_template(CodeLanguage.JINJA2, "{{ a.b.c }}", {})
+
+
+def test_execute_workflow_code_template_uses_sandbox_by_default(monkeypatch):
+    monkeypatch.setattr(code_executor.dify_config, "JINJA2_IN_PROCESS_RENDERING_ENABLED", False)
+    execute_code = MagicMock(return_value="<<RESULT>>Hello Dify<<RESULT>>")
+    monkeypatch.setattr(CodeExecutor, "execute_code", execute_code)
+
+    result = CodeExecutor.execute_workflow_code_template(CodeLanguage.JINJA2, "Hello {{ name }}", {"name": "Dify"})
+
+    assert result == {"result": "Hello Dify"}
+    execute_code.assert_called_once()
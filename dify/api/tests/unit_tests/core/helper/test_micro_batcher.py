@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from core.helper.micro_batcher import MicroBatcher
+
+
+def _run(batcher: MicroBatcher, key: str, items: list[int], run_batch: MagicMock, run_alone: MagicMock) -> list[int]:
+    return batcher.run(key, items, run_batch=run_batch, run_alone=run_alone, window_ms=50, max_size=100)
+
+
+def test_concurrent_calls_with_the_same_key_run_in_one_batch():
+    batcher: MicroBatcher[int, int] = MicroBatcher("test")
+    run_batch = MagicMock(side_effect=lambda items: [item * 10 for item in items])
+    run_alone = MagicMock(side_effect=lambda items: [item * 10 for item in items])
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(lambda items: _run(batcher, "a", items, run_batch, run_alone), [[1, 2], [3], [4]]))
+
+    assert results == [[10, 20], [30], [40]]
+    run_batch.assert_called_once()
+    run_alone.assert_not_called()
+    assert batcher._open_batches == {}
+
+
+def test_calls_with_other_keys_run_alone():
+    batcher: MicroBatcher[int, int] = MicroBatcher("test")
+    run_batch = MagicMock()
+    run_alone = MagicMock(side_effect=lambda items: [item * 10 for item in items])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda key: _run(batcher, key, [1], run_batch, run_alone), ["a", "b"]))
+
+    assert results == [[10], [10]]
+    run_batch.assert_not_called()
+    assert run_alone.call_count == 2
+
+
+def test_failed_batch_runs_each_call_alone():
+    batcher: MicroBatcher[int, int] = MicroBatcher("test")
+    run_batch = MagicMock(side_effect=RuntimeError("boom"))
+    run_alone = MagicMock(side_effect=lambda items: [item * 10 for item in items])
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda items: _run(batcher, "a", items, run_batch, run_alone), [[1], [2]]))
+
+    assert results == [[10], [20]]
+    assert run_alone.call_count == 2
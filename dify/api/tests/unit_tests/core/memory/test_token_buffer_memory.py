@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.memory import token_buffer_memory
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities import AssistantPromptMessage, UserPromptMessage
+from models.model import AppMode
+
+
+def _message(index: int, parent_message_id: str | None) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=f"message-{index}",
+        query=f"question {index}",
+        answer=f"answer {index}",
+        created_at=index,
+        workflow_run_id=None,
+        parent_message_id=parent_message_id,
+        answer_tokens=10,
+    )
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = MagicMock()
+    messages = [_message(3, "message-2"), _message(2, "message-1"), _message(1, None)]
+    db.session.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = (
+        messages
+    )
+    db.session.query.return_value.filter.return_value.all.return_value = []
+    monkeypatch.setattr(token_buffer_memory, "db", db)
+    return db
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    cached: dict[str, int] = {}
+    redis = MagicMock()
+    redis.hmget.side_effect = lambda key, fields: [cached.get(field) for field in fields]
+    redis.pipeline.return_value.hset.side_effect = lambda key, mapping: cached.update(mapping)
+    monkeypatch.setattr(token_buffer_memory, "redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def memory(monkeypatch) -> TokenBufferMemory:
+    monkeypatch.setattr(token_buffer_memory.dify_config, "PLUGIN_BASED_TOKEN_COUNTING_ENABLED", True)
+    conversation = MagicMock(id="conversation-1", mode=AppMode.CHAT)
+    model_instance = MagicMock(provider="openai", model="gpt-4o")
+    model_instance.get_llm_num_tokens.side_effect = lambda prompt_messages: 10 * len(prompt_messages)
+    return TokenBufferMemory(conversation=conversation, model_instance=model_instance)
+
+
+def test_history_reads_files_with_a_single_query(db, redis, memory):
+    prompt_messages = memory.get_history_prompt_messages()
+
+    assert [(type(m), m.content) for m in prompt_messages] == [
+        (UserPromptMessage, "question 1"),
+        (AssistantPromptMessage, "answer 1"),
+        (UserPromptMessage, "question 2"),
+        (AssistantPromptMessage, "answer 2"),
+        (UserPromptMessage, "question 3"),
+        (AssistantPromptMessage, "answer 3"),
+    ]
+    assert db.session.query.return_value.filter.return_value.all.call_count == 1
+
+
+def test_history_tokens_are_counted_once_per_message(db, redis, memory):
+    memory.get_history_prompt_messages(max_token_limit=1000)
+    memory.model_instance.get_llm_num_tokens.assert_called_once()
+    assert sum(int(tokens) for tokens in redis.pipeline.return_value.hset.call_args.kwargs["mapping"].values()) == 60
+
+    memory.model_instance.get_llm_num_tokens.reset_mock()
+    memory.get_history_prompt_messages(max_token_limit=1000)
+    memory.model_instance.get_llm_num_tokens.assert_not_called()
+
+
+def test_history_is_pruned_to_the_token_limit(db, redis, memory):
+    prompt_messages = memory.get_history_prompt_messages(max_token_limit=25)
+
+    assert [m.content for m in prompt_messages] == ["question 3", "answer 3"]
+    memory.model_instance.get_llm_num_tokens.assert_called_with(prompt_messages)
+
+
+def test_history_tokens_are_not_counted_when_token_counting_is_disabled(db, redis, memory, monkeypatch):
+    monkeypatch.setattr(token_buffer_memory.dify_config, "PLUGIN_BASED_TOKEN_COUNTING_ENABLED", False)
+
+    prompt_messages = memory.get_history_prompt_messages(max_token_limit=25)
+
+    assert len(prompt_messages) == 6
+    memory.model_instance.get_llm_num_tokens.assert_not_called()
+    redis.hmget.assert_not_called()
@@ -0,0 +1,39 @@
+import pytest
+
+from core.moderation.keywords.keywords import KeywordsModeration
+
+
+@pytest.fixture
+def moderation() -> KeywordsModeration:
+    config = {
+        "keywords": "Secret\n\nforbidden word",
+        "inputs_config": {"enabled": True, "preset_response": "input blocked"},
+        "outputs_config": {"enabled": True, "preset_response": "output blocked"},
+    }
+    return KeywordsModeration(app_id="app-1", tenant_id="tenant-1", config=config)
+
+
+def test_moderation_for_inputs_matches_keywords_case_insensitively(moderation):
+    assert not moderation.moderation_for_inputs({"name": "nothing"}, query="to see").flagged
+
+    result = moderation.moderation_for_inputs({"name": "a SECRET"}, query="")
+    assert result.flagged
+    assert result.preset_response == "input blocked"
+
+    assert moderation.moderation_for_inputs({}, query="the Forbidden Word").flagged
+
+
+def test_moderation_for_outputs_finds_keywords_across_appended_text(moderation):
+    assert not moderation.moderation_for_outputs("this is a forbidden").flagged
+    assert not moderation.moderation_for_outputs("this is a forbidden wo").flagged
+
+    result = moderation.moderation_for_outputs("this is a forbidden word")
+    assert result.flagged
+    assert result.preset_response == "output blocked"
+
+
+def test_moderation_for_outputs_scans_other_texts_completely(moderation):
+    assert not moderation.moderation_for_outputs("harmless text").flagged
+
+    assert moderation.moderation_for_outputs("secret text").flagged
+    assert moderation.moderation_for_outputs("secret text, continued").flagged
@@ -0,0 +1,70 @@
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.moderation import output_moderation
+from core.moderation.base import ModerationAction, ModerationOutputsResult
+from core.moderation.output_moderation import ModerationRule, OutputModeration
+
+
+class _InlineExecutor:
+    def submit(self, fn, /, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+@pytest.fixture
+def handler(app: Flask, monkeypatch) -> OutputModeration:
+    monkeypatch.setattr(output_moderation.dify_config, "MODERATION_BUFFER_SIZE", 5)
+    monkeypatch.setattr(output_moderation, "_get_executor", _InlineExecutor)
+    return OutputModeration(
+        tenant_id="tenant-1",
+        app_id="app-1",
+        rule=ModerationRule(type="keywords", config={}),
+        queue_manager=MagicMock(spec=AppQueueManager),
+    )
+
+
+def test_moderates_only_after_buffer_size_of_new_text(handler, monkeypatch):
+    moderation = MagicMock(return_value=None)
+    monkeypatch.setattr(OutputModeration, "moderation", moderation)
+
+    for token in ["ab", "cd", "ef", "g", "hijk"]:
+        handler.append_new_token(token)
+
+    assert [call.kwargs["moderation_buffer"] for call in moderation.call_args_list] == ["abcdef", "abcdefghijk"]
+    assert not handler._moderating
+
+
+def test_direct_output_stops_moderation(handler, monkeypatch):
+    moderation = MagicMock(
+        return_value=ModerationOutputsResult(
+            flagged=True, action=ModerationAction.DIRECT_OUTPUT, preset_response="blocked"
+        )
+    )
+    monkeypatch.setattr(OutputModeration, "moderation", moderation)
+
+    for token in ["hello", " world"]:
+        handler.append_new_token(token)
+
+    assert handler.should_direct_output()
+    assert handler.get_final_output() == "blocked"
+    moderation.assert_called_once()
+    handler.queue_manager.publish.assert_called_once()
+
+
+def test_pending_worker_picks_up_new_text(handler, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(
+        output_moderation, "_get_executor", lambda: MagicMock(submit=lambda fn, **kwargs: submitted.append(kwargs))
+    )
+    moderation = MagicMock(return_value=None)
+    monkeypatch.setattr(OutputModeration, "moderation", moderation)
+
+    handler.append_new_token("hello")
+    handler.append_new_token(" world")
+    assert len(submitted) == 1
+
+    handler.worker(**submitted[0])
+    moderation.assert_called_once_with(tenant_id="tenant-1", app_id="app-1", moderation_buffer="hello world")
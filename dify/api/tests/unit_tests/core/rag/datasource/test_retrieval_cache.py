@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.datasource import retrieval_cache, retrieval_service
+from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.models.document import Document
+
+
+@pytest.fixture
+def retrieve(monkeypatch, local_redis):
+    monkeypatch.setattr(retrieval_cache, "redis_client", local_redis)
+    monkeypatch.setattr(retrieval_service.dify_config, "RETRIEVAL_RESULT_CACHE_TTL", 600)
+    monkeypatch.setattr(RetrievalService, "_get_dataset", MagicMock(return_value=MagicMock(id="dataset-1")))
+    search = MagicMock(
+        side_effect=lambda *args: [Document(page_content="A tort is a civil wrong.", metadata={"score": 0.9})]
+    )
+    monkeypatch.setattr(RetrievalService, "_retrieve", search)
+    return search
+
+
+def test_same_query_is_retrieved_once(retrieve):
+    first = RetrievalService.retrieve("semantic_search", "dataset-1", "what is a tort?", top_k=4)
+    second = RetrievalService.retrieve("semantic_search", "dataset-1", "  what is  a tort? ", top_k=4)
+
+    assert retrieve.call_count == 1
+    assert first == second
+
+
+def test_different_retrieval_config_is_retrieved_again(retrieve):
+    RetrievalService.retrieve("semantic_search", "dataset-1", "what is a tort?", top_k=4)
+    RetrievalService.retrieve("semantic_search", "dataset-1", "what is a tort?", top_k=8)
+    RetrievalService.retrieve("hybrid_search", "dataset-1", "what is a tort?", top_k=4)
+    RetrievalService.retrieve(
+        "semantic_search", "dataset-1", "what is a tort?", top_k=4, document_ids_filter=["document-1"]
+    )
+
+    assert retrieve.call_count == 4
+
+
+def test_index_change_drops_cached_results(retrieve):
+    RetrievalService.retrieve("semantic_search", "dataset-1", "what is a tort?", top_k=4)
+    vector = Vector.__new__(Vector)
+    vector._dataset = MagicMock(id="dataset-1")
+    vector._vector_processor = MagicMock()
+
+    vector.delete_by_ids(["segment-1"])
+    RetrievalService.retrieve("semantic_search", "dataset-1", "what is a tort?", top_k=4)
+
+    assert retrieve.call_count == 2
+
+
+def test_cache_disabled(retrieve, monkeypatch):
+    monkeypatch.setattr(retrieval_service.dify_config, "RETRIEVAL_RESULT_CACHE_TTL", 0)
+
+    RetrievalService.retrieve("semantic_search", "dataset-1", "what is a tort?", top_k=4)
+    RetrievalService.retrieve("semantic_search", "dataset-1", "what is a tort?", top_k=4)
+
+    assert retrieve.call_count == 2
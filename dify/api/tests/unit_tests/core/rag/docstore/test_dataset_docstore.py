@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.sql.dml import Insert, Update
+
+from core.rag.docstore import dataset_docstore
+from core.rag.docstore.dataset_docstore import DatasetDocumentStore, _to_copy_text
+from core.rag.models.document import ChildDocument, Document
+from models.dataset import ChildChunk, DocumentSegment
+
+
+@pytest.fixture
+def session(monkeypatch):
+    db = MagicMock()
+    db.session.query.return_value.filter.return_value.scalar.return_value = 2
+    db.session.scalars.return_value = []
+    monkeypatch.setattr(dataset_docstore, "db", db)
+    monkeypatch.setattr(dataset_docstore.dify_config, "SEGMENT_COPY_LOADER_ENABLED", False)
+    return db.session
+
+
+@pytest.fixture
+def doc_store() -> DatasetDocumentStore:
+    dataset = MagicMock(id="dataset-1", tenant_id="tenant-1", indexing_technique="economy")
+    return DatasetDocumentStore(dataset=dataset, user_id="user-1", document_id="document-1")
+
+
+def _doc(doc_id: str, content: str, children: list[str] | None = None) -> Document:
+    return Document(
+        page_content=content,
+        metadata={"doc_id": doc_id, "doc_hash": f"hash-{doc_id}"},
+        children=[
+            ChildDocument(page_content=child, metadata={"doc_id": f"{doc_id}-{i}", "doc_hash": "child-hash"})
+            for i, child in enumerate(children or [])
+        ],
+    )
+
+
+def _executed(session, statement_type: type, model: type) -> list[list[dict]]:
+    return [
+        call.args[1]
+        for call in session.execute.call_args_list
+        if isinstance(call.args[0], statement_type) and call.args[0].table.name == model.__tablename__
+    ]
+
+
+def test_add_documents_inserts_new_segments_and_child_chunks_in_bulk(session, doc_store):
+    doc_store.add_documents([_doc("node-1", "first", ["a", "b"]), _doc("node-2", "second", ["c"])], save_child=True)
+
+    (segment_rows,) = _executed(session, Insert, DocumentSegment)
+    assert [row["position"] for row in segment_rows] == [3, 4]
+    assert [row["index_node_id"] for row in segment_rows] == ["node-1", "node-2"]
+    (child_rows,) = _executed(session, Insert, ChildChunk)
+    assert [(row["content"], row["position"]) for row in child_rows] == [("a", 1), ("b", 2), ("c", 1)]
+    assert child_rows[0]["segment_id"] == segment_rows[0]["id"]
+    assert child_rows[2]["segment_id"] == segment_rows[1]["id"]
+    session.add.assert_not_called()
+    session.commit.assert_called_once()
+
+
+def test_add_documents_updates_existing_segments(session, doc_store):
+    session.scalars.return_value = [MagicMock(id="segment-1", index_node_id="node-1")]
+    doc = _doc("node-1", "changed", ["a"])
+    doc.metadata["answer"] = "answer"
+
+    doc_store.add_documents([doc, _doc("node-2", "new")], save_child=True)
+
+    (updates,) = _executed(session, Update, DocumentSegment)
+    assert updates == [
+        {
+            "id": "segment-1",
+            "index_node_hash": "hash-node-1",
+            "content": "changed",
+            "word_count": 7,
+            "tokens": 0,
+            "answer": "answer",
+        }
+    ]
+    (segment_rows,) = _executed(session, Insert, DocumentSegment)
+    assert [row["index_node_id"] for row in segment_rows] == ["node-2"]
+    (child_rows,) = _executed(session, Insert, ChildChunk)
+    assert child_rows[0]["segment_id"] == "segment-1"
+    session.query.return_value.filter.return_value.delete.assert_called_once()
+
+
+def test_add_documents_refuses_to_overwrite_without_allow_update(session, doc_store):
+    session.scalars.return_value = [MagicMock(id="segment-1", index_node_id="node-1")]
+
+    with pytest.raises(ValueError, match="node-1 already exists"):
+        doc_store.add_documents([_doc("node-2", "new"), _doc("node-1", "changed")], allow_update=False)
+
+    session.execute.assert_not_called()
+    session.commit.assert_not_called()
+
+
+def test_add_documents_copies_rows_when_enabled(session, doc_store, monkeypatch):
+    monkeypatch.setattr(dataset_docstore.dify_config, "SEGMENT_COPY_LOADER_ENABLED", True)
+    session.get_bind.return_value.dialect.driver = "psycopg2"
+    cursor = session.connection.return_value.connection.cursor.return_value
+
+    doc_store.add_documents([_doc("node-1", "line\nbreak")])
+
+    sql, buffer = cursor.copy_expert.call_args.args
+    assert sql.startswith("COPY document_segments (id, tenant_id, dataset_id, document_id, index_node_id,")
+    row = buffer.getvalue().rstrip("\n").split("\t")
+    assert "line\\nbreak" in row
+    assert _executed(session, Insert, DocumentSegment) == []
+
+
+def test_to_copy_text():
+    assert _to_copy_text(None) == "\\N"
+    assert _to_copy_text(False) == "f"
+    assert _to_copy_text(3) == "3"
+    assert _to_copy_text("a\tb\\c\r\n") == "a\\tb\\\\c\\r\\n"
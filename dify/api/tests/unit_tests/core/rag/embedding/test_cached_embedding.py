@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.entities.embedding_type import EmbeddingInputType
+from core.helper.micro_batcher import MicroBatcher
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.rag.embedding import cached_embedding
+from core.rag.embedding.cached_embedding import CacheEmbedding
+
+
+@pytest.fixture
+def provider(monkeypatch, local_redis) -> MagicMock:
+    monkeypatch.setattr(cached_embedding, "redis_client", local_redis)
+    monkeypatch.setattr(cached_embedding.dify_config, "EMBEDDING_BATCH_WINDOW_MS", 100)
+    monkeypatch.setattr(cached_embedding.dify_config, "EMBEDDING_BATCH_MAX_SIZE", 16)
+    monkeypatch.setattr(CacheEmbedding, "_batcher", MicroBatcher("embedding"))
+    # every text is embedded as [its length, 1]
+    return MagicMock(
+        side_effect=lambda texts, user=None, input_type=None: MagicMock(
+            embeddings=[[float(len(text)), 1.0] for text in texts]
+        )
+    )
+
+
+def _embedding(
+    provider: MagicMock, tenant_id: str = "tenant-1", model: str = "text-embedding-3-small"
+) -> CacheEmbedding:
+    model_instance = MagicMock(provider="openai", model=model, invoke_text_embedding=provider)
+    model_instance.provider_model_bundle.configuration.tenant_id = tenant_id
+    model_instance.model_type_instance.get_model_schema.return_value = MagicMock(
+        model_properties={ModelPropertyKey.MAX_CHUNKS: 16}
+    )
+    return CacheEmbedding(model_instance)
+
+
+def _concurrently(*calls):
+    start = threading.Barrier(len(calls))
+
+    def run(call):
+        start.wait()
+        return call()
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        return list(executor.map(run, calls))
+
+
+def test_concurrent_queries_of_the_same_model_are_embedded_in_one_request(provider):
+    embedding = _embedding(provider)
+
+    results = _concurrently(lambda: embedding.embed_query("a"), lambda: _embedding(provider).embed_query("bbb"))
+
+    provider.assert_called_once()
+    assert sorted(provider.call_args.kwargs["texts"]) == ["a", "bbb"]
+    # each caller gets the embedding of its own text
+    assert results[0] == pytest.approx([1 / 2**0.5, 1 / 2**0.5])
+    assert results[1] == pytest.approx([3 / 10**0.5, 1 / 10**0.5])
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        lambda provider: _embedding(provider, tenant_id="tenant-2")._embed_texts(["b"], EmbeddingInputType.QUERY),
+        lambda provider: _embedding(provider, model="text-embedding-3-large")._embed_texts(
+            ["b"], EmbeddingInputType.QUERY
+        ),
+        lambda provider: _embedding(provider)._embed_texts(["b"], EmbeddingInputType.DOCUMENT),
+    ],
+    ids=["tenant", "model", "input_type"],
+)
+def test_requests_of_other_tenants_models_and_input_types_are_not_batched(provider, other):
+    embedding = _embedding(provider)
+
+    results = _concurrently(
+        lambda: embedding._embed_texts(["a"], EmbeddingInputType.QUERY),
+        lambda: other(provider),
+    )
+
+    assert results == [[[1.0, 1.0]], [[1.0, 1.0]]]
+    assert sorted(call.kwargs["texts"] for call in provider.call_args_list) == [["a"], ["b"]]
+
+
+def test_failed_batch_embeds_each_request_alone(provider):
+    embed = provider.side_effect
+
+    def invoke_text_embedding(texts, user=None, input_type=None):
+        if len(texts) > 1:
+            raise RuntimeError("too many texts")
+        return embed(texts, user, input_type)
+
+    provider.side_effect = invoke_text_embedding
+    embedding = _embedding(provider)
+
+    results = _concurrently(
+        lambda: embedding._embed_texts(["a"], EmbeddingInputType.QUERY),
+        lambda: embedding._embed_texts(["bbb"], EmbeddingInputType.QUERY),
+    )
+
+    assert results == [[[1.0, 1.0]], [[3.0, 1.0]]]
+    # the batch request fails, then each request is sent alone
+    texts = [call.kwargs["texts"] for call in provider.call_args_list]
+    assert sorted(texts[0]) == ["a", "bbb"]
+    assert sorted(texts[1:]) == [["a"], ["bbb"]]
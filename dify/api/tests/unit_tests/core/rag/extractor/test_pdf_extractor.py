@@ -0,0 +1,35 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock
+
+from core.rag.extractor import pdf_extractor
+from core.rag.extractor.pdf_extractor import PdfExtractor
+
+
+def _page_texts(file_path: str, start: int, stop: int) -> list[str]:
+    return [f"page {page_number}" for page_number in range(start, stop)]
+
+
+def test_parse_in_parallel_extracts_the_remaining_pages_in_process_when_the_pool_breaks(monkeypatch):
+    monkeypatch.setattr(pdf_extractor.dify_config, "PDF_EXTRACTION_PROCESSES", 1)
+    monkeypatch.setattr(pdf_extractor.dify_config, "PDF_EXTRACTION_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(pdf_extractor, "_extract_page_texts", _page_texts)
+
+    def submit(fn, file_path, start, stop):
+        future: Future = Future()
+        if start == 0:
+            future.set_result(fn(file_path, start, stop))
+        else:
+            future.set_exception(BrokenProcessPool("a child process terminated abruptly"))
+        return future
+
+    executor = MagicMock()
+    executor.submit.side_effect = submit
+    monkeypatch.setattr(pdf_extractor, "_executor", executor)
+
+    documents = list(PdfExtractor("test.pdf")._parse_in_parallel("test.pdf", "test.pdf", 5))
+
+    assert [document.page_content for document in documents] == [f"page {page_number}" for page_number in range(5)]
+    assert [document.metadata["page"] for document in documents] == list(range(5))
+    executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+    assert pdf_extractor._executor is None
@@ -0,0 +1,65 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core.rag.index_processor.processor import qa_index_processor
+from core.rag.index_processor.processor.qa_index_processor import QAIndexProcessor
+from core.rag.models.document import Document
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = MagicMock()
+    monkeypatch.setattr(qa_index_processor, "redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def generate_qa_document(monkeypatch):
+    generate_qa_document = MagicMock()
+    monkeypatch.setattr(qa_index_processor.LLMGenerator, "generate_qa_document", generate_qa_document)
+    monkeypatch.setattr(qa_index_processor.time, "sleep", MagicMock())
+    return generate_qa_document
+
+
+def _node(content: str) -> Document:
+    return Document(page_content=content, metadata={"document_id": "document-1"})
+
+
+def test_generate_qa_documents_resumes_from_checkpoint(app: Flask, redis, generate_qa_document):
+    redis.mget.return_value = [json.dumps([{"question": "restored", "answer": "from checkpoint"}]), None, None]
+    generate_qa_document.side_effect = lambda tenant_id, content, language: f"Q1: {content}?\nA1: answer"
+
+    documents = QAIndexProcessor()._generate_qa_documents(
+        app, "tenant-1", [_node("first"), _node("second"), _node("third")], "English"
+    )
+
+    assert [document.page_content for document in documents] == ["restored", "second?", "third?"]
+    assert documents[1].metadata["answer"] == "answer"
+    assert generate_qa_document.call_count == 2
+    assert redis.setex.call_count == 2
+    checkpoint = json.loads(redis.setex.call_args.args[2])
+    assert checkpoint[0]["answer"] == "answer"
+
+
+def test_generate_qa_pairs_retries_failed_calls(app: Flask, redis, generate_qa_document):
+    generate_qa_document.side_effect = [RuntimeError("model overloaded"), "Q1: question\nA1: answer"]
+
+    qa_pairs = QAIndexProcessor()._generate_qa_pairs(app, "tenant-1", "content", "English", "checkpoint-key")
+
+    assert qa_pairs == [{"question": "question", "answer": "answer"}]
+    assert generate_qa_document.call_count == 2
+    redis.setex.assert_called_once()
+
+
+def test_generate_qa_pairs_gives_up_without_checkpoint(app: Flask, redis, generate_qa_document, monkeypatch):
+    monkeypatch.setattr(qa_index_processor.dify_config, "QA_INDEXING_MAX_RETRIES", 1)
+    generate_qa_document.side_effect = RuntimeError("model overloaded")
+
+    qa_pairs = QAIndexProcessor()._generate_qa_pairs(app, "tenant-1", "content", "English", "checkpoint-key")
+
+    assert qa_pairs == []
+    assert generate_qa_document.call_count == 2
+    redis.setex.assert_not_called()
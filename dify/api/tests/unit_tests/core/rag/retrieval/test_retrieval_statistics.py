@@ -0,0 +1,72 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.models.document import Document
+from core.rag.retrieval import retrieval_statistics
+from core.rag.retrieval.retrieval_statistics import RetrievalStatistics
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = MagicMock()
+    monkeypatch.setattr(retrieval_statistics, "redis_client", redis)
+    return redis
+
+
+def _document(doc_id: str, dataset_id: str = "dataset-1", provider: str = "dify") -> Document:
+    return Document(
+        page_content="content",
+        metadata={"doc_id": doc_id, "dataset_id": dataset_id, "document_id": "document-1"},
+        provider=provider,
+    )
+
+
+def test_record_hits_aggregates_per_segment_in_one_pipeline(redis):
+    pipeline = redis.pipeline.return_value
+
+    RetrievalStatistics.record_hits(
+        [
+            _document("node-1"),
+            _document("node-1"),
+            _document("node-2", dataset_id="dataset-2"),
+            _document("node-3", provider="external"),
+        ]
+    )
+
+    redis.pipeline.assert_called_once()
+    assert sorted(call.args for call in pipeline.hincrby.call_args_list) == [
+        (RetrievalStatistics._HITS_KEY, "dataset-1:node-1", 2),
+        (RetrievalStatistics._HITS_KEY, "dataset-2:node-2", 1),
+    ]
+    pipeline.execute.assert_called_once()
+
+
+def test_record_hits_without_dify_documents_skips_redis(redis):
+    RetrievalStatistics.record_hits([_document("node-1", provider="external")])
+
+    redis.pipeline.assert_not_called()
+
+
+def test_record_queries_pushes_one_entry_per_dataset(redis):
+    RetrievalStatistics.record_queries("what is a tort?", ["dataset-1", "dataset-2"], "app-1", "end_user", "user-1")
+
+    redis.rpush.assert_called_once()
+    key, *entries = redis.rpush.call_args.args
+    assert key == RetrievalStatistics._QUERIES_KEY
+    rows = [json.loads(entry) for entry in entries]
+    assert [row["dataset_id"] for row in rows] == ["dataset-1", "dataset-2"]
+    assert all(row["content"] == "what is a tort?" and row["source_app_id"] == "app-1" for row in rows)
+
+
+def test_flush_is_skipped_while_another_flush_holds_the_lock(redis, monkeypatch):
+    redis.lock.return_value.acquire.return_value = False
+    flush_hits = MagicMock()
+    monkeypatch.setattr(RetrievalStatistics, "_flush_hits", flush_hits)
+
+    RetrievalStatistics.flush()
+
+    redis.lock.assert_called_once_with(RetrievalStatistics._FLUSH_LOCK_KEY, timeout=600, blocking=False)
+    flush_hits.assert_not_called()
+    redis.lock.return_value.release.assert_not_called()
@@ -0,0 +1,166 @@
+import time
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+
+from core import indexing_runner
+from core.indexing_runner import DocumentIsDeletedPausedError, DocumentIsPausedError, IndexingRunner
+from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.models.document import Document
+from models.dataset import Document as DatasetDocument
+
+PAGES = 6
+SEGMENTS_PER_PAGE = 3
+PIPELINE_BATCH_SIZE = 4
+
+
+class _Pages:
+    """Extracted pages, failing after `fail_after` pages and remembering whether they were closed."""
+
+    def __init__(self, fail_after: int | None = None):
+        self.fail_after = fail_after
+        self.closed = False
+
+    def __call__(self, *args, **kwargs):
+        try:
+            for page in range(PAGES):
+                if page == self.fail_after:
+                    raise RuntimeError("extraction failed")
+                yield Document(page_content=f"page {page}", metadata={"page": page})
+        finally:
+            self.closed = True
+
+    def wait_closed(self) -> bool:
+        # a running extract thread closes the pages once it sees the pipeline stopped
+        for _ in range(300):
+            if self.closed:
+                return True
+            time.sleep(0.01)
+        return self.closed
+
+
+def _split(self, index_processor, dataset, text_docs, doc_language, process_rule) -> list[Document]:
+    return [
+        Document(page_content=f"{text_doc.page_content} segment {i}", metadata={"doc_id": str(uuid.uuid4())})
+        for text_doc in text_docs
+        for i in range(SEGMENTS_PER_PAGE)
+    ]
+
+
+@pytest.fixture
+def updates(monkeypatch) -> list[tuple[str, dict | None]]:
+    updates: list[tuple[str, dict | None]] = []
+
+    def update_document_index_status(document_id, after_indexing_status, extra_update_params=None):
+        updates.append((after_indexing_status, extra_update_params))
+
+    monkeypatch.setattr(IndexingRunner, "_update_document_index_status", staticmethod(update_document_index_status))
+    return updates
+
+
+@pytest.fixture
+def pipeline(monkeypatch, updates):
+    db = MagicMock()
+    db.session.query.return_value.filter_by.return_value.first.return_value = MagicMock(
+        id="dataset-1", tenant_id="tenant-1", indexing_technique="high_quality"
+    )
+    db.session.query.return_value.filter.return_value.first.return_value.to_dict.return_value = {"mode": "automatic"}
+    monkeypatch.setattr(indexing_runner, "db", db)
+    monkeypatch.setattr(indexing_runner, "current_app", MagicMock())
+    monkeypatch.setattr(indexing_runner, "DocumentSegmentStatisticsService", MagicMock())
+    monkeypatch.setattr(indexing_runner, "DatasetDocumentStore", MagicMock())
+    monkeypatch.setattr(indexing_runner.dify_config, "INDEXING_PIPELINE_ENABLED", True)
+    monkeypatch.setattr(indexing_runner.dify_config, "INDEXING_PIPELINE_BATCH_SIZE", PIPELINE_BATCH_SIZE)
+    monkeypatch.setattr(IndexingRunner, "_get_extract_setting", staticmethod(lambda dataset_document: MagicMock()))
+    monkeypatch.setattr(IndexingRunner, "_transform", _split)
+    monkeypatch.setattr(IndexingRunner, "_save_pipeline_segments", MagicMock())
+    monkeypatch.setattr(IndexingRunner, "_process_pipeline_chunk", MagicMock(side_effect=lambda *args: len(args[2])))
+    monkeypatch.setattr(IndexingRunner, "_process_keyword_index", MagicMock())
+
+    pages = _Pages()
+    monkeypatch.setattr(indexing_runner.ExtractProcessor, "iter_extract", lambda *args, **kwargs: pages())
+
+    runner = IndexingRunner()
+    runner.model_manager = MagicMock()
+    dataset_document = MagicMock(
+        id="document-1",
+        dataset_id="dataset-1",
+        doc_form=IndexType.PARAGRAPH_INDEX,
+        data_source_type="upload_file",
+        indexing_status="parsing",
+    )
+    return runner, dataset_document, pages, db
+
+
+def test_pipeline_saves_and_loads_all_segments(pipeline, updates):
+    runner, dataset_document, pages, _ = pipeline
+
+    runner.run([dataset_document])
+
+    saved = [document for call in IndexingRunner._save_pipeline_segments.call_args_list for document in call.args[2]]
+    loaded = [document for call in IndexingRunner._process_pipeline_chunk.call_args_list for document in call.args[2]]
+    assert len(saved) == PAGES * SEGMENTS_PER_PAGE
+    assert sorted(document.metadata["doc_id"] for document in loaded) == sorted(
+        document.metadata["doc_id"] for document in saved
+    )
+    assert [status for status, _ in updates] == ["splitting", "indexing", "indexing", "completed"]
+    # every segment counted one token in the loader
+    assert updates[-1][1][DatasetDocument.tokens] == PAGES * SEGMENTS_PER_PAGE
+    indexing_runner.DocumentSegmentStatisticsService.refresh.assert_called_once_with(["document-1"])
+    assert dataset_document.indexing_status == "parsing"
+    assert pages.closed
+
+
+def test_pipeline_extractor_error_marks_the_document_as_error(pipeline, monkeypatch):
+    runner, dataset_document, _, db = pipeline
+    pages = _Pages(fail_after=3)
+    monkeypatch.setattr(indexing_runner.ExtractProcessor, "iter_extract", lambda *args, **kwargs: pages())
+
+    runner.run([dataset_document])
+
+    assert dataset_document.indexing_status == "error"
+    assert dataset_document.error == "extraction failed"
+    db.session.commit.assert_called()
+    assert pages.wait_closed()
+
+
+def test_pipeline_loader_error_marks_the_document_as_error(pipeline):
+    runner, dataset_document, pages, _ = pipeline
+    IndexingRunner._process_pipeline_chunk.side_effect = RuntimeError("embedding failed")
+
+    runner.run([dataset_document])
+
+    assert dataset_document.indexing_status == "error"
+    assert dataset_document.error == "embedding failed"
+    assert pages.wait_closed()
+
+
+def test_pipeline_stops_when_the_document_is_paused(pipeline, monkeypatch):
+    runner, dataset_document, pages, _ = pipeline
+    statuses = []
+
+    def update_document_index_status(document_id, after_indexing_status, extra_update_params=None):
+        statuses.append(after_indexing_status)
+        if after_indexing_status == "indexing":
+            raise DocumentIsPausedError()
+
+    monkeypatch.setattr(IndexingRunner, "_update_document_index_status", staticmethod(update_document_index_status))
+
+    with pytest.raises(DocumentIsPausedError):
+        runner.run([dataset_document])
+
+    IndexingRunner._save_pipeline_segments.assert_not_called()
+    assert statuses == ["splitting", "indexing"]
+    assert pages.wait_closed()
+
+
+def test_pipeline_stops_when_the_document_is_deleted(pipeline):
+    runner, dataset_document, pages, _ = pipeline
+    IndexingRunner._process_pipeline_chunk.side_effect = DocumentIsDeletedPausedError()
+
+    runner.run([dataset_document])
+
+    assert dataset_document.indexing_status == "error"
+    indexing_runner.DocumentSegmentStatisticsService.refresh.assert_not_called()
+    assert pages.wait_closed()
@@ -1,3 +1,25 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core import provider_manager
+from core.entities.provider_configuration import ProviderConfiguration, ProviderConfigurations
+from core.entities.provider_entities import (
+    CustomConfiguration,
+    CustomProviderConfiguration,
+    ProviderQuotaType,
+    QuotaConfiguration,
+    QuotaUnit,
+    SystemConfiguration,
+)
+from core.helper import model_provider_cache
+from core.hosting_configuration import HostingProvider, PaidHostingQuota, TrialHostingQuota
+from core.model_runtime.entities.common_entities import I18nObject
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.entities.provider_entities import ConfigurateMethod, ProviderEntity
+from core.provider_manager import ProviderManager
+from models.provider import ProviderType
+
 # from core.entities.provider_entities import ModelSettings
 # from core.model_runtime.entities.model_entities import ModelType
 # from core.model_runtime.model_providers.model_provider_factory import ModelProviderFactory
@@ -188,3 +210,136 @@
 #     assert result[0].model_type == ModelType.LLM
 #     assert result[0].enabled is True
 #     assert len(result[0].load_balancing_configs) == 0
+
+
+def _provider_configurations(tenant_id: str) -> ProviderConfigurations:
+    provider_configurations = ProviderConfigurations(tenant_id=tenant_id)
+    provider_configurations["langgenius/openai/openai"] = ProviderConfiguration(
+        tenant_id=tenant_id,
+        provider=ProviderEntity(
+            provider="langgenius/openai/openai",
+            label=I18nObject(en_US="OpenAI"),
+            supported_model_types=[ModelType.LLM],
+            configurate_methods=[ConfigurateMethod.PREDEFINED_MODEL],
+        ),
+        preferred_provider_type=ProviderType.CUSTOM,
+        using_provider_type=ProviderType.CUSTOM,
+        system_configuration=SystemConfiguration(
+            enabled=True,
+            current_quota_type=ProviderQuotaType.TRIAL,
+            quota_configurations=[
+                QuotaConfiguration(
+                    quota_type=ProviderQuotaType.TRIAL,
+                    quota_unit=QuotaUnit.TIMES,
+                    quota_used=0,
+                    quota_limit=10,
+                    is_valid=True,
+                )
+            ],
+        ),
+        custom_configuration=CustomConfiguration(provider=CustomProviderConfiguration(credentials={"api_key": "key"})),
+        model_settings=[],
+    )
+    return provider_configurations
+
+
+@pytest.fixture
+def build_configurations(monkeypatch):
+    build_configurations = MagicMock(side_effect=_provider_configurations)
+    monkeypatch.setattr(ProviderManager, "_get_configurations", lambda self, tenant_id: build_configurations(tenant_id))
+    monkeypatch.setattr(provider_manager, "_provider_configurations", {})
+    return build_configurations
+
+
+@pytest.fixture
+def quota_usage(monkeypatch):
+    quota_usage = {("langgenius/openai/openai", "trial"): (0, 10)}
+    monkeypatch.setattr(ProviderManager, "_get_system_quota_usage", staticmethod(lambda tenant_id: quota_usage))
+    return quota_usage
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = MagicMock()
+    redis.get.return_value = None
+    monkeypatch.setattr(model_provider_cache, "redis_client", redis)
+    return redis
+
+
+def test_get_configurations_reuses_configurations_of_the_same_version(build_configurations, redis, quota_usage):
+    first = ProviderManager().get_configurations("tenant-1")
+    first["openai"].custom_configuration.provider.credentials["api_key"] = "changed"
+    second = ProviderManager().get_configurations("tenant-1")
+
+    build_configurations.assert_called_once_with("tenant-1")
+    assert second["openai"].get_current_credentials(ModelType.LLM, "gpt-4o") == {"api_key": "key"}
+    assert second["openai"].provider is first["openai"].provider
+
+
+def test_get_configurations_rebuilds_after_invalidation(build_configurations, redis, quota_usage):
+    ProviderManager().get_configurations("tenant-1")
+    redis.get.return_value = b"1"
+    ProviderManager().get_configurations("tenant-1")
+    ProviderManager().get_configurations("tenant-2")
+
+    assert build_configurations.call_count == 3
+    redis.get.assert_called_with("provider_configurations_version:tenant_id:tenant-2")
+
+
+def test_get_configurations_applies_current_quota_usage(build_configurations, redis, quota_usage):
+    ProviderManager().get_configurations("tenant-1")
+    quota_usage[("langgenius/openai/openai", "trial")] = (4, 10)
+    quota_configuration = (
+        ProviderManager().get_configurations("tenant-1")["openai"].system_configuration.quota_configurations[0]
+    )
+
+    build_configurations.assert_called_once()
+    assert quota_configuration.quota_used == 4
+    assert quota_configuration.is_valid
+
+
+def test_get_configurations_rebuilds_when_a_quota_is_exceeded(build_configurations, redis, quota_usage):
+    ProviderManager().get_configurations("tenant-1")
+    quota_usage[("langgenius/openai/openai", "trial")] = (10, 10)
+    ProviderManager().get_configurations("tenant-1")
+
+    assert build_configurations.call_count == 2
+
+
+def test_get_configurations_reuses_configurations_with_records_of_quota_types_not_hosted(
+    build_configurations, redis, quota_usage, monkeypatch
+):
+    monkeypatch.setattr(
+        provider_manager.ext_hosting_provider.hosting_configuration,
+        "provider_map",
+        {"langgenius/openai/openai": HostingProvider(enabled=True, quotas=[TrialHostingQuota(quota_limit=10)])},
+    )
+    quota_usage[("langgenius/openai/openai", "paid")] = (0, 100)
+
+    ProviderManager().get_configurations("tenant-1")
+    ProviderManager().get_configurations("tenant-1")
+    build_configurations.assert_called_once()
+
+    provider_manager.ext_hosting_provider.hosting_configuration.provider_map["langgenius/openai/openai"].quotas.append(
+        PaidHostingQuota()
+    )
+    ProviderManager().get_configurations("tenant-1")
+    assert build_configurations.call_count == 2
+
+
+def test_get_configurations_without_cache(build_configurations, redis, monkeypatch):
+    monkeypatch.setattr(provider_manager.dify_config, "PROVIDER_CONFIGURATIONS_CACHE_TTL", 0)
+
+    ProviderManager().get_configurations("tenant-1")
+    ProviderManager().get_configurations("tenant-1")
+
+    assert build_configurations.call_count == 2
+    redis.get.assert_not_called()
+
+
+def test_invalidate_bumps_the_version(redis):
+    model_provider_cache.ProviderConfigurationsCache(tenant_id="tenant-1").invalidate()
+
+    pipeline = redis.pipeline.return_value
+    pipeline.incr.assert_called_once_with("provider_configurations_version:tenant_id:tenant-1")
+    pipeline.execute.assert_called_once()
@@ -1,7 +1,10 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
 import rsa as pyrsa
 from Crypto.PublicKey import RSA
 
-from libs import gmpy2_pkcs10aep_cipher
+from libs import gmpy2_pkcs10aep_cipher, rsa
 
 
 def test_gmpy2_pkcs10aep_cipher() -> None:
@@ -27,3 +30,54 @@ def test_gmpy2_pkcs10aep_cipher() -> None:
     encrypted_by_private_key = private_cipher_rsa.encrypt(message=raw_text_bytes)
     decrypted_by_private_key = private_cipher_rsa.decrypt(encrypted_by_private_key)
     assert decrypted_by_private_key == raw_text_bytes
+
+
+@pytest.fixture
+def key_storage(monkeypatch):
+    saved: dict[str, bytes] = {}
+    storage = MagicMock()
+    storage.save.side_effect = saved.__setitem__
+    storage.load.side_effect = lambda filepath: saved[filepath]
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+    monkeypatch.setattr(rsa, "storage", storage)
+    monkeypatch.setattr(rsa, "redis_client", redis_client)
+    monkeypatch.setattr(rsa, "_decrypt_decodings", rsa.TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(rsa, "_decrypted_texts", rsa.TTLCache(maxsize=16, ttl=60))
+    return storage
+
+
+def test_decrypt_caches_key_and_decrypted_text(key_storage) -> None:
+    encrypted_text = rsa.encrypt("secret", rsa.generate_key_pair("tenant-1"))
+
+    assert rsa.decrypt(encrypted_text, "tenant-1") == "secret"
+    assert rsa.decrypt(encrypted_text, "tenant-1") == "secret"
+    assert key_storage.load.call_count == 1
+
+    with patch.object(rsa, "_decrypt_token_with_decoding") as decrypt_token:
+        assert rsa.decrypt(encrypted_text, "tenant-1") == "secret"
+    decrypt_token.assert_not_called()
+
+
+def test_decrypt_reloads_key_reset_by_another_process(key_storage) -> None:
+    rsa.decrypt(rsa.encrypt("old", rsa.generate_key_pair("tenant-1")), "tenant-1")
+    # the key pair is reset elsewhere, this process still holds the old key
+    cached_decoding = rsa._decrypt_decodings["tenant-1"]
+    encrypted_text = rsa.encrypt("new", rsa.generate_key_pair("tenant-1"))
+    rsa._decrypt_decodings["tenant-1"] = cached_decoding
+
+    assert rsa.decrypt(encrypted_text, "tenant-1") == "new"
+    assert rsa._decrypt_decodings["tenant-1"] is not cached_decoding
+
+
+def test_decrypt_keeps_the_current_key_when_a_text_does_not_decrypt(key_storage) -> None:
+    rsa.decrypt(rsa.encrypt("secret", rsa.generate_key_pair("tenant-1")), "tenant-1")
+    cached_decoding = rsa._decrypt_decodings["tenant-1"]
+    # encrypted with a key the tenant never had
+    encrypted_text = rsa.encrypt("other", RSA.generate(2048).publickey().export_key())
+
+    with pytest.raises(ValueError):
+        rsa.decrypt(encrypted_text, "tenant-1")
+
+    assert rsa._decrypt_decodings["tenant-1"] is cached_decoding
+    rsa.redis_client.delete.assert_called_once()
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from extensions.storage.cached_storage import CachedStorage
+from extensions.storage.opendal_storage import OpenDALStorage
+
+
+class TestCachedStorage:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        self.backend = MagicMock(wraps=OpenDALStorage(scheme="fs", root=str(tmp_path / "storage")))
+        self.storage = CachedStorage(
+            self.backend, path=str(tmp_path / "cache"), max_size=100, prefixes=("upload_files/",)
+        )
+
+    def test_load_once_reads_backend_once(self):
+        self.storage.save("upload_files/a.png", b"image")
+
+        assert self.storage.load_once("upload_files/a.png") == b"image"
+        assert self.storage.load_once("upload_files/a.png") == b"image"
+        assert self.backend.load_once.call_count == 1
+
+    def test_load_stream_caches_streamed_content(self):
+        self.storage.save("upload_files/a.mp3", b"audio")
+
+        assert b"".join(self.storage.load_stream("upload_files/a.mp3")) == b"audio"
+        assert self.storage.load_once("upload_files/a.mp3") == b"audio"
+        assert b"".join(self.storage.load_range("upload_files/a.mp3", 1, 3)) == b"ud"
+        self.backend.load_once.assert_not_called()
+        self.backend.load_range.assert_not_called()
+
+    def test_save_and_delete_drop_cached_content(self):
+        self.storage.save("upload_files/a.txt", b"old")
+        assert self.storage.load_once("upload_files/a.txt") == b"old"
+
+        self.storage.save("upload_files/a.txt", b"new")
+        assert self.storage.load_once("upload_files/a.txt") == b"new"
+
+        self.storage.delete("upload_files/a.txt")
+        with pytest.raises(FileNotFoundError):
+            self.storage.load_once("upload_files/a.txt")
+
+    def test_same_content_is_cached_once(self, tmp_path):
+        self.storage.save("upload_files/a.txt", b"same")
+        self.storage.save("upload_files/b.txt", b"same")
+        self.storage.load_once("upload_files/a.txt")
+        self.storage.load_once("upload_files/b.txt")
+
+        assert len(list((tmp_path / "cache" / "objects").iterdir())) == 1
+
+    def test_least_recently_read_content_is_evicted(self):
+        for name in ["upload_files/a", "upload_files/b", "upload_files/c"]:
+            self.storage.save(name, name[-1].encode() * 40)
+            self.storage.load_once(name)
+        self.backend.load_once.reset_mock()
+
+        # the cache holds 100 bytes, "a" was read first and is evicted
+        assert self.storage.load_once("upload_files/c") == b"c" * 40
+        assert self.storage.load_once("upload_files/a") == b"a" * 40
+        assert [call.args[0] for call in self.backend.load_once.call_args_list] == ["upload_files/a"]
+
+    def test_content_larger_than_cache_is_not_cached(self):
+        self.storage.save("upload_files/large", b"x" * 101)
+
+        assert b"".join(self.storage.load_stream("upload_files/large")) == b"x" * 101
+        assert self.storage.load_once("upload_files/large") == b"x" * 101
+        assert self.backend.load_once.call_count == 1
+
+    def test_files_outside_prefixes_are_not_cached(self):
+        self.storage.save("keyword_files/tenant/dataset.txt", b"old")
+        assert self.storage.load_once("keyword_files/tenant/dataset.txt") == b"old"
+
+        # rewritten by another process
+        self.backend.save("keyword_files/tenant/dataset.txt", b"new")
+
+        assert self.storage.load_once("keyword_files/tenant/dataset.txt") == b"new"
+        assert b"".join(self.storage.load_stream("keyword_files/tenant/dataset.txt")) == b"new"
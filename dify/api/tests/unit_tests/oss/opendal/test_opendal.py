@@ -64,6 +64,21 @@ class TestOpenDAL:
         assert isinstance(generator, Generator)
         assert next(generator) == data
 
+    def test_load_range(self):
+        """Test loading a range of bytes as a stream."""
+        filename = get_example_filename()
+        data = get_example_data()
+
+        self.storage.save(filename, data)
+        assert b"".join(self.storage.load_range(filename, 1, 3)) == data[1:3]
+
+    def test_load_not_found(self):
+        """Test loading a file that does not exist."""
+        with pytest.raises(FileNotFoundError):
+            self.storage.load_once("not_found.txt")
+        with pytest.raises(FileNotFoundError):
+            next(self.storage.load_stream("not_found.txt"))
+
     def test_download(self):
         """Test downloading data to a file."""
         filename = get_example_filename()
@@ -0,0 +1,140 @@
+"""
+Unit tests for the write-behind implementation of WorkflowNodeExecutionRepository.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, sessionmaker
+
+from core.repositories import WriteBehindWorkflowNodeExecutionRepository
+from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution, WorkflowNodeExecutionStatus
+from core.workflow.nodes.enums import NodeType
+from models.account import Account
+from models.workflow import WorkflowNodeExecutionTriggeredFrom
+
+
+@pytest.fixture
+def session():
+    """Create a mock SQLAlchemy session."""
+    session = MagicMock(spec=Session)
+    session.__enter__ = MagicMock(return_value=session)
+    session.__exit__ = MagicMock(return_value=None)
+
+    session_factory = MagicMock(spec=sessionmaker)
+    session_factory.return_value = session
+    return session, session_factory
+
+
+@pytest.fixture
+def repository(session):
+    """Create a repository whose worker never flushes on its own during a test."""
+    _, session_factory = session
+    user = Account()
+    user.id = "test-user-id"
+    user._current_tenant = MagicMock()
+    user._current_tenant.id = "test-tenant"
+    return WriteBehindWorkflowNodeExecutionRepository(
+        session_factory=session_factory,
+        user=user,
+        app_id="test-app",
+        triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+        batch_size=1000,
+        flush_interval=60,
+    )
+
+
+def _create_execution(index: int) -> WorkflowNodeExecution:
+    return WorkflowNodeExecution(
+        id=f"execution-{index}",
+        node_execution_id=f"node-execution-{index}",
+        workflow_id="test-workflow-id",
+        workflow_execution_id="test-workflow-run-id",
+        index=index,
+        node_id=f"node-{index}",
+        node_type=NodeType.LLM,
+        title=f"Node {index}",
+        inputs={"query": "hello"},
+        status=WorkflowNodeExecutionStatus.RUNNING,
+        created_at=datetime(2024, 1, 1),
+    )
+
+
+def test_save_does_not_touch_database(repository, session):
+    session_obj, session_factory = session
+
+    repository.save(_create_execution(1))
+
+    session_factory.assert_not_called()
+    session_obj.commit.assert_not_called()
+
+
+def test_get_by_node_execution_id_returns_buffered_state(repository, session):
+    _, session_factory = session
+    execution = _create_execution(1)
+    repository.save(execution)
+
+    execution.status = WorkflowNodeExecutionStatus.SUCCEEDED
+    repository.save(execution)
+
+    result = repository.get_by_node_execution_id("node-execution-1")
+
+    assert result is not None
+    assert result is not execution
+    assert result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    session_factory.assert_not_called()
+
+
+def test_flush_writes_latest_snapshots_in_one_commit(repository, session):
+    session_obj, _ = session
+    first = _create_execution(1)
+    repository.save(first)
+    repository.save(_create_execution(2))
+    first.status = WorkflowNodeExecutionStatus.SUCCEEDED
+    repository.save(first)
+
+    repository.flush()
+
+    session_obj.execute.assert_called_once()
+    session_obj.commit.assert_called_once()
+    params = session_obj.execute.call_args.args[0].compile(dialect=postgresql.dialect()).params
+    assert params["id_m0"] == "execution-1"
+    assert params["status_m0"] == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert params["id_m1"] == "execution-2"
+
+    # Nothing is left to write
+    repository.flush()
+    session_obj.execute.assert_called_once()
+
+
+def test_failed_flush_keeps_executions_buffered(repository, session):
+    session_obj, _ = session
+    session_obj.execute.side_effect = [RuntimeError("database is gone"), MagicMock()]
+    repository.save(_create_execution(1))
+
+    with pytest.raises(RuntimeError):
+        repository.flush()
+
+    repository.flush()
+
+    assert session_obj.execute.call_count == 2
+    session_obj.commit.assert_called_once()
+
+
+def test_worker_flushes_when_batch_is_full(session, repository):
+    session_obj, _ = session
+    repository._batch_size = 2
+    repository._flush_interval = 0.05
+
+    repository.save(_create_execution(1))
+    repository.save(_create_execution(2))
+
+    worker = repository._worker
+    assert worker is not None
+    worker.join(timeout=5)
+
+    session_obj.execute.assert_called_once()
+    session_obj.commit.assert_called_once()
+    assert repository._worker is None
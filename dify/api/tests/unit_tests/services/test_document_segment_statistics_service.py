@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services import document_segment_statistics_service
+from services.document_segment_statistics_service import DocumentSegmentStatisticsService
+
+
+@pytest.fixture
+def session(monkeypatch):
+    db = MagicMock()
+    monkeypatch.setattr(document_segment_statistics_service, "db", db)
+    return db.session
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_refresh_updates_all_documents_in_one_statement(session):
+    DocumentSegmentStatisticsService.refresh(["document-1", "document-2"])
+
+    session.execute.assert_called_once()
+    sql = _compile(session.execute.call_args.args[0])
+    assert sql.startswith("UPDATE documents SET")
+    assert "total_segments=(SELECT count(document_segments.id)" in sql
+    assert "completed_segments=(SELECT count(document_segments.id)" in sql
+    assert "total_hit_count=(SELECT coalesce(sum(document_segments.hit_count)" in sql
+    session.commit.assert_not_called()
+
+
+def test_refresh_without_documents_is_a_no_op(session):
+    DocumentSegmentStatisticsService.refresh([])
+
+    session.execute.assert_not_called()
+
+
+def test_increment_hit_counts_skips_documents_without_hits(session):
+    DocumentSegmentStatisticsService.increment_hit_counts({"document-1": 3, "document-2": 0})
+
+    session.execute.assert_called_once()
+    params = session.execute.call_args.args[0].compile(dialect=postgresql.dialect()).params
+    assert params["id_1"] == "document-1"
+    assert params["total_hit_count_1"] == 3
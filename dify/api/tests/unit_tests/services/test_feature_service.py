@@ -0,0 +1,59 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from services import feature_service
+from services.feature_service import FeatureService
+
+
+@pytest.fixture
+def billing(monkeypatch, local_redis):
+    monkeypatch.setattr(feature_service, "redis_client", local_redis)
+    monkeypatch.setattr(feature_service.dify_config, "BILLING_ENABLED", True)
+    monkeypatch.setattr(feature_service.dify_config, "FEATURES_CACHE_TTL", 30)
+    billing_service = MagicMock()
+    billing_service.get_info.return_value = {
+        "enabled": True,
+        "subscription": {"plan": "sandbox", "interval": "month"},
+        "apps": {"size": 1, "limit": 5},
+    }
+    billing_service.get_knowledge_rate_limit.return_value = {"limit": 10, "subscription_plan": "sandbox"}
+    monkeypatch.setattr(feature_service, "BillingService", billing_service)
+    return billing_service
+
+
+def test_features_are_fetched_once(billing):
+    assert FeatureService.get_features("tenant-1").apps.limit == 5
+    assert FeatureService.get_features("tenant-1").apps.limit == 5
+    assert FeatureService.get_knowledge_rate_limit("tenant-1").limit == 10
+    assert FeatureService.get_knowledge_rate_limit("tenant-1").limit == 10
+
+    assert billing.get_info.call_count == 1
+    assert billing.get_knowledge_rate_limit.call_count == 1
+
+
+def test_refresh_fetches_current_features(billing):
+    FeatureService.get_features("tenant-1")
+    billing.get_info.return_value["apps"]["size"] = 5
+
+    assert FeatureService.get_features("tenant-1", refresh=True).apps.size == 5
+    assert FeatureService.get_features("tenant-1").apps.size == 5
+    assert billing.get_info.call_count == 2
+
+
+def test_subscription_event_drops_features(billing):
+    assert FeatureService.get_features("tenant-1").billing.subscription.plan == "sandbox"
+    billing.get_info.return_value["subscription"]["plan"] = "team"
+
+    FeatureService.invalidate_features("tenant-1")
+
+    assert FeatureService.get_features("tenant-1").billing.subscription.plan == "team"
+
+
+def test_cache_disabled(billing, monkeypatch):
+    monkeypatch.setattr(feature_service.dify_config, "FEATURES_CACHE_TTL", 0)
+
+    FeatureService.get_features("tenant-1")
+    FeatureService.get_features("tenant-1")
+
+    assert billing.get_info.call_count == 2
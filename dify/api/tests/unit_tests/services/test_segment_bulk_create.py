@@ -0,0 +1,136 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.rag.index_processor.constant.index_type import IndexType
+from services import dataset_service
+from services.dataset_service import SegmentService
+
+
+@pytest.fixture
+def db():
+    with patch("services.dataset_service.db") as db, patch("services.dataset_service.current_app", MagicMock()):
+        db.session.scalar.return_value = 3
+        db.session.scalars.side_effect = lambda statement, rows=(): [MagicMock(**row) for row in rows]
+        yield db
+
+
+@pytest.fixture(autouse=True)
+def redis_client(monkeypatch):
+    redis_client = MagicMock()
+    monkeypatch.setattr(dataset_service, "redis_client", redis_client)
+    return redis_client
+
+
+@pytest.fixture
+def vector_service():
+    with patch("services.dataset_service.VectorService") as vector_service:
+        yield vector_service
+
+
+@pytest.fixture(autouse=True)
+def statistics_service():
+    with patch("services.dataset_service.DocumentSegmentStatisticsService") as statistics_service:
+        yield statistics_service
+
+
+def _document(doc_form: str = "text_model") -> MagicMock:
+    return MagicMock(id="document-1", dataset_id="dataset-1", doc_form=doc_form)
+
+
+def _dataset() -> MagicMock:
+    return MagicMock(id="dataset-1", indexing_technique="economy")
+
+
+def test_bulk_create_segments_inserts_batches_with_contiguous_positions(db, vector_service, redis_client):
+    segments = [{"content": f"content {i}"} for i in range(5)]
+    commits_before_indexing = []
+    vector_service.create_segments_vector.side_effect = lambda *args: commits_before_indexing.append(
+        db.session.commit.call_count
+    )
+
+    created = SegmentService.bulk_create_segments(
+        segments, _document(), _dataset(), tenant_id="tenant-1", user_id="user-1", batch_size=2
+    )
+
+    inserts = [call for call in db.session.scalars.call_args_list if len(call.args) == 2]
+    assert len(inserts) == 3
+    assert [segment.position for segment in created] == [4, 5, 6, 7, 8]
+    assert [segment.status for segment in created] == ["completed"] * 5
+    assert [len(call.args[1]) for call in vector_service.create_segments_vector.call_args_list] == [2, 2, 1]
+    # positions are reserved under the lock and committed before any batch is embedded
+    redis_client.lock.assert_called_once_with("add_segment_lock_document_id_document-1", timeout=600)
+    assert commits_before_indexing == [1, 1, 1]
+    assert db.session.commit.call_count == 2
+
+
+def _fail_batch_with(content: str):
+    def create_segments_vector(keywords_list, segments, dataset, doc_form):
+        if any(segment.content == content for segment in segments):
+            raise RuntimeError("vector store is gone")
+
+    return create_segments_vector
+
+
+def test_bulk_create_segments_marks_failed_batch_as_error(db, vector_service):
+    segments = [{"content": f"content {i}"} for i in range(4)]
+    vector_service.create_segments_vector.side_effect = _fail_batch_with("content 2")
+
+    created = SegmentService.bulk_create_segments(
+        segments, _document(), _dataset(), tenant_id="tenant-1", user_id="user-1", batch_size=2
+    )
+
+    assert [segment.status for segment in created] == ["completed", "completed", "error", "error"]
+    assert created[2].error == "vector store is gone"
+    assert db.session.commit.call_count == 2
+
+
+def test_bulk_create_segments_stops_and_deletes_segments_when_raising_on_index_error(db, vector_service):
+    segments = [{"content": f"content {i}"} for i in range(8)]
+    vector_service.create_segments_vector.side_effect = _fail_batch_with("content 2")
+
+    with patch("services.dataset_service.IndexProcessorFactory") as index_processor_factory:
+        with pytest.raises(RuntimeError):
+            SegmentService.bulk_create_segments(
+                segments,
+                _document(),
+                _dataset(),
+                tenant_id="tenant-1",
+                user_id="user-1",
+                batch_size=2,
+                raise_on_index_error=True,
+            )
+
+    # two batches are indexed at a time, no batch is submitted once the failure is known
+    assert vector_service.create_segments_vector.call_count == 3
+    db.session.rollback.assert_called_once()
+    statements = [str(call.args[0]) for call in db.session.execute.call_args_list]
+    assert any(statement.startswith("DELETE FROM document_segments") for statement in statements)
+    index_processor = index_processor_factory.return_value.init_index_processor.return_value
+    assert len(index_processor.clean.call_args.args[1]) == 8
+
+
+def test_bulk_create_segments_cleans_child_chunks_before_deleting_parent_child_segments(db, vector_service):
+    segments = [{"content": f"content {i}"} for i in range(4)]
+    vector_service.create_segments_vector.side_effect = _fail_batch_with("content 2")
+    steps = []
+    db.session.execute.side_effect = lambda statement: steps.append(str(statement).split(" ")[0])
+
+    with patch("services.dataset_service.IndexProcessorFactory") as index_processor_factory:
+        index_processor = index_processor_factory.return_value.init_index_processor.return_value
+        index_processor.clean.side_effect = lambda *args, **kwargs: steps.append("clean")
+        with pytest.raises(RuntimeError):
+            SegmentService.bulk_create_segments(
+                segments,
+                _document(doc_form=IndexType.PARENT_CHILD_INDEX),
+                _dataset(),
+                tenant_id="tenant-1",
+                user_id="user-1",
+                batch_size=2,
+                raise_on_index_error=True,
+            )
+
+    # child vectors and chunks are found through the segments, so they are cleaned while those still exist
+    assert steps.index("clean") < steps.index("DELETE")
+    index_processor.clean.assert_called_once()
+    assert index_processor.clean.call_args.kwargs == {"with_keywords": True, "delete_child_chunks": True}